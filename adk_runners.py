@@ -8,93 +8,466 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import json
+import time
+import asyncio
+import contextlib
 
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
+from runner_pool import get_pool
+from validation_cache import ValidationCache, normalize_input
+from single_flight import SingleFlight
+from hedging import HedgePolicy, Hedger
+import metrics
+from metrics import add_usage, model_name, tracer
+from partial_json import extract_partial_string
+from speculation import SpeculationPolicy, SpeculativeBranch, SpeculativeTurn
+from model_backend import warm_up_model
+from model_scheduler import ModelCallSlots, Priority, scheduler
+from opening_book import OpeningBook
 
 from google.genai import types 
+from google.adk.agents.run_config import RunConfig, StreamingMode
 # For creating message Content/Parts
 # This is installed with ADK doesn't need to install separaterly
 
 from validation_agent.agent import root_agent as validation_agent
 from question_agents.agent import root_agent as question_agent
+from question_agents.actions import AgentAction, GuessAction, QuestionAction, action_from_event
+from question_agents.ledger import LEDGER_STATE_KEY
+from question_agents.routing import collect_decisions, routing_policy
+from game_rules import ASK_QUESTION, MAKE_GUESS
 
 from uuid import uuid4
+from typing import Optional
 USER_ID = str(uuid4())
 
+# Shared by every ADKRunners in the process, so concurrent players validating
+# the same word make one LLM call between them
+validation_flight = SingleFlight()
+
+# Deadlines and hedging for model-backed turns and validations, shared per process
+turn_hedger = Hedger("turn", HedgePolicy.from_env("TURN", deadline_seconds=60))
+validation_hedger = Hedger("validation", HedgePolicy.from_env("VALIDATION", deadline_seconds=30))
+
+# Precomputed opening turns, if a book matching the question agent exists
+opening_book = OpeningBook.from_env(question_agent)
+
+# Number of pre-created sessions kept ready in each pool
+VALIDATION_WARM_SESSIONS = 1
+QUESTION_WARM_SESSIONS = 2
+
 
 class ADKRunners:
-    def __init__(self):
+    def __init__(self, user_id: str = USER_ID, validation_cache: Optional[ValidationCache] = None,
+                 llm_slots: Optional[ModelCallSlots] = None, prewarm: bool = True):
+        # Each game server player gets its own user_id; the desktop app uses the shared USER_ID
+        self.user_id = user_id
+        # Optional cap on concurrent model calls across many ADKRunners, admitted by priority
+        self.llm_slots = llm_slots
+        # Warm sessions only pay off when the same user starts more games
+        self.prewarm = prewarm
+
+        # Runners are built once per agent and shared; sessions come pre-warmed
+        self.validation_pool = get_pool("ValidationAgent", validation_agent, VALIDATION_WARM_SESSIONS)
+        self.question_pool = get_pool("QuestionAgent", question_agent, QUESTION_WARM_SESSIONS)
+        self.validation_agent_runner = self.validation_pool.runner
+        self.question_agent_runner = self.question_pool.runner
+        self.validation_agent_session = None
+        self.question_agent_session = None
+        # Process-wide tracking of live sessions and their memory (session_lifecycle.py)
+        self.sessions = self.question_pool.sessions
+
+        # Number of model responses received, for benchmarking
+        self.llm_calls = 0
+
+        # Lexicon and cached verdicts answer most validations without an LLM call
+        self.validation_cache = validation_cache or ValidationCache.from_env()
+
+        # Speculative prefetch of the next turn's yes/no branches
+        self.speculation_policy = SpeculationPolicy.from_env()
+        self.speculative_turn: Optional[SpeculativeTurn] = None
+        self.last_turn_seconds: Optional[float] = None
+
+        # Position in the opening book, None once the game has left it
+        self.book_node: Optional[dict] = None
+
+        # Number of the question the player is answering (0 before the first turn);
+        # speculative branches are only used for the question they were started for
+        self.question_number = 0
+
+        # Routing decisions of each turn run, by session id, until the turn is used
+        self.routing_decisions: dict[str, list[bool]] = {}
         return
 
-    async def initialise_validation_agent(self):
-        session_service = InMemorySessionService()
-        app_name="ValidationAgent"
-        self.validation_agent_session=await session_service.create_session(
-            app_name=app_name, 
-            user_id=USER_ID
-        )
-        self.validation_agent_runner=Runner(
-            agent=validation_agent,
-            session_service=session_service,
-            app_name=app_name
+    async def warm_up(self):
+        # Pre-create sessions for both agents and open model connections ahead of the first game
+        await asyncio.gather(
+            self.validation_pool.fill(self.user_id),
+            self.question_pool.fill(self.user_id),
+            warm_up_model()
         )
+        logger.info("Runner pools warmed up")
+
+    async def initialise_validation_agent(self):
+        # Swap in a fresh validation session, releasing the previous one
+        with tracer.span(metrics.RUNNER_SETUP, agent="validation_agent"):
+            await self.validation_pool.release_session(self.user_id, self.validation_agent_session)
+            self.validation_agent_session = await self.validation_pool.acquire_session(self.user_id, refill=self.prewarm)
         logger.info("Validation agent initialized")
         return
     
     async def validate_input(self,user_input="elephant"):
+        with tracer.span(metrics.VALIDATION) as span:
+            verdict = self.validation_cache.get(user_input)
+            if verdict is not None:
+                span["source"] = "local"
+                logger.info(f"Validation served locally: {verdict}")
+                return verdict
+
+            # Identical inputs validated at the same time share one LLM call
+            key = normalize_input(user_input)
+            span["source"] = "coalesced" if validation_flight.in_flight(key) else "llm"
+            span["model"] = model_name(validation_agent.model)
+            verdict, attrs = await validation_flight.do(
+                key, lambda: self.shared_validation(user_input, self.take_validation_session())
+            )
+            # Tokens go only in the span of the caller that made the call, so they are counted once
+            span.update(attrs if span["source"] == "llm" else
+                        {name: value for name, value in attrs.items() if not name.endswith("_tokens")})
+            await self.sessions.enforce()
+            return dict(verdict) if verdict is not None else None
+
+    def take_validation_session(self):
+        # Hand this game's prepared validation session over to a shared call
+        session, self.validation_agent_session = self.validation_agent_session, None
+        return session
+
+    async def shared_validation(self, user_input: str, session) -> tuple[Optional[dict], dict]:
+        # The validation shared by every caller coalesced on the input. It owns its
+        # session, so a caller starting over or ending its game cannot release it
+        # from under the others, and collects span attributes for all of them.
+        attrs: dict = {}
+        if not self.sessions.is_live(self.validation_pool, self.user_id, session):
+            session = await self.validation_pool.acquire_session(self.user_id, refill=False)
+        try:
+            verdict = await self.hedged_validation(user_input, attrs, session)
+        finally:
+            await self.validation_pool.release_session(self.user_id, session)
+        return verdict, attrs
+
+    async def hedged_validation(self, user_input: str, span: dict, session) -> Optional[dict]:
+        # Validation under a deadline; a hedge runs on a throwaway session
+        async def hedge():
+            session = await self.validation_pool.create_session(self.user_id)
+            try:
+                return await self.call_validation_agent(user_input, span, session, Priority.BACKGROUND)
+            finally:
+                await self.validation_pool.release_session(self.user_id, session)
+
+        verdict, hedge_won = await validation_hedger.run(
+            lambda: self.call_validation_agent(user_input, span, session), hedge
+        )
+        if hedge_won:
+            span["hedged"] = True
+        return verdict
+
+    async def call_validation_agent(self, user_input: str, span: dict, session,
+                                    priority: Priority = Priority.VALIDATION) -> Optional[dict]:
+        # One validation LLM call on the given session; the verdict is cached for everyone
+        new_message = types.Content(role='user', parts=[types.Part(text=user_input)])
         try:
-            async for event in self.validation_agent_runner.run_async(
-                user_id=USER_ID,
-                session_id=self.validation_agent_session.id,
-                new_message=types.Content(role='user', parts=[types.Part(text=user_input)])
-            ):
-                if(event.is_final_response()):
-                    logger.debug(event.content.parts[0].text)
-                    return json.loads(event.content.parts[0].text)
-                else:
-                    pass
+            with self.sessions.in_use(self.validation_pool, self.user_id, session):
+                self.sessions.record(self.validation_pool, self.user_id, session, new_message)
+                async with self.llm_slot(priority):
+                    async for event in self.validation_agent_runner.run_async(
+                        user_id=self.user_id,
+                        session_id=session.id,
+                        new_message=new_message
+                    ):
+                        self.sessions.record(self.validation_pool, self.user_id, session, event)
+                        add_usage(span, event)
+                        if(event.is_final_response()):
+                            self.llm_calls += 1
+                            logger.debug(event.content.parts[0].text)
+                            verdict = json.loads(event.content.parts[0].text)
+                            self.validation_cache.put(user_input, verdict)
+                            return verdict
+                        else:
+                            pass
         except Exception as e:
+            span["error"] = str(e)
             logger.error(f"Error during validation: {e}")
             return None
         
     async def initialise_question_agent(self):
-        session_service = InMemorySessionService()
-        app_name="QuestionAgent"
-        self.question_agent_session=await session_service.create_session(
-            app_name=app_name, 
-            user_id=USER_ID
-        )
-        self.question_agent_runner=Runner(
-            agent=question_agent,
-            session_service=session_service,
-            app_name=app_name
-        )
+        # Swap in a fresh question session, releasing the previous game's one
+        with tracer.span(metrics.RUNNER_SETUP, agent="question_agent"):
+            await self.discard_speculation()
+            await self.question_pool.release_session(self.user_id, self.question_agent_session)
+            self.question_agent_session = await self.question_pool.acquire_session(self.user_id, refill=self.prewarm)
+        self.last_turn_seconds = None
+        self.question_number = 0
+        self.book_node = opening_book.root if opening_book else None
         logger.info("Question agent initialized")
         return
 
 
-    async def guess_or_ask(self, game_context="Starting a new game of 20 questions"):
+    async def guess_or_ask(self, game_context="Starting a new game of 20 questions", on_partial=None) -> Optional[AgentAction]:
+        # Returns the agent's GuessAction or QuestionAction, or None if the turn failed.
+        # on_partial, if given, is called with a partial action (same type as the
+        # final one) as soon as question or guess text streams in
+        if self.session_evicted():
+            logger.warning("The game's session was evicted to stay within the session budget")
+            return None
+        started = time.perf_counter()
+        with tracer.span(metrics.TURN) as span:
+            response = await self.next_turn(game_context, on_partial, span)
+        if response is not None and span.get("source") != "book":
+            # Only the turn shown to the player counts towards the routing counters
+            routing_policy.record(self.routing_decisions.get(self.question_agent_session.id, []))
+        self.routing_decisions.clear()
+        if response is not None:
+            self.question_number += 1
+        self.last_turn_seconds = time.perf_counter() - started
+        # The turn's events may have taken the process over its session budget
+        await self.sessions.enforce()
+        return response
+
+    async def next_turn(self, game_context, on_partial, span: dict) -> Optional[AgentAction]:
+        # Serve the turn from the opening book while the game follows a stored path
+        if self.book_node is not None:
+            self.book_node = opening_book.next(self.book_node, game_context)
+            if self.book_node is not None:
+                span["source"] = "book"
+                return await self.serve_from_book(game_context)
+
+        # Use the pre-computed branch if we speculated on this answer to this question
+        branch = None
+        if self.speculative_turn and self.speculative_turn.question_number == self.question_number:
+            branch = self.speculative_turn.take(game_context)
+        await self.discard_speculation()
+        if branch is not None:
+            response = await self.commit_speculative_branch(branch)
+            if response is not None:
+                span["source"] = "speculative"
+                return response
+
+        span["source"] = "agent"
+        return await self.hedged_question_turn(game_context, on_partial, span)
+
+    async def serve_from_book(self, game_context):
+        # Record the stored turn in the game's session, as if the agent had played it
+        session = await self.question_pool.session_service.get_session(
+            app_name=self.question_pool.app_name,
+            user_id=self.user_id,
+            session_id=self.question_agent_session.id
+        )
+        with self.sessions.in_use(self.question_pool, self.user_id, session):
+            response = await opening_book.serve(self.question_pool.session_service, session, self.book_node, game_context)
+            self.sessions.update(self.question_pool, self.user_id, session)
+        logger.info(f"Response (opening book): {response}")
+        return response
+
+    async def hedged_question_turn(self, game_context, on_partial, span: dict):
+        # Run the turn under a deadline. A hedge replays the same turn on a fork
+        # of the session as it was before the primary call started.
+        started = time.time()
+        fork = None
+
+        async def hedge():
+            nonlocal fork
+            fork = await self.question_pool.fork_session(self.user_id, self.question_agent_session, before=started)
+            return await self.run_question_turn(fork, game_context, priority=Priority.BACKGROUND)
+
+        try:
+            response, hedge_won = await turn_hedger.run(
+                lambda: self.run_question_turn(self.question_agent_session, game_context, on_partial), hedge
+            )
+        except BaseException:
+            await self.question_pool.release_session(self.user_id, fork)
+            raise
+
+        if hedge_won:
+            # The hedge's session now holds the game
+            span["hedged"] = True
+            await self.question_pool.release_session(self.user_id, self.question_agent_session)
+            self.question_agent_session = fork
+        else:
+            await self.question_pool.release_session(self.user_id, fork)
+        return response
+
+    async def run_question_turn(self, session, game_context, on_partial=None, priority: Priority = Priority.TURN):
+        # Run one question agent turn on the given session
+        # Streaming is only requested when someone is listening for partial text
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE) if on_partial else None
+        partial_text: dict[str, str] = {}
+        new_message = self.query_to_content(game_context)
         try:
-            async for event in self.question_agent_runner.run_async(
-                user_id=USER_ID,
-                session_id=self.question_agent_session.id,
-                new_message=self.query_to_content(game_context)
-            ):
-                try:
-                    # is_final_response() is only used by ADK
-                    # so we need to determine if this is the final response ourselves
-                    response=json.loads(event.content.parts[0].text)
-                    if("action" in response):
-                        logger.info(f"Response: {response}")
-                        return response
-                except Exception as e:
-                    logger.error(f"Error parsing JSON response: {e}")
-                    continue
+            with self.sessions.in_use(self.question_pool, self.user_id, session), collect_decisions() as decisions:
+                self.sessions.record(self.question_pool, self.user_id, session, new_message)
+                async with self.llm_slot(priority):
+                    async for event in self.question_agent_runner.run_async(
+                        user_id=self.user_id,
+                        session_id=session.id,
+                        new_message=new_message,
+                        run_config=run_config
+                    ):
+                        if event.partial:
+                            self.report_partial(event, partial_text, on_partial)
+                            continue
+                        # Every complete event is appended to the session
+                        self.sessions.record(self.question_pool, self.user_id, session, event)
+                        if event.author != question_agent.name:
+                            self.llm_calls += 1
+                            continue
+                        # RootAgent marks its final event with the typed action;
+                        # ledger updates and other events carry none
+                        action = action_from_event(event)
+                        if action is not None:
+                            logger.info(f"Response: {action}")
+                            self.routing_decisions[session.id] = decisions
+                            return action
 
         except Exception as e:
             logger.error(f"Error during guess_or_ask: {e}")
             return None
 
+    def report_partial(self, event, partial_text: dict[str, str], on_partial):
+        # Accumulate streamed chunks per sub-agent and surface displayable text early
+        if not on_partial or not event.content or not event.content.parts:
+            return
+        chunk = "".join(part.text or "" for part in event.content.parts)
+        text = partial_text.get(event.author, "") + chunk
+        partial_text[event.author] = text
+
+        partial_response = None
+        if event.author == "asking_agent":
+            question = extract_partial_string(text, "question")
+            if question:
+                partial_response = QuestionAction(question=question)
+        elif event.author == "fused_agent":
+            decision = extract_partial_string(text, "decision")
+            question = extract_partial_string(text, "question")
+            guess = extract_partial_string(text, "guess")
+            if decision == ASK_QUESTION and question:
+                partial_response = QuestionAction(question=question)
+            elif decision == MAKE_GUESS and guess:
+                partial_response = GuessAction(guess=guess)
+        # The guessing agent's text is not shown until its confidence is known
+
+        if partial_response is not None:
+            try:
+                on_partial(partial_response)
+            except Exception as e:
+                logger.error(f"Error reporting partial response: {e}")
+
+    async def speculate(self, ai_response: Optional[AgentAction], question_number: int):
+        # Start the next turn for each possible answer on forked sessions,
+        # while the player is still reading the current question
+        if self.question_agent_session is None or ai_response is None:
+            return
+        if not self.speculation_policy.should_speculate(question_number, self.last_turn_seconds):
+            return
+
+        await self.discard_speculation()
+
+        # A "yes" to a guess ends the game, so only the "no" branch is useful
+        if ai_response.action == MAKE_GUESS:
+            answers = ["no"]
+        else:
+            answers = ["yes", "no"]
+        if opening_book and opening_book.covers(self.book_node, answers):
+            # The next turn comes from the opening book whatever the answer
+            return
+
+        turn = SpeculativeTurn(question_number=question_number)
+        try:
+            for answer in answers:
+                fork = await self.question_pool.fork_session(self.user_id, self.question_agent_session)
+                task = asyncio.get_running_loop().create_task(self.run_question_turn(fork, answer, priority=Priority.BACKGROUND))
+                turn.branches[answer] = SpeculativeBranch(answer=answer, session=fork, task=task)
+        except BaseException:
+            # Cancelled (or failed) partway through: release the forks made so far
+            await self.release_branches(turn)
+            raise
+        if question_number != self.question_number:
+            # The player answered while the branches were being set up
+            await self.release_branches(turn)
+            return
+        self.speculative_turn = turn
+        logger.info(f"Speculating on {answers} for question {question_number}")
+
+    async def commit_speculative_branch(self, branch):
+        # Adopt the forked session of the branch matching the player's answer
+        try:
+            async with asyncio.timeout(turn_hedger.policy.deadline_seconds):
+                response = await branch.task
+        except TimeoutError:
+            branch.task.cancel()
+            response = None
+        except asyncio.CancelledError:
+            branch.task.cancel()
+            if asyncio.current_task().cancelling():
+                # The turn itself was cancelled (e.g. the player started over)
+                await self.question_pool.release_session(self.user_id, branch.session)
+                raise
+            # Only the branch was cancelled
+            response = None
+
+        if response is None or not self.sessions.is_live(self.question_pool, self.user_id, branch.session):
+            # Speculation failed (or its session was evicted since), fall back
+            # to a normal turn on the original session
+            await self.question_pool.release_session(self.user_id, branch.session)
+            return None
+
+        await self.question_pool.release_session(self.user_id, self.question_agent_session)
+        self.question_agent_session = branch.session
+        logger.info(f"Committed speculative '{branch.answer}' branch")
+        return response
+
+    async def discard_speculation(self):
+        # Cancel unused speculative branches and release their sessions
+        if self.speculative_turn is None:
+            return
+        turn, self.speculative_turn = self.speculative_turn, None
+        await self.release_branches(turn)
+
+    async def release_branches(self, turn: SpeculativeTurn):
+        for branch in turn.discard():
+            await self.question_pool.release_session(self.user_id, branch.session)
+
+    async def end_game(self):
+        # Release every session of the finished (or abandoned) game; safe to call twice
+        await self.discard_speculation()
+        await self.question_pool.release_session(self.user_id, self.question_agent_session)
+        await self.validation_pool.release_session(self.user_id, self.validation_agent_session)
+        self.question_agent_session = None
+        self.validation_agent_session = None
+        self.book_node = None
+        self.last_turn_seconds = None
+        self.question_number = 0
+
+    def resume_game(self, session):
+        # Continue a game from its stored question session (e.g. after a server restart)
+        self.sessions.track(self.question_pool, self.user_id, session)
+        self.question_agent_session = session
+        self.question_number = len(session.state.get(LEDGER_STATE_KEY) or [])
+
+    def session_evicted(self) -> bool:
+        # Whether the current game lost its question session to the session budget
+        return (self.question_agent_session is not None and
+                not self.sessions.is_live(self.question_pool, self.user_id, self.question_agent_session))
+
+    def footprint(self) -> dict:
+        # Live sessions, events and approximate bytes across the process
+        return self.sessions.footprint()
+
+    @contextlib.asynccontextmanager
+    async def llm_slot(self, priority: Priority):
+        # Mark the model calls made inside with their scheduling priority and
+        # hold one of the shared model-call slots, if a cap is configured
+        with scheduler.priority(priority):
+            async with self.llm_slots if self.llm_slots is not None else contextlib.nullcontext():
+                yield
+
     def query_to_content(self,query):
         return types.Content(role='user', parts=[types.Part(text=query)])
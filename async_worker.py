@@ -0,0 +1,87 @@
+import logging
+logger = logging.getLogger(__name__)
+
+import asyncio
+import queue
+import threading
+import concurrent.futures
+
+from typing import Any, Callable, Collection, Coroutine, Optional
+
+
+class AsyncWorker:
+    # Runs one long-lived asyncio event loop on a background thread.
+    # Coroutines are submitted from the Tk thread; their completion callbacks
+    # are pushed onto a thread-safe queue which the UI drains via root.after,
+    # so Tk widgets are only ever touched from the Tk thread.
+
+    def __init__(self, name: str = "adk-worker"):
+        self.loop = asyncio.new_event_loop()
+        self.result_queue: "queue.Queue[Callable[[], None]]" = queue.Queue()
+        self.pending: set[concurrent.futures.Future] = set()
+        self._lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        # Body of the worker thread
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> concurrent.futures.Future:
+        # Schedule a coroutine on the worker loop.
+        # on_done / on_error are called later on the UI thread (via the result queue).
+        # Cancelled coroutines call neither.
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self.pending.add(future)
+        future.add_done_callback(lambda f: self._on_future_done(f, on_done, on_error))
+        return future
+
+    def _on_future_done(self, future, on_done, on_error):
+        # Runs on the worker thread when a submitted coroutine finishes
+        with self._lock:
+            self.pending.discard(future)
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Background task failed: {error}")
+            if on_error:
+                self.result_queue.put(lambda: on_error(error))
+            return
+
+        if on_done:
+            result = future.result()
+            self.result_queue.put(lambda: on_done(result))
+
+    def post(self, callback: Callable[..., None], *args):
+        # Queue a plain callable for the UI thread (e.g. from inside a coroutine)
+        self.result_queue.put(lambda: callback(*args))
+
+    def cancel_all(self, keep: Collection[concurrent.futures.Future] = ()):
+        # Cancel every in-flight coroutine except those in keep, e.g. when the player starts over
+        with self._lock:
+            pending = [future for future in self.pending if future not in keep]
+        for future in pending:
+            future.cancel()
+        if pending:
+            logger.info(f"Cancelled {len(pending)} in-flight task(s)")
+
+    def run_sync(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None):
+        # Block the calling thread until the coroutine completes on the worker loop
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        # Stop the event loop and wait for the worker thread to exit
+        self.cancel_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
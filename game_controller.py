@@ -1,32 +1,95 @@
 import logging
 logger = logging.getLogger(__name__)
 
+import os
+import json
+import time
 import asyncio
 
-from typing import Optional
-from adk_runners import ADKRunners
+from typing import TYPE_CHECKING, Optional
+from async_worker import AsyncWorker
+import metrics
+from metrics import tracer
 
 from ui_components import GameUI
+from game_rules import ASK_QUESTION, GAME_OVER_MESSAGES, MAKE_GUESS, MAX_QUESTIONS, OPENING_CONTEXT, answer_outcome
+
+if TYPE_CHECKING:
+    # Typed agent actions; only imported for annotations, so the window opens before the agents load
+    from question_agents.actions import AgentAction
+
+THINKING_TEXT = "Thinking..."
 
 class GameController:
     # Handles game logic and interactions between UI and ADK runners
     
-    def __init__(self):
+    def __init__(self, started: Optional[float] = None):
+        # perf_counter() when the process started, for the startup timings
+        self.started = started if started is not None else time.perf_counter()
         self.user_input = ""
-        self.runners = ADKRunners()
-        self.current_ai_response: Optional[dict] = None
+        # Created on the worker loop after the window is up (see load_runners)
+        self.runners = None
+        self.current_ai_response: Optional["AgentAction"] = None
         self.current_question = 1
+        # Set once the game has ended and its sessions are released
+        self.game_over = False
+
+        # Long-lived event loop for all agent calls, so the Tk mainloop never blocks
+        self.worker = AsyncWorker()
+        self.start_future = None
+        self.turn_future = None
+        # Bumped on every start over so late results from an old game are dropped
+        self.game_generation = 0
         
         # Create UI with callback references
         self.ui = GameUI(
             on_start_game_callback=self.on_start_game,
-            on_yes_callback=lambda: asyncio.run(self.on_yes_click()),
-            on_no_callback=lambda: asyncio.run(self.on_no_click()),
+            on_yes_callback=self.on_yes_click,
+            on_no_callback=self.on_no_click,
             on_start_over_callback=self.start_over
         )
         
         # Start the application with the start screen
         self.ui.create_start_screen()
+        self.ui.poll_result_queue(self.worker.result_queue)
+        self.ui.root.after_idle(self.on_first_paint)
+
+        # Import the ADK stack and pre-create agent sessions while the player is typing
+        self.ready_future = self.worker.submit(
+            self.load_runners(),
+            on_done=lambda _: self.on_runners_ready(),
+            on_error=self.on_runners_failed
+        )
+
+    async def load_runners(self):
+        # Deferred so the window appears before google.adk and the agents are imported
+        # Runs on the worker loop - must not touch the UI
+        from adk_runners import ADKRunners
+        self.runners = ADKRunners()
+        await self.runners.warm_up()
+
+    def on_first_paint(self):
+        seconds = time.perf_counter() - self.started
+        tracer.record(metrics.STARTUP_FIRST_PAINT, seconds)
+        logger.info(f"Start screen shown after {seconds:.3f}s")
+
+    def on_runners_ready(self):
+        seconds = time.perf_counter() - self.started
+        tracer.record(metrics.STARTUP_READY, seconds)
+        logger.info(f"Agents ready after {seconds:.3f}s")
+
+        # STARTUP_BENCHMARK=1 prints the startup timings and exits (see startup_benchmark.py)
+        if os.getenv("STARTUP_BENCHMARK") == "1":
+            summary = tracer.summary()
+            print(json.dumps({
+                "first_paint_seconds": summary.get(metrics.STARTUP_FIRST_PAINT, {}).get("max"),
+                "ready_seconds": seconds,
+            }), flush=True)
+            self.ui.root.after(0, self.ui.root.destroy)
+
+    def on_runners_failed(self, error: BaseException):
+        logger.error(f"Error loading agents: {error}")
+        self.ui.show_feedback_message("Could not load the AI agents. Please restart the game.", "red")
     
     def on_start_game(self):
         #  Handle start game button click
@@ -35,115 +98,169 @@ class GameController:
         if not user_text:
             self.ui.show_feedback_message("Please enter something!", "red")
             return
+
+        if self.start_future and not self.start_future.done():
+            logger.info("Validation already in progress, ignoring click")
+            return
         
         logger.info(f"Start Game button pressed with input: {user_text}")
+        if self.ready_future.done():
+            self.ui.show_feedback_message("Checking your answer...", "gray")
+        else:
+            self.ui.show_feedback_message("Getting ready...", "gray")
 
-        # Run async validation using AI
-        asyncio.run(self.validate_and_start_game(user_text))
+        # Run async validation using AI on the background loop
+        generation = self.game_generation
+        self.start_future = self.worker.submit(
+            self.validate_and_start_game(user_text),
+            on_done=lambda result: self.on_game_started(generation, user_text, result),
+            on_error=lambda error: self.on_start_failed(generation, error)
+        )
     
     async def validate_and_start_game(self, user_text: str):
-        # Validate input withing AI and start game
-        
-        try:
-            # Initialise the validation agent
-            await self.runners.initialise_validation_agent()
+        # Validate input with the AI and, if valid, prepare the question agent
+        # Runs on the worker loop - must not touch the UI
+
+        # Wait for the background warm-up if the player was quicker
+        # (shielded: cancelling this start must not cancel the warm-up too)
+        await asyncio.shield(asyncio.wrap_future(self.ready_future))
+
+        # Initialise the validation agent
+        await self.runners.initialise_validation_agent()
+
+        # Validate input using game.py validate_input method
+        validation_result = await self.runners.validate_input(user_text)
 
-            # Validate input using game.py validate_input method
-            validation_result = await self.runners.validate_input(user_text)
+        if validation_result is not None and validation_result.get("is_valid", True):
+            # Create the question agent session for the new game
+            await self.runners.initialise_question_agent()
 
-            if validation_result is None:
-                # Handle validation error
-                logger.error("Validation failed due to error")
-                self.ui.show_feedback_message("Validation service unavailable. Please try again.", "red")
-                return
+        return validation_result
+
+    def on_game_started(self, generation: int, user_text: str, validation_result: Optional[dict]):
+        # Handle the validation outcome on the UI thread
+        if generation != self.game_generation:
+            return
+
+        if validation_result is None:
+            # Handle validation error
+            logger.error("Validation failed due to error")
+            self.ui.show_feedback_message("Validation service unavailable. Please try again.", "red")
+            return
+        
+        # Check validation result
+        if validation_result.get("is_valid", True):
+
+            # Input is valid, proceed to game
+            self.user_input = user_text
+            logger.info(f"Input validated successfully: {self.user_input}")
+            
+             # Reset feedback message
+            self.ui.show_feedback_message(
+                "Enter the name of an object, animal, or concept you want me to guess.",
+                "gray"
+            )
             
-            # Check validation result
-            if validation_result.get("is_valid", True):
-
-                # Input is valid, proceed to game
-                self.user_input = user_text
-                logger.info(f"Input validated successfully: {self.user_input}")
-                
-                 # Reset feedback message
-                self.ui.show_feedback_message(
-                    "Enter the name of an object, animal, or concept you want me to guess.",
-                    "gray"
-                )
-                
-                # Switch to game screen
-                await self.create_game_screen()
-
-            else:
-                # Show rejection reason
-                rejection_reason = validation_result.get("reason", "Invalid input")
-                logger.info(f"Input validation failed: {rejection_reason}")
-                self.ui.show_feedback_message(rejection_reason, "red")
-                
-        except Exception as e:
-            logger.error(f"Error during validation: {e}")
-            self.ui.show_feedback_message("Error during validation. Please try again.", "red")
+            # Switch to game screen straight away and stream in the first question
+            self.create_game_screen()
+
+            # Get AI-generated question or guess
+            # Do not include the user input in the prompt
+            self.request_turn(OPENING_CONTEXT)
+
+        else:
+            # Show rejection reason
+            rejection_reason = validation_result.get("reason", "Invalid input")
+            logger.info(f"Input validation failed: {rejection_reason}")
+            self.ui.show_feedback_message(rejection_reason, "red")
+
+    def on_start_failed(self, generation: int, error: BaseException):
+        # Handle an unexpected error while validating or starting the game
+        if generation != self.game_generation:
+            return
+        logger.error(f"Error during validation: {error}")
+        self.ui.show_feedback_message("Error during validation. Please try again.", "red")
     
-    async def create_game_screen(self):
-        # Create the main game screen and get initial AI response
-        await self.runners.initialise_question_agent()
-
-        # Get AI-generated question or guess
-        # Do not include the user input in the prompt
-        self.current_ai_response = await self.runners.guess_or_ask(
-            "Starting a new game of 20 questions. "
-        )
-        
-        # Format the AI response for display
-        question_text = self.format_ai_response_text()
+    def create_game_screen(self):
+        # Create the main game screen in its "thinking" state
         show_buttons = True
+        self.game_over = False
         
         # Create the game screen
-        self.ui.create_game_screen(question_text, show_buttons)
+        self.ui.create_game_screen(THINKING_TEXT, show_buttons)
         self.ui.update_question_counter(self.current_question)
-        
-        # Display AI reasoning
-        reasoning = self.get_ai_reasoning()
-        self.ui.update_reasoning_text(reasoning)
-
-    def format_ai_response_text(self) -> str:
-        # Format the AI response into display text for the UI
-        if self.current_ai_response and self.current_ai_response.get('action') == 'ask_question':
-            return f"My question is: {self.current_ai_response.get('question', 'Are you thinking of something alive?')}"
-        elif self.current_ai_response and self.current_ai_response.get('action') == 'make_guess':
-            return f"Is it: {self.current_ai_response.get('guess', 'something')}?"
+        self.ui.update_reasoning_text("")
+
+    def request_turn(self, game_context: str):
+        # Ask the AI for its next question or guess on the background loop
+        # Partial question text is streamed to the UI while the turn runs
+        self.ui.update_question_text(THINKING_TEXT)
+        self.ui.update_reasoning_text("")
+
+        generation = self.game_generation
+        self.turn_future = self.worker.submit(
+            self.runners.guess_or_ask(
+                game_context,
+                on_partial=lambda partial: self.worker.post(self.on_partial_response, generation, partial)
+            ),
+            on_done=lambda response: self.on_ai_response(generation, response)
+        )
+
+    def on_partial_response(self, generation: int, partial_response: "AgentAction"):
+        # Show question or guess text as soon as it starts streaming in
+        if generation != self.game_generation or not self.turn_future or self.turn_future.done():
+            return
+        self.ui.update_question_text(self.format_ai_response_text(partial_response))
+
+    def start_speculation(self):
+        # Let the runners pre-compute the next turn while the player reads the question
+        # The last question's answer always ends the game, so there is nothing to prefetch
+        if self.current_question >= MAX_QUESTIONS:
+            return
+        self.worker.submit(self.runners.speculate(self.current_ai_response, self.current_question))
+
+    def format_ai_response_text(self, ai_response: Optional["AgentAction"] = None) -> str:
+        # Format the AI response (the current one by default) into display text for the UI
+        ai_response = ai_response or self.current_ai_response
+        if ai_response and ai_response.action == ASK_QUESTION:
+            return f"My question is: {ai_response.question or 'Are you thinking of something alive?'}"
+        elif ai_response and ai_response.action == MAKE_GUESS:
+            return f"Is it: {ai_response.guess or 'something'}?"
         else:
             return "My question is: Are you thinking of something alive?"
     
     def get_ai_reasoning(self) -> str:
         # Extract reasoning from the current AI response
-        if self.current_ai_response and 'reasoning' in self.current_ai_response:
-            return self.current_ai_response.get('reasoning', '')
-        return ""
+        return self.current_ai_response.reasoning if self.current_ai_response else ""
 
-    async def on_yes_click(self):
+    def on_yes_click(self):
         # Handle yes button click
         logger.info(f"User answered 'Yes' to question {self.current_question}")
 
-        await self.process_answer("yes")
+        self.process_answer("yes")
     
-    async def on_no_click(self):
+    def on_no_click(self):
         # Handle no button click
         logger.info(f"User answered 'No' to question {self.current_question}")
 
-        await self.process_answer("no")
+        self.process_answer("no")
     
-    async def process_answer(self, answer: str):
+    def process_answer(self, answer: str):
         # Process the user's answer and get next AI response
-        # If it was a guess and user said "Yes", AI wins
-        if (self.current_ai_response and 
-            self.current_ai_response.get('action') == 'make_guess' and 
-            answer.lower() == 'yes'):
-            await self.show_game_over_screen("I guessed it! 🎉 AI wins!")
+        if self.game_over:
+            logger.info("Game is over, ignoring click")
             return
-        
-        # Check if game is over (20 questions reached)
-        if self.current_question >= 20:
-            await self.show_game_over_screen("You win! I couldn't guess it in 20 questions.")
+        if self.turn_future and not self.turn_future.done():
+            logger.info("Previous answer still being processed, ignoring click")
+            return
+
+        # A correct guess or the last question ends the game
+        outcome = answer_outcome(self.current_ai_response, self.current_question, answer)
+        if outcome is not None:
+            self.game_over = True
+            self.show_game_over_screen(GAME_OVER_MESSAGES[outcome])
+            # The game's sessions are not needed any more
+            self.worker.submit(self.runners.end_game())
             return
         
         # Move to next question
@@ -151,33 +268,60 @@ class GameController:
         self.ui.update_question_counter(self.current_question)
         
         # Send the answer to AI and get next response
-        self.current_ai_response = await self.runners.guess_or_ask(answer)
-        
-        # Format and update the question text
-        new_text = self.format_ai_response_text()
-        self.ui.update_question_text(new_text)
+        self.request_turn(answer)
+
+    def on_ai_response(self, generation: int, response: Optional["AgentAction"]):
+        # Show the next AI response on the UI thread
+        if generation != self.game_generation:
+            return
+
+        self.current_ai_response = response
         
-        # Update reasoning display
-        reasoning = self.get_ai_reasoning()
-        self.ui.update_reasoning_text(reasoning)
+        with tracer.span(metrics.UI_UPDATE):
+            # Format and update the question text
+            new_text = self.format_ai_response_text()
+            self.ui.update_question_text(new_text)
+            
+            # Update reasoning display
+            reasoning = self.get_ai_reasoning()
+            self.ui.update_reasoning_text(reasoning)
+            self.ui.root.update_idletasks()
+
+        self.start_speculation()
         
         logger.info(f"Moving to question {self.current_question}")
     
-    async def show_game_over_screen(self, message: str):
+    def show_game_over_screen(self, message: str):
         # Show game over message
         self.ui.update_question_text(message)
         self.ui.update_reasoning_text("")  # Clear reasoning text
+        self.ui.hide_answer_buttons()
         logger.info(f"Game over: {message}")
     
     def start_over(self):
         # Handle start over button click
         logger.info("Starting over - returning to start screen")
+
+        # Abort any pending validation or guess_or_ask call and release the game's sessions.
+        # The warm-up keeps running: every later game start waits for it
+        self.game_generation += 1
+        self.worker.cancel_all(keep=(self.ready_future,))
+        if self.runners is not None:
+            self.worker.submit(self.runners.end_game())
+
         self.user_input = ""
         self.current_question = 1
         self.current_ai_response = None
+        self.game_over = False
         self.ui.create_start_screen()
     
     def run(self):
         # Start the application
         logger.info("Starting 20 Questions Game")
-        self.ui.run()
\ No newline at end of file
+        try:
+            self.ui.run()
+        finally:
+            self.worker.stop()
+            # METRICS_FILE=path writes per-phase latency summaries on exit
+            if os.getenv("METRICS_FILE"):
+                tracer.write_prometheus(os.getenv("METRICS_FILE"))
\ No newline at end of file
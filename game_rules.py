@@ -0,0 +1,39 @@
+# Rules of the 20 Questions game, shared by the Tk controller and headless drivers
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    # Only for annotations: importing the agents here would slow down the UI's startup
+    from question_agents.actions import AgentAction
+
+MAX_QUESTIONS = 20
+OPENING_CONTEXT = "Starting a new game of 20 questions. "
+
+# Kinds of action the question agent takes (see question_agents/actions.py)
+MAKE_GUESS = "make_guess"
+ASK_QUESTION = "ask_question"
+
+AI_WINS = "ai_wins"
+PLAYER_WINS = "player_wins"
+
+GAME_OVER_MESSAGES = {
+    AI_WINS: "I guessed it! 🎉 AI wins!",
+    PLAYER_WINS: "You win! I couldn't guess it in 20 questions.",
+}
+
+
+def answer_outcome(ai_response: Optional["AgentAction"], question_number: int, answer: str) -> Optional[str]:
+    # Decide whether the player's answer ends the game
+    # Returns AI_WINS, PLAYER_WINS, or None if the game continues
+
+    # If it was a guess and user said "Yes", AI wins
+    if (ai_response and
+        ai_response.action == MAKE_GUESS and
+        answer.lower() == 'yes'):
+        return AI_WINS
+
+    # Check if game is over (20 questions reached)
+    if question_number >= MAX_QUESTIONS:
+        return PLAYER_WINS
+
+    return None
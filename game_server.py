@@ -0,0 +1,351 @@
+"""
+20 Questions Game - Multi-player HTTP Server
+
+Hosts many concurrent games on one event loop, reusing the same
+validation_agent and question_agent definitions as the desktop app.
+
+    python game_server.py --port 8080
+
+- POST   /games                   {"word": "elephant"} -> start a game
+- POST   /games/{game_id}/answer  {"answer": "yes"}    -> answer the current question
+- DELETE /games/{game_id}                               -> end a game early
+- GET    /health                                        -> active games and limits
+- GET    /metrics                                       -> Prometheus per-phase latency summaries
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import json
+import time
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Literal, Optional
+from uuid import uuid4
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from adk_runners import ADKRunners, turn_hedger, validation_flight, validation_hedger
+from model_backend import warm_up_model
+from metrics import tracer
+from model_client import shared_client
+from model_scheduler import ModelCallSlots, scheduler
+from session_lifecycle import session_manager
+from game_rules import GAME_OVER_MESSAGES, OPENING_CONTEXT, answer_outcome
+from validation_cache import ValidationCache
+from session_store import get_session_service
+from question_agents.ledger import GameLedger
+from question_agents.actions import AgentAction, action_from_event, parse_action
+
+# Limits, overridable from the environment
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("SERVER_MAX_CONCURRENT_LLM_CALLS", "32"))
+MAX_ACTIVE_GAMES = int(os.getenv("SERVER_MAX_ACTIVE_GAMES", "1000"))
+IDLE_TIMEOUT_SECONDS = float(os.getenv("SERVER_IDLE_TIMEOUT_SECONDS", "600"))
+EVICTION_INTERVAL_SECONDS = 30
+
+
+class StartGameRequest(BaseModel):
+    word: str = Field(..., min_length=1, max_length=100, description="What the player is thinking of")
+
+
+class AnswerRequest(BaseModel):
+    answer: Literal["yes", "no"]
+
+
+class GameStateResponse(BaseModel):
+    game_id: str
+    question_number: int
+    ai_response: Optional[dict] = None
+    game_over: bool = False
+    message: Optional[str] = None
+
+
+@dataclass
+class ServerGame:
+    # One player's game: its own user id, sessions and turn state
+    game_id: str
+    runners: ADKRunners
+    current_question: int = 1
+    current_ai_response: Optional[AgentAction] = None
+    outcome: Optional[str] = None
+    last_active: float = field(default_factory=time.monotonic)
+    # Serialises turns so a double-submitted answer cannot interleave
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def state(self, message: Optional[str] = None) -> GameStateResponse:
+        return GameStateResponse(
+            game_id=self.game_id,
+            question_number=self.current_question,
+            ai_response=self.current_ai_response.to_dict() if self.current_ai_response else None,
+            game_over=self.outcome is not None,
+            message=message
+        )
+
+
+class GameRegistry:
+    # Owns every live game, the shared model-call cap and idle eviction
+
+    def __init__(self, max_concurrent_llm_calls: int = MAX_CONCURRENT_LLM_CALLS,
+                 max_active_games: int = MAX_ACTIVE_GAMES,
+                 idle_timeout_seconds: float = IDLE_TIMEOUT_SECONDS):
+        self.games: dict[str, ServerGame] = {}
+        # Games being set up; they count towards max_active_games from the start
+        self.starting_games = 0
+        self.max_active_games = max_active_games
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.llm_slots = ModelCallSlots(max_concurrent_llm_calls)
+        self.max_concurrent_llm_calls = max_concurrent_llm_calls
+        # One verdict cache for all players
+        self.validation_cache = ValidationCache.from_env()
+        self.evicted_games = 0
+        self._eviction_task: Optional[asyncio.Task] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    def new_runners(self, user_id: Optional[str] = None) -> ADKRunners:
+        return ADKRunners(
+            user_id=user_id or f"player-{uuid4()}",
+            validation_cache=self.validation_cache,
+            llm_slots=self.llm_slots,
+            prewarm=False
+        )
+
+    def get(self, game_id: str) -> ServerGame:
+        game = self.games.get(game_id)
+        if game is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+        game.touch()
+        return game
+
+    def active_games(self) -> int:
+        return len(self.games) + self.starting_games
+
+    async def start_game(self, word: str) -> GameStateResponse:
+        if self.active_games() >= self.max_active_games:
+            await self.evict_idle()
+            if self.active_games() >= self.max_active_games:
+                raise HTTPException(status_code=503, detail="Server is full, please try again later")
+        # Reserve the slot before the first await, so concurrent starts cannot exceed the cap
+        self.starting_games += 1
+        try:
+            game = await self.create_game(word)
+        finally:
+            self.starting_games -= 1
+        logger.info(f"Game {game.game_id} started ({len(self.games)} active)")
+        return game.state()
+
+    async def create_game(self, word: str) -> ServerGame:
+        runners = self.new_runners()
+        await runners.initialise_validation_agent()
+        validation_result = await runners.validate_input(word)
+        await runners.validation_pool.release_session(runners.user_id, runners.validation_agent_session)
+        if validation_result is None:
+            raise HTTPException(status_code=503, detail="Validation service unavailable. Please try again.")
+        if not validation_result.get("is_valid", True):
+            raise HTTPException(status_code=422, detail=validation_result.get("reason", "Invalid input"))
+
+        # The question session id doubles as the game id, so games can be resumed after a restart
+        try:
+            await runners.initialise_question_agent()
+            # Do not include the user input in the prompt
+            first_response = await runners.guess_or_ask(OPENING_CONTEXT)
+        except BaseException:
+            await runners.end_game()
+            raise
+        if first_response is None:
+            await runners.end_game()
+            raise HTTPException(status_code=503, detail="Question service unavailable. Please try again.")
+
+        # Only registered once it has a question for the player
+        game = ServerGame(game_id=runners.question_agent_session.id, runners=runners,
+                          current_ai_response=first_response)
+        self.games[game.game_id] = game
+        return game
+
+    async def answer(self, game_id: str, answer: str) -> GameStateResponse:
+        game = self.get(game_id)
+        async with game.lock:
+            if game.outcome is not None:
+                raise HTTPException(status_code=409, detail="Game is already over")
+            if game.runners.session_evicted():
+                await self.end_game(game_id)
+                raise HTTPException(status_code=410, detail="Game expired, please start a new one")
+
+            outcome = answer_outcome(game.current_ai_response, game.current_question, answer)
+            if outcome is not None:
+                game.outcome = outcome
+                await self.end_game(game_id)
+                return game.state(GAME_OVER_MESSAGES[outcome])
+
+            response = await game.runners.guess_or_ask(answer)
+            game.touch()
+            if response is None:
+                # Keep the question open so the player can answer it again
+                raise HTTPException(status_code=503, detail="Question service unavailable. Please answer again.")
+            game.current_question += 1
+            game.current_ai_response = response
+            return game.state()
+
+    async def end_game(self, game_id: str):
+        # Release the game's sessions and forget it
+        game = self.games.pop(game_id, None)
+        if game is None:
+            return
+        await game.runners.end_game()
+
+    async def resume_games(self):
+        # Pick up games that were waiting for an answer when the server stopped
+        store = get_session_service()
+        if store is None:
+            return
+        app_name = self.new_runners().question_pool.app_name
+        for _, user_id, session_id in await asyncio.to_thread(store.session_keys, app_name):
+            session = await store.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            ledger = GameLedger.from_state(session.state) if session else GameLedger()
+            if not ledger.entries or ledger.entries[-1].answer is not None:
+                continue
+            runners = self.new_runners(user_id)
+            runners.resume_game(session)
+            game = ServerGame(
+                game_id=session_id,
+                runners=runners,
+                current_question=len(ledger.entries),
+                current_ai_response=last_action(session)
+            )
+            self.games[game.game_id] = game
+        if self.games:
+            logger.info(f"Resumed {len(self.games)} game(s) from {store.path}")
+
+    async def evict_idle(self):
+        # End games nobody has touched for idle_timeout_seconds
+        cutoff = time.monotonic() - self.idle_timeout_seconds
+        idle = [game_id for game_id, game in self.games.items()
+                if game.last_active < cutoff and not game.lock.locked()]
+        for game_id in idle:
+            await self.end_game(game_id)
+        if idle:
+            self.evicted_games += len(idle)
+            logger.info(f"Evicted {len(idle)} idle game(s), {len(self.games)} active")
+
+    async def eviction_loop(self):
+        while True:
+            await asyncio.sleep(EVICTION_INTERVAL_SECONDS)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Error evicting idle games: {e}")
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._eviction_task = loop.create_task(self.eviction_loop())
+        # Open model connections before the first player arrives
+        self._warm_up_task = loop.create_task(warm_up_model())
+
+    async def stop(self):
+        if self._eviction_task:
+            self._eviction_task.cancel()
+        store = get_session_service()
+        for game_id, game in list(self.games.items()):
+            if store is None:
+                await self.end_game(game_id)
+            else:
+                # Keep the game's session on disk so it resumes after the restart
+                await game.runners.discard_speculation()
+        if store is not None:
+            await asyncio.to_thread(store.flush)
+        await asyncio.to_thread(self.validation_cache.flush)
+        await shared_client.close()
+
+    def health(self) -> dict:
+        return {
+            "active_games": len(self.games),
+            "starting_games": self.starting_games,
+            "max_active_games": self.max_active_games,
+            "llm_calls_in_flight": self.llm_slots.in_flight,
+            "max_concurrent_llm_calls": self.max_concurrent_llm_calls,
+            "llm_calls_waiting": self.llm_slots.queue_depth(),
+            "evicted_games": self.evicted_games,
+            "validation": {**self.validation_cache.counters(), **validation_flight.counters()},
+            "model_connections": shared_client.stats(),
+            "hedging": {"turn": turn_hedger.counters(), "validation": validation_hedger.counters()},
+            "scheduler": scheduler.stats(),
+            "sessions": session_manager.stats(),
+        }
+
+
+def last_action(session) -> Optional[AgentAction]:
+    # The question agent's latest question or guess, from its final event
+    for event in reversed(session.events):
+        if event.author != "question_agent":
+            continue
+        action = action_from_event(event)
+        if action is not None:
+            return action
+        if not event.content or not event.content.parts:
+            continue
+        # Sessions stored before actions were typed only have the JSON text
+        try:
+            return parse_action(json.loads(event.content.parts[0].text or ""))
+        except ValueError:
+            continue
+    return None
+
+
+def create_app(registry: Optional[GameRegistry] = None) -> FastAPI:
+    # Build the ASGI app; the registry is created on startup inside the server's loop
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.registry = registry or GameRegistry()
+        await app.state.registry.resume_games()
+        app.state.registry.start()
+        yield
+        await app.state.registry.stop()
+
+    app = FastAPI(title="20 Questions Game Server", lifespan=lifespan)
+
+    @app.post("/games", response_model=GameStateResponse)
+    async def start_game(request: StartGameRequest):
+        return await app.state.registry.start_game(request.word)
+
+    @app.post("/games/{game_id}/answer", response_model=GameStateResponse)
+    async def answer(game_id: str, request: AnswerRequest):
+        return await app.state.registry.answer(game_id, request.answer)
+
+    @app.delete("/games/{game_id}")
+    async def end_game(game_id: str):
+        app.state.registry.get(game_id)
+        await app.state.registry.end_game(game_id)
+        return {"game_id": game_id, "ended": True}
+
+    @app.get("/health")
+    async def health():
+        return app.state.registry.health()
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        # Prometheus text format with per-phase latency percentiles
+        return tracer.render_prometheus()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many 20 Questions games over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
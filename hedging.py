@@ -0,0 +1,122 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# Deadlines and hedged requests for agent calls.
+# Every call runs under a deadline. With hedging on, a call that is still
+# running once it passes the observed p95 latency gets a duplicate (the
+# "hedge") on a separate session; whichever finishes first wins and the other
+# is cancelled. A budget keeps hedges to a small fraction of all calls.
+
+import os
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from metrics import percentile
+
+T = TypeVar("T")
+
+
+@dataclass
+class HedgePolicy:
+    # Give up on a call after this many seconds (None waits forever)
+    deadline_seconds: Optional[float] = None
+    hedging: bool = False
+    # Hedge once a call passes this percentile of recent latencies...
+    hedge_percentile: float = 95
+    # ...but never earlier than this, and only after enough samples
+    min_hedge_delay_seconds: float = 0.25
+    min_samples: int = 20
+    # Hedges allowed per call, plus a small burst allowance
+    budget_ratio: float = 0.05
+    budget_burst: int = 2
+
+    @classmethod
+    def from_env(cls, prefix: str, deadline_seconds: float) -> "HedgePolicy":
+        # e.g. TURN_DEADLINE_SECONDS=0 disables the deadline; HEDGE_REQUESTS=1 enables hedging
+        deadline = float(os.getenv(f"{prefix}_DEADLINE_SECONDS", str(deadline_seconds)))
+        return cls(
+            deadline_seconds=deadline or None,
+            hedging=os.getenv("HEDGE_REQUESTS", "0") == "1",
+            hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+            budget_ratio=float(os.getenv("HEDGE_BUDGET_RATIO", "0.05"))
+        )
+
+
+class Hedger:
+    # Latency history, hedge budget and counters for one kind of call
+
+    def __init__(self, name: str, policy: HedgePolicy, window: int = 500):
+        self.name = name
+        self.policy = policy
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.deadline_exceeded = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        # Seconds to wait before hedging, or None if hedging is off or not yet calibrated
+        if not self.policy.hedging or len(self.latencies) < self.policy.min_samples:
+            return None
+        return max(self.policy.min_hedge_delay_seconds, percentile(self.latencies, self.policy.hedge_percentile))
+
+    def can_hedge(self) -> bool:
+        return self.hedge_delay() is not None and self.hedges < self.policy.budget_ratio * self.calls + self.policy.budget_burst
+
+    async def run(self, primary: Callable[[], Awaitable[T]],
+                  hedge: Optional[Callable[[], Awaitable[T]]] = None) -> tuple[Optional[T], bool]:
+        # Returns (result, hedge_won). A missed deadline returns (None, False).
+        self.calls += 1
+        started = time.perf_counter()
+        tasks: list[asyncio.Task] = []
+        try:
+            async with asyncio.timeout(self.policy.deadline_seconds):
+                tasks.append(asyncio.ensure_future(primary()))
+                delay = self.hedge_delay() if hedge is not None else None
+                if delay is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        if self.can_hedge():
+                            self.hedges += 1
+                            logger.info(f"{self.name} call passed {delay:.2f}s, sending a hedged request")
+                            tasks.append(asyncio.ensure_future(hedge()))
+                        else:
+                            self.budget_denied += 1
+                result, winner = await self.first_result(tasks)
+        except TimeoutError:
+            self.deadline_exceeded += 1
+            logger.error(f"{self.name} call missed its {self.policy.deadline_seconds}s deadline")
+            return None, False
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        self.latencies.append(time.perf_counter() - started)
+        hedge_won = winner == 1
+        if hedge_won:
+            self.hedge_wins += 1
+        return result, hedge_won
+
+    async def first_result(self, tasks: list[asyncio.Task]) -> tuple[Optional[T], int]:
+        # The first non-None result and the index of its task
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.result() is not None:
+                    return task.result(), tasks.index(task)
+        return None, 0
+
+    def counters(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.budget_denied,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedge_delay_seconds": self.hedge_delay(),
+        }
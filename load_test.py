@@ -0,0 +1,330 @@
+"""
+20 Questions Game - Load Test
+
+Drives many concurrent scripted games through the same calls the game
+server makes (validate_input, initialise_question_agent, guess_or_ask), to
+find out how many games one process can host. Games arrive at random at a
+given average rate, each with its own player id, and are answered by the
+catalogue oracle from simulate.py. MODEL_BACKEND picks the real agents or
+the stub model, whose latency can follow different distributions:
+
+    MODEL_BACKEND=stub STUB_LATENCY_MS=400 STUB_JITTER_MS=600 STUB_LATENCY_DISTRIBUTION=lognormal \\
+        python load_test.py --games 500 --rate 20 --output run.json --samples run-samples.jsonl
+
+The report covers throughput, latency percentiles per phase (as the player
+sees them and inside the agents), event-loop lag, and resident memory per
+active game. It is written as JSON with sorted keys, so runs can be diffed.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import gc
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from adk_runners import ADKRunners, opening_book, turn_hedger, validation_hedger
+from game_rules import OPENING_CONTEXT, answer_outcome
+from metrics import latency_summary, tracer
+from model_backend import warm_up_model
+from model_client import shared_client
+from model_scheduler import ModelCallSlots, scheduler
+from session_lifecycle import session_manager
+from question_agents.catalogue import OBJECTS
+from simulate import Oracle, target_set
+from validation_cache import Lexicon, ValidationCache
+
+MB = 1024 * 1024
+
+
+def rss_bytes() -> Optional[int]:
+    # Current resident set size; None where /proc is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class Monitor:
+    # Samples event-loop lag, resident memory, active games and live sessions at a fixed interval.
+    # Lag is how much later than asked a sleep wakes up, i.e. how long other
+    # work held the loop.
+
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.active_games = 0
+        self.samples: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def run(self):
+        while True:
+            asked = time.perf_counter()
+            await asyncio.sleep(self.interval_seconds)
+            now = time.perf_counter()
+            footprint = session_manager.footprint()
+            self.samples.append({
+                "t": now - self._started,
+                "lag_seconds": max(0.0, now - asked - self.interval_seconds),
+                "active_games": self.active_games,
+                "rss_bytes": rss_bytes(),
+                "live_sessions": footprint["sessions"],
+                "session_bytes": footprint["bytes"],
+            })
+
+    def lag_summary(self) -> dict:
+        return latency_summary([sample["lag_seconds"] for sample in self.samples])
+
+    def memory_summary(self, baseline: Optional[int]) -> dict:
+        samples = [s for s in self.samples if s["rss_bytes"] is not None]
+        if baseline is None or not samples:
+            return {"available": False}
+        peak = max(samples, key=lambda s: s["rss_bytes"])
+        peak_active = max(s["active_games"] for s in samples)
+        return {
+            "available": True,
+            "baseline_rss_mb": baseline / MB,
+            "peak_rss_mb": peak["rss_bytes"] / MB,
+            "peak_active_games": peak_active,
+            # Growth over the idle process, spread over the most games seen at once
+            "rss_per_peak_game_kb": (peak["rss_bytes"] - baseline) / peak_active / 1024 if peak_active else None,
+            # Slope of memory against active games across all samples
+            "rss_per_active_game_kb": per_game_slope(samples),
+        }
+
+
+def per_game_slope(samples: list[dict]) -> Optional[float]:
+    # Least-squares KB of RSS per additional active game
+    xs = [s["active_games"] for s in samples]
+    ys = [s["rss_bytes"] / 1024 for s in samples]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+
+@dataclass
+class LoadGame:
+    player: str
+    target: str
+    outcome: str
+    questions: int
+    # Seconds since the start of the run
+    arrived: float
+    validation_seconds: Optional[float] = None
+    setup_seconds: Optional[float] = None
+    turn_seconds: list[float] = field(default_factory=list)
+    game_seconds: Optional[float] = None
+    llm_calls: int = 0
+
+
+class LoadTest:
+
+    def __init__(self, rate: float, think_seconds: float = 0.0, max_llm_calls: int = 0,
+                 model_validation: bool = False, seed: int = 0, sample_interval_seconds: float = 0.05):
+        self.rate = rate
+        self.think_seconds = think_seconds
+        self.rng = random.Random(seed)
+        self.monitor = Monitor(sample_interval_seconds)
+        # Shared by all players, like the game server
+        self.llm_slots = ModelCallSlots(max_llm_calls) if max_llm_calls > 0 else None
+        if model_validation:
+            # No lexicon and nothing remembered, so every validation reaches the model
+            self.validation_cache = ValidationCache(max_entries=0, path=None, lexicon=Lexicon(os.devnull))
+        else:
+            self.validation_cache = ValidationCache.from_env()
+        self.started = 0.0
+
+    async def play(self, number: int, target: str) -> LoadGame:
+        runners = ADKRunners(
+            user_id=f"load-{number}",
+            validation_cache=self.validation_cache,
+            llm_slots=self.llm_slots,
+            prewarm=False
+        )
+        oracle = Oracle(target)
+        game = LoadGame(player=runners.user_id, target=oracle.target, outcome="error", questions=0,
+                        arrived=time.perf_counter() - self.started)
+        started = time.perf_counter()
+        self.monitor.active_games += 1
+        try:
+            phase_started = time.perf_counter()
+            await runners.initialise_validation_agent()
+            verdict = await runners.validate_input(target)
+            await runners.validation_pool.release_session(runners.user_id, runners.validation_agent_session)
+            game.validation_seconds = time.perf_counter() - phase_started
+            if verdict is None or not verdict.get("is_valid", True):
+                game.outcome = "invalid" if verdict else "error"
+                return game
+
+            phase_started = time.perf_counter()
+            await runners.initialise_question_agent()
+            game.setup_seconds = time.perf_counter() - phase_started
+
+            context = OPENING_CONTEXT
+            while True:
+                game.questions += 1
+                phase_started = time.perf_counter()
+                response = await runners.guess_or_ask(context)
+                game.turn_seconds.append(time.perf_counter() - phase_started)
+                if response is None:
+                    break
+                context = oracle.answer(response)
+                outcome = answer_outcome(response, game.questions, context)
+                if outcome is not None:
+                    game.outcome = outcome
+                    break
+                if self.think_seconds:
+                    # The player reads the question before answering
+                    await asyncio.sleep(self.rng.expovariate(1 / self.think_seconds))
+        except Exception as e:
+            logger.error(f"Game {number} ({target}) failed: {e}")
+        finally:
+            await runners.end_game()
+            game.game_seconds = time.perf_counter() - started
+            game.llm_calls = runners.llm_calls
+            self.monitor.active_games -= 1
+        return game
+
+    async def run(self, targets: list[str]) -> tuple[list[LoadGame], float, Optional[int]]:
+        # Start games at random (Poisson) arrival times, without waiting for earlier ones
+        await warm_up_model()
+        gc.collect()
+        baseline = rss_bytes()
+
+        self.started = time.perf_counter()
+        self.monitor.start()
+        tasks = []
+        for number, target in enumerate(targets):
+            if number and self.rate > 0:
+                await asyncio.sleep(self.rng.expovariate(self.rate))
+            tasks.append(asyncio.get_running_loop().create_task(self.play(number, target)))
+        games = await asyncio.gather(*tasks)
+        wall_seconds = time.perf_counter() - self.started
+        await self.monitor.stop()
+        return games, wall_seconds, baseline
+
+    def report(self, games: list[LoadGame], wall_seconds: float, baseline: Optional[int], settings: dict) -> dict:
+        finished = [g for g in games if g.outcome not in ("error", "invalid")]
+        turns = [t for g in games for t in g.turn_seconds]
+        phases = {
+            "validation": latency_summary([g.validation_seconds for g in games if g.validation_seconds is not None]),
+            "setup": latency_summary([g.setup_seconds for g in games if g.setup_seconds is not None]),
+            "turn": latency_summary(turns),
+            "game": latency_summary([g.game_seconds for g in finished]),
+        }
+        outcomes: dict[str, int] = {}
+        for g in games:
+            outcomes[g.outcome] = outcomes.get(g.outcome, 0) + 1
+        return {
+            "settings": settings,
+            "throughput": {
+                "games": len(games),
+                "finished_games": len(finished),
+                "outcomes": outcomes,
+                "wall_seconds": wall_seconds,
+                "offered_games_per_second": self.rate or None,
+                "games_per_second": len(finished) / wall_seconds if wall_seconds else None,
+                "turns_per_second": len(turns) / wall_seconds if wall_seconds else None,
+                "llm_calls_per_game": sum(g.llm_calls for g in games) / len(games) if games else None,
+            },
+            "phases": phases,
+            "agent_phases": tracer.summary(),
+            "event_loop_lag_seconds": self.monitor.lag_summary(),
+            "memory": self.monitor.memory_summary(baseline),
+            "sessions": session_manager.stats(),
+            "scheduler": scheduler.stats(),
+            "hedging": {"turn": turn_hedger.counters(), "validation": validation_hedger.counters()},
+            "opening_book": opening_book.counters() if opening_book else None,
+            "model_connections": shared_client.stats(),
+        }
+
+
+def model_settings() -> dict:
+    # Environment that decides what is being measured, recorded with the results
+    names = ("MODEL_BACKEND", "STUB_LATENCY_MS", "STUB_JITTER_MS", "STUB_LATENCY_DISTRIBUTION",
+             "QUESTION_AGENT_MODE", "LOCAL_QUESTION_ENGINE", "OPENING_BOOK", "SPECULATIVE_TURNS",
+             "HEDGE_REQUESTS", "MODEL_REQUESTS_PER_MINUTE", "MODEL_TOKENS_PER_MINUTE", "SESSION_STORE_PATH")
+    return {name: os.environ[name] for name in names if name in os.environ}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many concurrent scripted games and report capacity metrics")
+    parser.add_argument("--games", type=int, default=200, help="number of games to start")
+    parser.add_argument("--rate", type=float, default=10, help="average new games per second (0 starts them all at once)")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean time a player takes to answer each question")
+    parser.add_argument("--max-llm-calls", type=int, default=0, help="cap on concurrent agent runs, like SERVER_MAX_CONCURRENT_LLM_CALLS")
+    parser.add_argument("--model-validation", action="store_true", help="skip the lexicon and verdict cache so every validation calls the model")
+    parser.add_argument("--target", action="append", help="target word (repeatable, catalogue or held-out); defaults to the catalogue")
+    parser.add_argument("--seed", type=int, default=0, help="seed for targets, arrivals and think times")
+    parser.add_argument("--sample-ms", type=float, default=50, help="how often to sample event-loop lag and memory")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--samples", help="write the lag and memory time series to this JSONL file")
+    parser.add_argument("--games-output", help="write per-game results to this JSONL file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    pool = args.target or sorted(OBJECTS)
+    for target in pool:
+        try:
+            target_set(target)
+        except KeyError:
+            parser.error(f"unknown target: {target}")
+    rng = random.Random(args.seed)
+    targets = [rng.choice(pool) for _ in range(args.games)]
+
+    load_test = LoadTest(
+        rate=args.rate,
+        think_seconds=args.think_ms / 1000,
+        max_llm_calls=args.max_llm_calls,
+        model_validation=args.model_validation,
+        seed=args.seed,
+        sample_interval_seconds=args.sample_ms / 1000
+    )
+    games, wall_seconds, baseline = asyncio.run(load_test.run(targets))
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("output", "samples", "games_output")}
+    settings["environment"] = model_settings()
+    settings["python"] = sys.version.split()[0]
+    report = load_test.report(games, wall_seconds, baseline, settings)
+
+    if args.samples:
+        with open(args.samples, "w", encoding="utf-8") as f:
+            for sample in load_test.monitor.samples:
+                f.write(json.dumps(sample) + "\n")
+    if args.games_output:
+        with open(args.games_output, "w", encoding="utf-8") as f:
+            for game in games:
+                f.write(json.dumps(asdict(game)) + "\n")
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@
 - game_controller.py: Game logic and interactions
 """
 
+import time
+STARTED = time.perf_counter()
+
 import logging
 from game_controller import GameController
 
@@ -16,7 +19,7 @@ logger = logging.getLogger(__name__)
 def main():
     # Main entry point for the 20 Questions Game
     try:
-        app = GameController()
+        app = GameController(started=STARTED)
         app.run()
     except Exception as e:
         logger.error(f"Error starting application: {e}")
@@ -0,0 +1,165 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# Timing spans for every phase of a turn, with token counts and model names.
+# Spans can be appended to a JSONL trace file (TRACE_FILE) and summarised as
+# p50/p95/p99 per phase in Prometheus text format (METRICS_FILE or /metrics).
+
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+# Phases recorded across the app
+VALIDATION = "validation"
+RUNNER_SETUP = "runner_setup"
+TURN = "turn"
+GUESSING_AGENT = "guessing_agent"
+ASKING_AGENT = "asking_agent"
+FUSED_AGENT = "fused_agent"
+LOCAL_ENGINE = "local_engine"
+MODEL_QUEUE = "model_queue"
+UI_UPDATE = "ui_update"
+STARTUP_FIRST_PAINT = "startup_first_paint"
+STARTUP_READY = "startup_ready"
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Durations kept per phase for percentile estimates
+WINDOW_SIZE = 10000
+
+
+def percentile(values, pct: float) -> Optional[float]:
+    # Nearest-rank percentile, None for an empty list
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(values) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def model_name(model) -> str:
+    # Agents hold either a model name or a BaseLlm instance
+    return model if isinstance(model, str) else getattr(model, "model", str(model))
+
+
+class PhaseStats:
+    __slots__ = ("durations", "count", "total_seconds", "prompt_tokens", "output_tokens")
+
+    def __init__(self):
+        self.durations = deque(maxlen=WINDOW_SIZE)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+
+class Tracer:
+    # Collects spans from the worker loop and the UI thread
+
+    def __init__(self, trace_path: Optional[str] = None):
+        self.trace_path = trace_path
+        self.phases: dict[str, PhaseStats] = {}
+        self._lock = threading.Lock()
+        self._trace_file = None
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(trace_path=os.getenv("TRACE_FILE") or None)
+
+    @contextmanager
+    def span(self, phase: str, **attrs):
+        # Time a block; the yielded dict can be filled with tokens/model/etc.
+        started = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(phase, time.perf_counter() - started, **attrs)
+
+    def record(self, phase: str, seconds: float, **attrs):
+        with self._lock:
+            stats = self.phases.setdefault(phase, PhaseStats())
+            stats.durations.append(seconds)
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.prompt_tokens += attrs.get("prompt_tokens") or 0
+            stats.output_tokens += attrs.get("output_tokens") or 0
+            if self.trace_path:
+                self.write_trace({"ts": time.time(), "phase": phase, "seconds": seconds, **attrs})
+
+    def write_trace(self, record: dict):
+        try:
+            if self._trace_file is None:
+                self._trace_file = open(self.trace_path, "a", encoding="utf-8", buffering=1)
+            self._trace_file.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write trace file {self.trace_path}: {e}")
+            self.trace_path = None
+
+    def summary(self) -> dict:
+        # Per-phase latency percentiles and token totals
+        with self._lock:
+            return {
+                phase: {
+                    **latency_summary(list(stats.durations)),
+                    "count": stats.count,
+                    "total_seconds": stats.total_seconds,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "output_tokens": stats.output_tokens,
+                }
+                for phase, stats in self.phases.items()
+            }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP game_phase_seconds Duration of each phase of a game turn.",
+            "# TYPE game_phase_seconds summary",
+        ]
+        token_lines = [
+            "# HELP game_phase_tokens_total Model tokens used per phase.",
+            "# TYPE game_phase_tokens_total counter",
+        ]
+        with self._lock:
+            for phase, stats in sorted(self.phases.items()):
+                durations = list(stats.durations)
+                for quantile in QUANTILES:
+                    value = percentile(durations, quantile * 100)
+                    lines.append(f'game_phase_seconds{{phase="{phase}",quantile="{quantile}"}} {value if value is not None else "NaN"}')
+                lines.append(f'game_phase_seconds_sum{{phase="{phase}"}} {stats.total_seconds}')
+                lines.append(f'game_phase_seconds_count{{phase="{phase}"}} {stats.count}')
+                if stats.prompt_tokens or stats.output_tokens:
+                    token_lines.append(f'game_phase_tokens_total{{phase="{phase}",kind="prompt"}} {stats.prompt_tokens}')
+                    token_lines.append(f'game_phase_tokens_total{{phase="{phase}",kind="output"}} {stats.output_tokens}')
+        return "\n".join(lines + token_lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        # Write the current summary as a Prometheus text file (e.g. for node_exporter)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+def add_usage(attrs: dict, event):
+    # Accumulate token counts from an ADK event into span attributes
+    usage = getattr(event, "usage_metadata", None)
+    if usage is None:
+        return
+    attrs["prompt_tokens"] = attrs.get("prompt_tokens", 0) + (usage.prompt_token_count or 0)
+    attrs["output_tokens"] = attrs.get("output_tokens", 0) + (usage.candidates_token_count or 0)
+
+
+tracer = Tracer.from_env()
@@ -0,0 +1,351 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# Selects the model used by every agent, so agents can run without network access.
+# MODEL_BACKEND:
+# - "gemini" (default): the real Gemini model
+# - "stub": a deterministic local model that plays from the catalogue
+# - "record": call Gemini and save every response to a cassette file
+# - "replay": answer from a cassette file only, byte-for-byte
+# Gemini calls from every agent share one pre-warmed connection pool (model_client.py).
+# Every model request, whatever the backend, is admitted by the shared
+# scheduler (model_scheduler.py), which enforces quotas and retries rate limits.
+
+import os
+import re
+import json
+import math
+import random
+import asyncio
+import hashlib
+import threading
+from functools import cached_property
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+from pydantic import PrivateAttr
+from google.adk.models import BaseLlm, Gemini, LlmRequest, LlmResponse
+from google.genai import Client, types
+from google.genai.errors import ClientError
+
+from model_client import shared_client
+from model_scheduler import scheduler
+
+MODEL_NAME = "gemini-2.5-flash"
+DEFAULT_CASSETTE_PATH = Path(__file__).parent / "cassettes" / "responses.jsonl"
+LATENCY_DISTRIBUTIONS = ("uniform", "exponential", "lognormal")
+
+_ANSWER_PATTERN = re.compile(r"^\s*(yes|no)\s*$", re.IGNORECASE)
+_ACTION_PATTERN = re.compile(r"\{[^{}]*\"action\"[^{}]*\}")
+# A line of the question agents' game ledger, e.g. "3. Q: Is it alive? -> yes [best guess: cat, 4/10]"
+_LEDGER_PATTERN = re.compile(r"^\d+\. (Q|Guess): (.*?) -> (yes|no)\b", re.MULTILINE)
+
+
+def request_text(llm_request: LlmRequest) -> list[str]:
+    # All text in a request, in order: system instruction first, then contents
+    texts = []
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(system_instruction, str):
+        texts.append(system_instruction)
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                texts.append(part.text)
+    return texts
+
+
+def response_schema_name(llm_request: LlmRequest) -> str:
+    schema = llm_request.config.response_schema if llm_request.config else None
+    return getattr(schema, "__name__", "") if schema is not None else ""
+
+
+class PooledGemini(Gemini):
+    # Gemini whose requests go through the process-wide connection pool
+
+    @cached_property
+    def api_client(self) -> Client:
+        return shared_client.genai_client(headers=self._tracking_headers, retry_options=self.retry_options)
+
+
+class ScheduledLlm(BaseLlm):
+    # Sends each request of the wrapped model through the shared scheduler,
+    # retrying rate-limit errors that arrive before any response
+
+    inner: BaseLlm
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        estimated = scheduler.estimate_tokens(sum(len(t) for t in request_text(llm_request)))
+        attempt = 0
+        while True:
+            await scheduler.acquire(estimated)
+            used = None
+            responded = False
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                    responded = True
+                    if response.usage_metadata and response.usage_metadata.total_token_count:
+                        used = response.usage_metadata.total_token_count
+                    yield response
+                return
+            except ClientError as e:
+                if e.code != 429 or responded:
+                    raise
+                # A rejected request uses no tokens
+                used = 0
+                if not await scheduler.retry_after_rate_limit(attempt):
+                    raise
+                attempt += 1
+            finally:
+                scheduler.settle(estimated, used)
+
+
+class StubLlm(BaseLlm):
+    # Deterministic local model. It reads the game history out of the request,
+    # narrows the catalogue down and answers with valid GuessOutput,
+    # QuestionOutput, TurnOutput or ValidationOutput JSON.
+
+    latency_seconds: float = 0.0
+    jitter_seconds: float = 0.0
+    # How the jitter is drawn, see sample_latency()
+    latency_distribution: str = "uniform"
+    seed: int = 0
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, context):
+        super().model_post_init(context)
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"stub/.*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        delay = self.sample_latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        texts = request_text(llm_request)
+        text = json.dumps(self.respond(response_schema_name(llm_request), texts))
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=sum(len(t) for t in texts) // 4,
+            candidates_token_count=len(text) // 4,
+            total_token_count=(sum(len(t) for t in texts) + len(text)) // 4
+        )
+
+        if stream:
+            # Emit a few partial chunks before the aggregated response, like Gemini SSE
+            step = max(1, len(text) // 4)
+            for start in range(0, len(text), step):
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text[start:start + step])]),
+                    partial=True
+                )
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=usage
+        )
+
+    def sample_latency(self) -> float:
+        # - uniform: latency plus 0..jitter
+        # - exponential: latency plus a long tail with mean jitter
+        # - lognormal: median latency, with the 95th percentile jitter above it
+        if self.latency_distribution == "exponential":
+            return self.latency_seconds + (self._rng.expovariate(1 / self.jitter_seconds) if self.jitter_seconds > 0 else 0.0)
+        if self.latency_distribution == "lognormal":
+            if self.latency_seconds <= 0 or self.jitter_seconds <= 0:
+                return self.latency_seconds
+            sigma = math.log((self.latency_seconds + self.jitter_seconds) / self.latency_seconds) / 1.645
+            return self.latency_seconds * self._rng.lognormvariate(0, sigma)
+        return self.latency_seconds + self._rng.uniform(0, self.jitter_seconds)
+
+    def respond(self, schema_name: str, texts: list[str]) -> dict:
+        if schema_name == "ValidationOutput":
+            user_input = texts[-1].strip() if texts else ""
+            is_valid = 0 < len(user_input.split()) <= 3 and user_input.replace(" ", "").replace("-", "").isalpha()
+            return {"is_valid": is_valid, "reason": "A simple noun." if is_valid else "Please enter a simple noun."}
+
+        candidates, asked = self.candidates(texts)
+        guess = candidates[0] if candidates else "something"
+        question, balance = self.best_question(candidates, asked)
+        if len(candidates) == 1:
+            confidence = 10
+        elif candidates and balance == 0:
+            # No question can tell the remaining candidates apart, so start guessing
+            confidence = 9
+        else:
+            confidence = max(1, min(8, 9 - len(candidates)))
+
+        if schema_name == "GuessOutput":
+            return {"guess": guess, "confidence": confidence, "reasoning": f"{len(candidates)} candidates left."}
+        if schema_name == "QuestionOutput":
+            return {"question": question, "reasoning": f"Splits {len(candidates)} candidates."}
+        if schema_name == "TurnOutput":
+            decision = "make_guess" if confidence >= 9 else "ask_question"
+            return {"decision": decision, "guess": guess, "confidence": confidence,
+                    "question": question, "reasoning": f"{len(candidates)} candidates left."}
+        raise ValueError(f"StubLlm has no response for schema '{schema_name}'")
+
+    def candidates(self, texts: list[str]) -> tuple[list[str], set[str]]:
+        # Replay the (action, answer) pairs found in the request against the catalogue
+        # Imported here because the agent packages import this module
+        from question_agents.catalogue import OBJECTS
+        remaining = dict(OBJECTS)
+        asked = set()
+        pending = None
+        for text in texts:
+            for kind, shown, ledger_answer in _LEDGER_PATTERN.findall(text):
+                action = {"action": "make_guess", "guess": shown} if kind == "Guess" else {"action": "ask_question", "question": shown}
+                self.apply(remaining, asked, action, ledger_answer == "yes")
+            answer = _ANSWER_PATTERN.match(text)
+            if answer and pending is not None:
+                self.apply(remaining, asked, pending, answer.group(1).lower() == "yes")
+                pending = None
+                continue
+            for match in _ACTION_PATTERN.findall(text):
+                try:
+                    pending = json.loads(match)
+                except ValueError:
+                    continue
+        return sorted(remaining), asked
+
+    def apply(self, remaining: dict, asked: set, action: dict, is_yes: bool):
+        from question_agents.catalogue import attribute_for_question, normalize_name
+        if action.get("action") == "make_guess":
+            if not is_yes:
+                remaining.pop(normalize_name(action.get("guess") or ""), None)
+            return
+        attribute = attribute_for_question(action.get("question") or "")
+        if attribute is None:
+            return
+        asked.add(attribute)
+        for name in [n for n, attrs in remaining.items() if (attribute in attrs) != is_yes]:
+            del remaining[name]
+
+    def best_question(self, candidates: list[str], asked: set) -> tuple[str, int]:
+        # Pick the unasked attribute that splits the candidates most evenly
+        from question_agents.catalogue import ATTRIBUTE_NAMES, ATTRIBUTE_QUESTIONS, OBJECTS
+        best, best_balance = None, -1
+        for attribute in ATTRIBUTE_NAMES:
+            if attribute in asked:
+                continue
+            yes = sum(1 for name in candidates if attribute in OBJECTS[name])
+            balance = min(yes, len(candidates) - yes)
+            if balance > best_balance:
+                best, best_balance = attribute, balance
+        if best is None:
+            return "Is it something you can find at home?", 0
+        return ATTRIBUTE_QUESTIONS[best], best_balance
+
+
+def request_key(llm_request: LlmRequest, model_name: str) -> str:
+    # Stable fingerprint of everything that determines a model response
+    payload = {
+        "model": model_name,
+        "schema": response_schema_name(llm_request),
+        "texts": request_text(llm_request),
+        "roles": [content.role for content in llm_request.contents],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CassetteLlm(BaseLlm):
+    # Record/replay layer. In record mode every Gemini response is appended to
+    # a JSONL cassette; in replay mode the stored JSON is returned unchanged.
+
+    cassette_path: str
+    replay: bool = True
+    _entries: Optional[dict[str, list[str]]] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _inner: Optional[Gemini] = PrivateAttr(default=None)
+
+    def load(self) -> dict[str, list[str]]:
+        if self._entries is None:
+            self._entries = {}
+            path = Path(self.cassette_path)
+            if path.exists():
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries[entry["key"]] = entry["responses"]
+            logger.info(f"Loaded {len(self._entries)} cassette entries from {path}")
+        return self._entries
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(llm_request, self.model)
+        entries = self.load()
+
+        if self.replay:
+            if key not in entries:
+                raise KeyError(f"No cassette entry for request {key[:12]} in {self.cassette_path}")
+            for raw in entries[key]:
+                response = LlmResponse.model_validate_json(raw)
+                if response.partial and not stream:
+                    continue
+                yield response
+            return
+
+        if self._inner is None:
+            self._inner = PooledGemini(model=self.model)
+        recorded = []
+        async for response in self._inner.generate_content_async(llm_request, stream=stream):
+            recorded.append(response.model_dump_json(exclude_none=True))
+            yield response
+        self.save(key, recorded)
+
+    def save(self, key: str, responses: list[str]):
+        with self._lock:
+            self.load()[key] = responses
+            path = Path(self.cassette_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "responses": responses}) + "\n")
+
+
+_models: dict[tuple[str, str], BaseLlm] = {}
+
+
+def get_model(model_name: str = MODEL_NAME) -> BaseLlm:
+    # Model to pass to Agent(model=...), chosen by MODEL_BACKEND
+    # Models are shared by all agents using the same model name
+    backend = os.getenv("MODEL_BACKEND", "gemini")
+    if (backend, model_name) not in _models:
+        model = build_model(backend, model_name)
+        _models[(backend, model_name)] = ScheduledLlm(model=model.model, inner=model)
+    return _models[(backend, model_name)]
+
+
+def build_model(backend: str, model_name: str) -> BaseLlm:
+    if backend == "gemini":
+        return PooledGemini(model=model_name)
+    if backend == "stub":
+        distribution = os.getenv("STUB_LATENCY_DISTRIBUTION", "uniform")
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown STUB_LATENCY_DISTRIBUTION: {distribution}")
+        return StubLlm(
+            model=f"stub/{model_name}",
+            latency_seconds=float(os.getenv("STUB_LATENCY_MS", "0")) / 1000,
+            jitter_seconds=float(os.getenv("STUB_JITTER_MS", "0")) / 1000,
+            latency_distribution=distribution,
+            seed=int(os.getenv("STUB_SEED", "0"))
+        )
+    if backend in ("record", "replay"):
+        return CassetteLlm(
+            model=model_name,
+            cassette_path=os.getenv("CASSETTE_PATH", str(DEFAULT_CASSETTE_PATH)),
+            replay=backend == "replay"
+        )
+    raise ValueError(f"Unknown MODEL_BACKEND: {backend}")
+
+
+async def warm_up_model(model_name: str = MODEL_NAME):
+    # Open model connections ahead of the first call; nothing to do offline
+    if os.getenv("MODEL_BACKEND", "gemini") in ("gemini", "record"):
+        await shared_client.warm_up(model_name)
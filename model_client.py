@@ -0,0 +1,127 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# One HTTP connection pool for every Gemini call in the process.
+# By default ADK builds a new google.genai Client (and connection pool) for
+# each agent, so every agent pays its own TCP/TLS setup and idle connections
+# are dropped after a few seconds. All agents share this pool instead,
+# connections are kept alive across turns, and they can be opened ahead of
+# the first game with warm_up().
+#
+# The pool belongs to the event loop that first uses it; the desktop app,
+# the game server and simulate.py each run all model calls on one loop.
+
+import os
+import asyncio
+from typing import Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+from model_scheduler import Priority, scheduler
+
+
+class SharedModelClient:
+
+    def __init__(self, base_url: Optional[str] = None, max_connections: int = 20,
+                 max_keepalive_connections: int = 10, keepalive_seconds: float = 120.0,
+                 warm_connections: int = 2):
+        # base_url points the client at a stand-in endpoint (see model_standin.py)
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_seconds
+        )
+        self.warm_connections = warm_connections
+        self.requests = 0
+        self.new_connections = 0
+        self.warm_ups = 0
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._genai_clients: dict[tuple, genai.Client] = {}
+
+    @classmethod
+    def from_env(cls) -> "SharedModelClient":
+        # MODEL_BASE_URL, MODEL_MAX_CONNECTIONS, MODEL_MAX_KEEPALIVE_CONNECTIONS, MODEL_KEEPALIVE_SECONDS
+        # and MODEL_WARM_CONNECTIONS are optional
+        return cls(
+            base_url=os.getenv("MODEL_BASE_URL") or None,
+            max_connections=int(os.getenv("MODEL_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("MODEL_MAX_KEEPALIVE_CONNECTIONS", "10")),
+            keepalive_seconds=float(os.getenv("MODEL_KEEPALIVE_SECONDS", "120")),
+            warm_connections=int(os.getenv("MODEL_WARM_CONNECTIONS", "2"))
+        )
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                event_hooks={"request": [self.on_request]}
+            )
+        return self._http_client
+
+    async def on_request(self, request: httpx.Request):
+        # Count requests, and ask httpcore to report when it opens a new connection
+        self.requests += 1
+        request.extensions["trace"] = self.on_trace
+
+    async def on_trace(self, name: str, info: dict):
+        if name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+    def genai_client(self, headers: Optional[dict[str, str]] = None,
+                     retry_options: Optional[types.HttpRetryOptions] = None) -> genai.Client:
+        # A google.genai Client whose async calls go through the shared pool
+        # (one per distinct header/retry setting, all using the same connections)
+        key = (tuple(sorted((headers or {}).items())), retry_options.model_dump_json() if retry_options else None)
+        if key not in self._genai_clients:
+            self._genai_clients[key] = genai.Client(
+                http_options=types.HttpOptions(
+                    base_url=self.base_url,
+                    headers=headers,
+                    retry_options=retry_options,
+                    httpx_async_client=self.http_client
+                )
+            )
+        return self._genai_clients[key]
+
+    async def warm_up(self, model_name: str):
+        # Open keep-alive connections with cheap model metadata requests,
+        # so the first real call of a game skips TCP and TLS setup
+        client = self.genai_client()
+        results = await asyncio.gather(
+            *(self.warm_up_request(client, model_name) for _ in range(self.warm_connections)),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            logger.warning(f"Model warm-up request failed: {errors[0]}")
+        self.warm_ups += len(results) - len(errors)
+        logger.info(f"Model connections warmed up ({self.new_connections} open so far)")
+
+    async def warm_up_request(self, client: genai.Client, model_name: str):
+        # Warm-up requests count against the request quota, behind any game traffic
+        with scheduler.priority(Priority.BACKGROUND):
+            await scheduler.acquire(0)
+        return await client.aio.models.get(model=model_name)
+
+    def stats(self) -> dict:
+        # Connection reuse: the share of requests that did not need a new connection
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "warm_up_requests": self.warm_ups,
+            "reuse_rate": 1 - self.new_connections / self.requests if self.requests else None,
+        }
+
+    async def close(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._genai_clients.clear()
+
+
+shared_client = SharedModelClient.from_env()
@@ -0,0 +1,303 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# Admission control for model calls, shared by every agent in the process.
+# Each model request waits here for a request token and an estimate of the
+# tokens it will use, so a burst of players queues up instead of exhausting
+# the per-minute quota and failing every game at once.
+# - Waiting requests are served by priority: in-game turns first, then word
+#   validation, then background work (speculative branches and hedges).
+# - Rate-limit errors (HTTP 429) are retried with jittered exponential
+#   backoff, and new requests are held back until the backoff has passed.
+# Callers set the priority around Runner.run_async with scheduler.priority();
+# model_backend.ScheduledLlm applies it to every request the agents make.
+# - ModelCallSlots caps concurrent agent runs, admitting waiting runs in the
+#   same priority order and keeping some slots free of background work.
+#
+# Like the shared connection pool, the scheduler belongs to the event loop
+# that runs the model calls.
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional
+
+import metrics
+from metrics import latency_summary, tracer
+
+# Queue wait times kept per priority for percentile estimates
+WAIT_WINDOW = 2000
+# Rough characters per token, for estimating a request before it is sent
+CHARS_PER_TOKEN = 4
+
+
+class Priority(IntEnum):
+    TURN = 0
+    VALIDATION = 1
+    BACKGROUND = 2
+
+
+# Priority of the model calls made from the current task; unmarked calls count as turns
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("model_call_priority", default=Priority.TURN)
+
+
+@dataclass
+class SchedulerPolicy:
+    # 0 means unlimited
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    # How much of the per-minute quota may be spent at once
+    burst_seconds: float = 10
+    max_retries: int = 4
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 30.0
+    # Assumed response size until the real usage is known
+    expected_output_tokens: int = 256
+
+    @classmethod
+    def from_env(cls) -> "SchedulerPolicy":
+        # Quotas apply to the real API; offline backends are unlimited unless set explicitly
+        online = os.getenv("MODEL_BACKEND", "gemini") in ("gemini", "record")
+        return cls(
+            requests_per_minute=float(os.getenv("MODEL_REQUESTS_PER_MINUTE", "1000" if online else "0")),
+            tokens_per_minute=float(os.getenv("MODEL_TOKENS_PER_MINUTE", "1000000" if online else "0")),
+            max_retries=int(os.getenv("MODEL_RATE_LIMIT_RETRIES", "4"))
+        )
+
+
+class TokenBucket:
+    # Refills at per_minute / 60 tokens a second, holding at most burst_seconds worth.
+    # A request larger than the bucket is let through once the bucket is full.
+
+    def __init__(self, per_minute: float, burst_seconds: float, minimum: float = 0):
+        self.rate = per_minute / 60
+        self.capacity = max(minimum, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Seconds until `amount` can be taken
+        if self.unlimited:
+            return 0.0
+        self.refill()
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.refill()
+            self.level -= amount
+
+    def give_back(self, amount: float):
+        # Correct an estimate once the real amount is known (negative to charge more)
+        if not self.unlimited:
+            self.refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+class ModelScheduler:
+
+    def __init__(self, policy: SchedulerPolicy):
+        self.policy = policy
+        self.requests = TokenBucket(policy.requests_per_minute, policy.burst_seconds, minimum=1)
+        self.tokens = TokenBucket(policy.tokens_per_minute, policy.burst_seconds)
+        # Heap of (priority, arrival order, tokens, future) for requests waiting to be admitted
+        self._waiting: list[tuple[Priority, int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # No requests are admitted before this (monotonic) time after a rate-limit error
+        self.paused_until = 0.0
+        self.waits = {priority: deque(maxlen=WAIT_WINDOW) for priority in Priority}
+        self.admitted = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.rate_limited = 0
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls) -> "ModelScheduler":
+        return cls(SchedulerPolicy.from_env())
+
+    @contextmanager
+    def priority(self, priority: Priority):
+        # Model calls made inside this block (and tasks it starts) use `priority`
+        token = _priority.set(priority)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def estimate_tokens(self, prompt_chars: int) -> int:
+        return prompt_chars // CHARS_PER_TOKEN + self.policy.expected_output_tokens
+
+    async def acquire(self, tokens: int):
+        # Wait until a request of about `tokens` tokens may be sent
+        priority = _priority.get()
+        started = time.perf_counter()
+        if not self._waiting and self.delay(tokens) == 0:
+            self.admit(tokens)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiting, (priority, next(self._order), tokens, future))
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+            self.dispatch()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Admitted just before the caller gave up
+                    self.settle(tokens, 0, requests=1)
+                raise
+
+        waited = time.perf_counter() - started
+        self.waits[priority].append(waited)
+        tracer.record(metrics.MODEL_QUEUE, waited, priority=priority.name.lower())
+
+    def delay(self, tokens: int) -> float:
+        return max(self.paused_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def admit(self, tokens: int):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.admitted += 1
+
+    def dispatch(self):
+        # Admit waiting requests in priority order while the buckets allow,
+        # then wake up again when the next one can go
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting:
+            _, _, tokens, future = self._waiting[0]
+            if future.done():
+                # Cancelled while waiting
+                heapq.heappop(self._waiting)
+                continue
+            delay = self.delay(tokens)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self.dispatch)
+                return
+            heapq.heappop(self._waiting)
+            self.admit(tokens)
+            future.set_result(None)
+
+    def settle(self, estimated: int, used: Optional[int], requests: int = 0):
+        # Charge the real token usage instead of the estimate (and refund
+        # requests that were never sent)
+        if used is not None:
+            self.tokens.give_back(estimated - used)
+        if requests:
+            self.requests.give_back(requests)
+        if self._waiting:
+            self.dispatch()
+
+    async def retry_after_rate_limit(self, attempt: int) -> bool:
+        # After a 429, wait a jittered exponential delay and hold back every
+        # other request for the same time. False once retries are used up.
+        self.rate_limited += 1
+        if attempt >= self.policy.max_retries:
+            logger.error(f"Model rate limit hit, giving up after {attempt} retries")
+            return False
+        self.retries += 1
+        ceiling = min(self.policy.max_backoff_seconds, self.policy.backoff_seconds * 2 ** attempt)
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        logger.warning(f"Model rate limit hit, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.policy.max_retries})")
+        await asyncio.sleep(delay)
+        return True
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        return sum(1 for p, _, _, future in self._waiting
+                   if not future.done() and (priority is None or p == priority))
+
+    def stats(self) -> dict:
+        return {
+            "requests_per_minute": self.policy.requests_per_minute or None,
+            "tokens_per_minute": self.policy.tokens_per_minute or None,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "queue_depth": {priority.name.lower(): self.queue_depth(priority) for priority in Priority},
+            "max_queue_depth": self.max_queue_depth,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "wait_seconds": {priority.name.lower(): latency_summary(list(waits)) for priority, waits in self.waits.items()},
+        }
+
+
+class ModelCallSlots:
+    # A cap on concurrent agent runs (each may make several model requests).
+    # Waiting runs are admitted by the priority set with scheduler.priority(),
+    # like the scheduler's own queue, and background runs may only fill
+    # background_share of the slots, so a turn never waits behind a full set
+    # of speculative branches and hedges.
+
+    def __init__(self, value: int, background_share: float = 0.75):
+        self.value = value
+        self.background_limit = max(1, int(value * background_share))
+        self.in_flight = 0
+        # Heap of (priority, arrival order, future) for runs waiting for a slot
+        self._waiting: list[tuple[Priority, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def limit(self, priority: Priority) -> int:
+        return self.background_limit if priority == Priority.BACKGROUND else self.value
+
+    async def acquire(self):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (_priority.get(), next(self._order), future))
+        self.dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before the caller gave up
+                self.release()
+            raise
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        # Hand free slots to waiting runs in priority order
+        while self._waiting:
+            priority, _, future = self._waiting[0]
+            if future.done():
+                # Cancelled while waiting
+                heapq.heappop(self._waiting)
+                continue
+            if self.in_flight >= self.limit(priority):
+                return
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiting if not future.done())
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+scheduler = ModelScheduler.from_env()
@@ -0,0 +1,120 @@
+"""
+20 Questions Game - Local Model Endpoint Stand-in
+
+Serves the parts of the Gemini REST API the agents use, answering with the
+deterministic stub model, so the real HTTP client path (connection pool,
+keep-alive, warm-up, streaming) can be exercised without network access.
+
+    python model_standin.py --port 8090 --latency-ms 200
+    MODEL_BASE_URL=http://127.0.0.1:8090 GOOGLE_API_KEY=standin python simulate.py --games 20
+
+- GET  /{version}/models/{model}                             -> model metadata (used by warm-up)
+- POST /{version}/models/{model}:generateContent              -> one JSON response
+- POST /{version}/models/{model}:streamGenerateContent?alt=sse -> server-sent event chunks
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import json
+import asyncio
+import argparse
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from model_backend import StubLlm
+
+
+def schema_name(generation_config: dict) -> str:
+    # The stub answers by output schema; identify it from its property names
+    schema = generation_config.get("responseJsonSchema") or generation_config.get("responseSchema") or {}
+    properties = set(schema.get("properties") or {})
+    if "is_valid" in properties:
+        return "ValidationOutput"
+    if "decision" in properties:
+        return "TurnOutput"
+    if "confidence" in properties:
+        return "GuessOutput"
+    if "question" in properties:
+        return "QuestionOutput"
+    return ""
+
+
+def body_texts(body: dict) -> list[str]:
+    # System instruction first, then every content part, like model_backend.request_text
+    texts = [part["text"] for part in (body.get("systemInstruction") or {}).get("parts", []) if part.get("text")]
+    for content in body.get("contents") or []:
+        texts.extend(part["text"] for part in content.get("parts", []) if part.get("text"))
+    return texts
+
+
+def response_body(model: str, text: str, prompt_chars: int) -> dict:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_chars // 4,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": (prompt_chars + len(text)) // 4,
+        },
+        "modelVersion": model,
+    }
+
+
+def create_app(latency_seconds: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Gemini stand-in")
+    stub = StubLlm(model="stub/standin")
+    app.state.requests = 0
+
+    @app.get("/{version}/models/{model}")
+    async def get_model(version: str, model: str):
+        return {"name": f"models/{model}", "displayName": model, "supportedGenerationMethods": ["generateContent"]}
+
+    @app.post("/{version}/models/{model_action}")
+    async def generate(version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        if action not in ("generateContent", "streamGenerateContent"):
+            raise HTTPException(status_code=404, detail=f"Unsupported action: {action}")
+        app.state.requests += 1
+
+        body = await request.json()
+        texts = body_texts(body)
+        try:
+            text = json.dumps(stub.respond(schema_name(body.get("generationConfig") or {}), texts))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        prompt_chars = sum(len(t) for t in texts)
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+
+        if action == "generateContent":
+            return JSONResponse(response_body(model, text, prompt_chars))
+
+        async def events():
+            # A few partial chunks, then a final one carrying usage metadata
+            step = max(1, len(text) // 4)
+            chunks = [text[start:start + step] for start in range(0, len(text), step)]
+            for number, chunk in enumerate(chunks):
+                payload = response_body(model, chunk, prompt_chars)
+                if number < len(chunks) - 1:
+                    del payload["usageMetadata"], payload["candidates"][0]["finishReason"]
+                yield f"data: {json.dumps(payload)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every generate call")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency_ms / 1000), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+20 Questions Game - Opening Book
+
+Every game starts from the same opening context and the first few yes/no
+answers only have a handful of paths, so the question agent's responses to
+them are generated once, offline, and stored in a trie keyed by each turn's
+text (the opening context, then "yes" or "no" for every answer).
+
+Each node keeps the events the agent produced for that turn, state deltas
+included. Serving a node appends fresh copies of them to the game's session,
+so when the game leaves the book the agent carries on from exactly the
+session it would have built itself.
+
+    MODEL_BACKEND=stub python opening_book.py --turns 6
+
+The book records the agent configuration it was generated with (local engine
+and catalogue, and the orchestration mode, model, prompt style and routing
+policy if any model responses are stored) and is not used when that
+configuration has changed.
+
+No book is bundled: with the local engine on, the opening turns already make
+no model calls, so a book only saves model calls when it is generated with
+the real model for LOCAL_QUESTION_ENGINE=0 and pointed to with
+OPENING_BOOK_PATH.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import copy
+import gzip
+import json
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional
+
+from google.adk.agents.invocation_context import new_invocation_context_id
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.genai import types
+
+from game_rules import MAKE_GUESS, OPENING_CONTEXT
+from metrics import model_name
+from question_agents.actions import AgentAction, parse_action
+from question_agents.candidate_engine import MAX_ENGINE_TURNS, MAX_LOCAL_GUESSES, engine
+from question_agents.ledger import LEDGER_PROMPTS
+from question_agents.routing import routing_policy
+
+DEFAULT_BOOK_PATH = Path(__file__).parent / "question_agents" / "opening_book.json.gz"
+# Version 2 stores the typed action marker with each turn's final event;
+# version 3 adds the prompt style and routing policy to the configuration
+BOOK_VERSION = 3
+ANSWERS = ("yes", "no")
+# Event fields stored in the book; ids, timestamps and invocation ids are minted when served
+EVENT_FIELDS = {"author", "branch", "content", "actions", "custom_metadata"}
+
+
+def book_key(game_context: str) -> str:
+    return game_context.strip().lower()
+
+
+def agent_config(agent, model_calls: bool = True) -> dict:
+    # What the agent's opening turns depend on. Without model calls the
+    # orchestration mode, model, prompts and routing make no difference and
+    # are left as None, which matches any value.
+    config = {"local_engine": agent.local_engine, "engine": None, "mode": None, "model": None,
+              "ledger_prompts": None, "routing": None}
+    if agent.local_engine:
+        catalogue = json.dumps([engine.names, engine.attributes, engine.matrix.tobytes().hex(),
+                                MAX_ENGINE_TURNS, MAX_LOCAL_GUESSES])
+        config["engine"] = hashlib.sha256(catalogue.encode("utf-8")).hexdigest()[:16]
+    if model_calls:
+        config["mode"] = agent.mode
+        config["model"] = model_name(agent.fused_agent.model)
+        config["ledger_prompts"] = LEDGER_PROMPTS
+        config["routing"] = routing_policy.to_dict()
+    return config
+
+
+class OpeningBook:
+
+    def __init__(self, root: dict, config: dict, turns: int):
+        # root = {"next": {key: node}}, node = {"action": {...}, "events": [...], "next": {...}}
+        self.root = root
+        self.config = config
+        self.turns = turns
+        self.served = 0
+
+    @classmethod
+    def load(cls, path) -> "OpeningBook":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != BOOK_VERSION:
+            raise ValueError(f"Unsupported opening book version: {data.get('version')}")
+        return cls(data["root"], data["config"], data["turns"])
+
+    @classmethod
+    def from_env(cls, agent) -> Optional["OpeningBook"]:
+        # OPENING_BOOK=0 disables the book; otherwise the book at OPENING_BOOK_PATH
+        # (or DEFAULT_BOOK_PATH, once generated) is used when present
+        if os.getenv("OPENING_BOOK", "1") != "1":
+            return None
+        path = os.getenv("OPENING_BOOK_PATH") or DEFAULT_BOOK_PATH
+        if not os.path.exists(path):
+            logger.info(f"No opening book at {path}")
+            return None
+        try:
+            book = cls.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load opening book {path}: {e}")
+            return None
+        if not book.matches(agent):
+            logger.info(f"Opening book {path} was generated for a different agent configuration, not using it")
+            return None
+        logger.info(f"Loaded opening book with {book.size()} turns from {path}")
+        return book
+
+    def save(self, path):
+        data = {"version": BOOK_VERSION, "turns": self.turns, "config": self.config, "root": self.root}
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    def matches(self, agent) -> bool:
+        current = agent_config(agent)
+        return all(value is None or value == current.get(key) for key, value in self.config.items())
+
+    def size(self, node: Optional[dict] = None) -> int:
+        # Number of stored turns below `node` (the whole book by default)
+        node = self.root if node is None else node
+        return sum(1 + self.size(child) for child in node.get("next", {}).values())
+
+    def next(self, node: Optional[dict], game_context: str) -> Optional[dict]:
+        # The stored turn following `node` for this turn's text, or None once off-book
+        if node is None:
+            return None
+        return node.get("next", {}).get(book_key(game_context))
+
+    def covers(self, node: Optional[dict], answers) -> bool:
+        # Whether the turn after `node` is stored for every one of `answers`
+        return node is not None and all(book_key(answer) in node.get("next", {}) for answer in answers)
+
+    async def serve(self, session_service: BaseSessionService, session: Session,
+                    node: dict, game_context: str) -> AgentAction:
+        # Append the turn's events to the session as one invocation and return its action
+        invocation_id = new_invocation_context_id()
+        await session_service.append_event(session, Event(
+            author="user",
+            invocation_id=invocation_id,
+            content=types.Content(role="user", parts=[types.Part(text=game_context)])
+        ))
+        for stored in node["events"]:
+            await session_service.append_event(session, Event.model_validate({**copy.deepcopy(stored), "invocation_id": invocation_id}))
+        self.served += 1
+        return parse_action(node["action"])
+
+    def counters(self) -> dict:
+        return {"turns": self.turns, "stored_turns": self.size(), "served": self.served}
+
+
+async def generate(turns: int) -> OpeningBook:
+    # Play every answer path of the first `turns` turns through the question agent
+    # Imported here so that loading a book does not build the agents
+    from adk_runners import ADKRunners, question_agent
+
+    runners = ADKRunners(prewarm=False)
+    pool = runners.question_pool
+
+    async def expand(session: Session, game_context: str, depth: int) -> dict:
+        stored = await pool.session_service.get_session(app_name=pool.app_name, user_id=runners.user_id, session_id=session.id)
+        before = len(stored.events)
+        action = await runners.run_question_turn(session, game_context)
+        if action is None:
+            raise RuntimeError(f"The question agent failed on turn {depth} ({game_context!r})")
+
+        stored = await pool.session_service.get_session(app_name=pool.app_name, user_id=runners.user_id, session_id=session.id)
+        node = {
+            "action": action.to_dict(),
+            "events": [event.model_dump(mode="json", include=EVENT_FIELDS, exclude_none=True, exclude_defaults=True)
+                       for event in stored.events[before:] if event.author != "user"],
+        }
+        if depth < turns:
+            # A "yes" to a guess ends the game, so only "no" continues after one
+            answers = ("no",) if action.action == MAKE_GUESS else ANSWERS
+            node["next"] = {}
+            for answer in answers:
+                fork = await pool.fork_session(runners.user_id, session)
+                try:
+                    node["next"][answer] = await expand(fork, answer, depth + 1)
+                finally:
+                    await pool.release_session(runners.user_id, fork)
+        return node
+
+    session = await pool.create_session(runners.user_id)
+    try:
+        root = {"next": {book_key(OPENING_CONTEXT): await expand(session, OPENING_CONTEXT, 1)}}
+    finally:
+        await pool.release_session(runners.user_id, session)
+    if runners.llm_calls == 0:
+        logger.warning("No model calls were made, so this book will not save any; "
+                       "generate it with LOCAL_QUESTION_ENGINE=0 and the real model")
+    return OpeningBook(root, agent_config(question_agent, model_calls=runners.llm_calls > 0), turns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the question agent's opening book")
+    parser.add_argument("--turns", type=int, default=6, help="number of opening turns to store")
+    parser.add_argument("--output", default=str(DEFAULT_BOOK_PATH), help="where to write the book")
+    args = parser.parse_args()
+
+    book = asyncio.run(generate(args.turns))
+    book.save(args.output)
+    print(json.dumps({"output": args.output, "bytes": os.path.getsize(args.output), **book.counters(),
+                      "config": book.config}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Incremental extraction of string fields from JSON that is still being generated
+
+import re
+from typing import Optional
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_UNICODE_ESCAPE = re.compile(r'\\u([0-9a-fA-F]{4})')
+
+
+def _unicode_escape(text: str, i: int) -> tuple[Optional[str], int]:
+    # Decode the \uXXXX escape at text[i] (joining a surrogate pair) and return
+    # it with the number of characters used, or (None, 0) if it is truncated or invalid
+    match = _UNICODE_ESCAPE.match(text, i)
+    if match is None:
+        return None, 0
+    code = int(match.group(1), 16)
+    if 0xD800 <= code < 0xDC00:
+        low = _UNICODE_ESCAPE.match(text, i + 6)
+        if low is None or not 0xDC00 <= int(low.group(1), 16) < 0xE000:
+            return None, 0
+        code = 0x10000 + ((code - 0xD800) << 10) + (int(low.group(1), 16) - 0xDC00)
+        return chr(code), 12
+    return chr(code), 6
+
+
+def extract_partial_string(text: str, field: str) -> Optional[str]:
+    # Return the value of a top-level string field as far as it has been generated,
+    # or None if the field has not started yet.
+    # e.g. '{"question": "Is it ali' -> 'Is it ali'
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(field), text)
+    if match is None:
+        return None
+
+    chars = []
+    i = match.end()
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            break
+        if char == '\\':
+            if i + 1 >= len(text):
+                break  # escape sequence not complete yet
+            code = text[i + 1]
+            if code == 'u':
+                decoded, length = _unicode_escape(text, i)
+                if decoded is None:
+                    break  # not complete yet, or invalid: keep the decodable prefix
+                chars.append(decoded)
+                i += length
+                continue
+            chars.append(_ESCAPES.get(code, code))
+            i += 2
+            continue
+        chars.append(char)
+        i += 1
+    return "".join(chars)
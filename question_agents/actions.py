@@ -0,0 +1,58 @@
+# Typed actions RootAgent hands to the game.
+# The final event of every question agent turn carries its action twice: as
+# JSON text, for adk web and anything reading stored sessions, and as a plain
+# dict in the event's custom_metadata under ACTION_METADATA_KEY. In-process
+# callers find the action event by that marker and validate the dict into a
+# GuessAction or QuestionAction, instead of trial-parsing every event's text.
+
+from typing import Annotated, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from game_rules import ASK_QUESTION, MAKE_GUESS
+
+ACTION_METADATA_KEY = "question_agent_action"
+
+
+class GuessOutput(BaseModel):
+    guess: str = Field(..., description="The final guess for what the user is thinking of")
+    confidence: int = Field(..., description="Confidence level (1-10) in this guess")
+    reasoning: str = Field(..., description="Explanation of why this is the best guess. Summarise in less than 20 words.")
+
+
+class QuestionOutput(BaseModel):
+    question: str = Field(..., description="A strategic yes/no question to ask")
+    reasoning: str = Field(..., description="Explanation of why you ask this question. Summarise in less than 20 words.")
+
+
+class GuessAction(GuessOutput):
+    action: Literal["make_guess"] = MAKE_GUESS
+    # Local engine guesses have no confidence, and streamed partials no reasoning yet
+    confidence: Optional[int] = None
+    reasoning: str = ""
+
+    def to_dict(self) -> dict:
+        return {"action": self.action, **self.model_dump(exclude={"action"}, exclude_none=True)}
+
+
+class QuestionAction(QuestionOutput):
+    action: Literal["ask_question"] = ASK_QUESTION
+    reasoning: str = ""
+
+    def to_dict(self) -> dict:
+        return {"action": self.action, **self.model_dump(exclude={"action"}, exclude_none=True)}
+
+
+AgentAction = Annotated[Union[GuessAction, QuestionAction], Field(discriminator="action")]
+_action_adapter = TypeAdapter(AgentAction)
+
+
+def parse_action(data: dict) -> Union[GuessAction, QuestionAction]:
+    # Validate an action dict (from metadata, the opening book or stored JSON text)
+    return _action_adapter.validate_python(data)
+
+
+def action_from_event(event) -> Optional[Union[GuessAction, QuestionAction]]:
+    # The action carried by a RootAgent final event, None for every other event
+    data = (event.custom_metadata or {}).get(ACTION_METADATA_KEY)
+    return parse_action(data) if data is not None else None
@@ -4,27 +4,38 @@ logger = logging.getLogger(__name__)
 # Dependencies for llm agents 
 from google.adk.agents import Agent
 from pydantic import BaseModel, Field
+from model_backend import get_model
+from metrics import LOCAL_ENGINE, add_usage, model_name, tracer
+from .ledger import LEDGER_PROMPTS, LEDGER_STATE_KEY, GameLedger, ledger_instruction
+from .candidate_engine import ENGINE_STATE_KEY, LOCAL_QUESTION_ENGINE, engine
+from .routing import GUESS_CONFIDENCE_THRESHOLD, routing_policy
+from .actions import ACTION_METADATA_KEY, AgentAction, GuessAction, GuessOutput, QuestionAction, QuestionOutput, parse_action
 
 
 # Dependencies for custom agent 
 from google.adk.agents import BaseAgent
-from google.adk.events import Event
+from google.adk.events import Event, EventActions
 from google.adk.agents.invocation_context import InvocationContext
 from google.genai import types 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Literal, Optional
 from uuid import uuid4
 from json import dumps
+import asyncio
+import contextlib
+import os
 
-class GuessOutput(BaseModel):    
-    guess: str = Field(..., description="The final guess for what the user is thinking of")
-    confidence: int = Field(..., description="Confidence level (1-10) in this guess")
-    reasoning: str = Field(..., description="Explanation of why this is the best guess. Summarise in less than 20 words.")
+# How RootAgent orchestrates its sub-agents on each turn:
+# - "sequential": guessing agent, then asking agent if confidence is low (original behaviour)
+# - "parallel": both sub-agents at once, then pick by confidence
+# - "fused": one structured call that returns either a guess or a question
+ORCHESTRATION_MODES = ("sequential", "parallel", "fused")
 
 # Guessing Agent - Responsible for making guesses
 guessing_agent = Agent(
     name="guessing_agent", 
-    model="gemini-2.5-flash",
-    instruction="You are an expert at making educated guesses in 20 Questions game",
+    model=get_model(),
+    instruction=ledger_instruction("You are an expert at making educated guesses in 20 Questions game"),
+    include_contents="none" if LEDGER_PROMPTS else "default",
     description="""You analyze all the information gathered from previous questions and answers
     to make the best possible guess about what the user is thinking of.
     Consider:
@@ -39,16 +50,12 @@ guessing_agent = Agent(
 )
 
 
-class QuestionOutput(BaseModel):    
-    question: str = Field(..., description="A strategic yes/no question to ask")
-    reasoning: str = Field(..., description="Explanation of why you ask this question. Summarise in less than 20 words.")
-
-
 # Asking Agent - Responsible for generating strategic questions
 asking_agent = Agent(
     name="asking_agent",
-    model="gemini-2.5-flash",
-    instruction="You are an expert at asking strategic yes/no questions in 20 Questions game",
+    model=get_model(),
+    instruction=ledger_instruction("You are an expert at asking strategic yes/no questions in 20 Questions game"),
+    include_contents="none" if LEDGER_PROMPTS else "default",
     description="""You specialize in asking the most effective yes/no questions to narrow down possibilities.
     Your goal is to eliminate as many possibilities as possible with each question.
     Consider categories like:
@@ -64,76 +71,303 @@ asking_agent = Agent(
     output_key="question_output"
 )
 
+class TurnOutput(BaseModel):
+    # Named "decision" rather than "action" so the raw sub-agent output is never
+    # mistaken for RootAgent's final action event
+    decision: Literal["make_guess", "ask_question"] = Field(..., description="make_guess if you are confident enough to guess, otherwise ask_question")
+    guess: Optional[str] = Field(None, description="Your best guess for what the user is thinking of")
+    confidence: int = Field(..., description="Confidence level (1-10) in your best guess")
+    question: Optional[str] = Field(None, description="A strategic yes/no question to ask, required when decision is ask_question")
+    reasoning: str = Field(..., description="Explanation of your decision. Summarise in less than 20 words.")
+
+
+# Fused Agent - Decides between guessing and asking in a single call
+fused_agent = Agent(
+    name="fused_agent",
+    model=get_model(),
+    instruction=ledger_instruction("You are an expert player of the 20 Questions game, deciding whether to guess or ask"),
+    include_contents="none" if LEDGER_PROMPTS else "default",
+    description=f"""You analyze all the information gathered from previous questions and answers.
+    First estimate your best guess and your confidence (1-10) in it.
+    If your confidence is {GUESS_CONFIDENCE_THRESHOLD} or more, set decision to make_guess and fill in guess.
+    Otherwise set decision to ask_question and ask the most effective yes/no question,
+    one that divides the remaining possibilities roughly in half.
+    Avoid overly specific questions early in the game.
+    """,
+    output_schema=TurnOutput,
+    output_key="turn_output"
+)
+
+
+async def merge_agent_runs(*agent_runs: AsyncGenerator[Event, None]) -> AsyncGenerator[Event, None]:
+    # Interleave events from several sub-agent runs as they are produced.
+    # Each run waits until its event has been processed by the runner before continuing,
+    # so session state is up to date once all runs are drained.
+    # The runs are drained by tasks that this generator cancels and awaits when it
+    # finishes, fails or is closed early (a hedge or deadline giving up on the turn);
+    # they are never yielded across, unlike tasks in a TaskGroup.
+    queue = asyncio.Queue()
+
+    async def drain(agent_run):
+        try:
+            async with contextlib.aclosing(agent_run) as events:
+                async for event in events:
+                    processed = asyncio.Event()
+                    await queue.put((event, processed))
+                    await processed.wait()
+        except Exception as error:
+            queue.put_nowait((error, None))
+        else:
+            queue.put_nowait((None, None))
+
+    tasks = [asyncio.create_task(drain(agent_run)) for agent_run in agent_runs]
+    try:
+        finished = 0
+        while finished < len(tasks):
+            event, processed = await queue.get()
+            if isinstance(event, Exception):
+                raise event
+            if event is None:
+                finished += 1
+            else:
+                yield event
+                processed.set()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 class RootAgent(BaseAgent):
     guessing_agent:Agent
     asking_agent:Agent
-    def __init__(self,name:str,guessing_agent:Agent,asking_agent:Agent):
+    fused_agent:Agent
+    mode:str="sequential"
+    local_engine:bool=False
+    def __init__(self,name:str,guessing_agent:Agent,asking_agent:Agent,fused_agent:Agent,mode:str="sequential",local_engine:bool=False):
+        if mode not in ORCHESTRATION_MODES:
+            raise ValueError(f"Unknown orchestration mode: {mode}")
         super().__init__(
             name=name,
             guessing_agent=guessing_agent,
             asking_agent=asking_agent,
-            sub_agents=[guessing_agent,asking_agent]
+            fused_agent=fused_agent,
+            mode=mode,
+            local_engine=local_engine,
+            sub_agents=[guessing_agent,asking_agent,fused_agent]
     )
 
     # A helper method to craft simple text response events
-    def create_text_response_event(self,response:str,invocation_id:str)->Event:
+    def create_text_response_event(self,response:str,invocation_id:str,state_delta:Optional[dict]=None)->Event:
         event=Event(
             content=types.Content(
                 role=self.name,
                 parts=[types.Part(text=response)]
             ),
             author=self.name,
-            invocation_id=invocation_id
+            invocation_id=invocation_id,
+            actions=EventActions(state_delta=state_delta or {})
         )
         return event
+
+    # A content-less event that only updates session state
+    def create_state_event(self,state_delta:dict,invocation_id:str)->Event:
+        return Event(
+            author=self.name,
+            invocation_id=invocation_id,
+            actions=EventActions(state_delta=state_delta)
+        )
+
+    # Final action event, which also records the action in the game ledger.
+    # The action goes out as JSON text and, typed, in the event's custom metadata.
+    def create_action_event(self,action:AgentAction,ctx:InvocationContext,guess_output:Optional[dict])->Event:
+        ledger = GameLedger.from_state(ctx.session.state)
+        ledger.record_action(action, guess_output)
+        event = self.create_text_response_event(
+            dumps(action.to_dict()),
+            invocation_id=ctx.invocation_id,
+            state_delta={LEDGER_STATE_KEY: ledger.to_state()}
+        )
+        event.custom_metadata = {ACTION_METADATA_KEY: action.to_dict()}
+        return event
+    
+    def create_guess_event(self,guess_output:dict,ctx:InvocationContext)->Event:
+        return self.create_action_event(GuessAction(
+            guess=guess_output.get("guess"),
+            reasoning=guess_output.get("reasoning") or ""
+        ), ctx, guess_output)
+
+    def create_question_event(self,question_output:dict,ctx:InvocationContext,guess_output:Optional[dict]=None)->Event:
+        return self.create_action_event(QuestionAction(
+            question=question_output.get("question"),
+            reasoning=question_output.get("reasoning") or ""
+        ), ctx, guess_output)
+
+    # Run a sub-agent inside a timing span that collects its token usage
+    async def run_traced(self,agent:BaseAgent,ctx:InvocationContext)->AsyncGenerator[Event, None]:
+        with tracer.span(agent.name, model=model_name(agent.model)) as attrs:
+            async for event in agent.run_async(ctx):
+                add_usage(attrs, event)
+                yield event
+
+    # Ask or guess from the local candidate engine while the game is still in the catalogue.
+    # Returns the engine's updated state and its action, or None when the LLM should take over.
+    def next_local_action(self,ctx:InvocationContext,ledger:GameLedger,answered:bool)->tuple[dict, Optional[dict]]:
+        with tracer.span(LOCAL_ENGINE):
+            engine_state = dict(ctx.session.state.get(ENGINE_STATE_KEY) or engine.new_state())
+            if answered:
+                last = ledger.entries[-1]
+                engine.apply_answer(engine_state, last.question, last.is_guess, last.answer)
+            action = engine.next_action(engine_state, len(ledger.entries) + 1)
+        return engine_state, action
+
+    # Give a sub-agent its own branch so parallel runs do not see each other's events
+    def create_branch_context(self,ctx:InvocationContext,sub_agent:BaseAgent)->InvocationContext:
+        branch_ctx = ctx.model_copy()
+        branch_suffix = f"{self.name}.{sub_agent.name}"
+        branch_ctx.branch = f"{ctx.branch}.{branch_suffix}" if ctx.branch else branch_suffix
+        return branch_ctx
     
     async def _run_async_impl(
         self,ctx: InvocationContext
     )-> AsyncGenerator[Event, None]:
-        
-        invocation_id=ctx.invocation_id
 
-        logger.info(f"{self.name} started running")
+        logger.info(f"{self.name} started running in {self.mode} mode")
+
+        # Record the player's yes/no answer in the ledger before the sub-agents read it
+        ledger = GameLedger.from_state(ctx.session.state)
+        user_text = "".join(part.text or "" for part in ctx.user_content.parts or []) if ctx.user_content else ""
+        answered = ledger.record_answer(user_text)
+        state_delta = {LEDGER_STATE_KEY: ledger.to_state()} if answered else {}
+
+        local_action = None
+        if self.local_engine and not (ctx.session.state.get(ENGINE_STATE_KEY) or {}).get("handed_off"):
+            state_delta[ENGINE_STATE_KEY], local_action = self.next_local_action(ctx, ledger, answered)
 
-        async for event in self.guessing_agent.run_async(ctx):
+        if state_delta:
+            yield self.create_state_event(state_delta, ctx.invocation_id)
+
+        if local_action is not None:
+            logger.info(f"Local engine chose to {local_action['action']}")
+            yield self.create_action_event(parse_action(local_action), ctx, None)
+            return
+
+        if self.mode == "parallel":
+            run = self._run_parallel(ctx)
+        elif self.mode == "fused":
+            run = self._run_fused(ctx)
+        else:
+            run = self._run_sequential(ctx)
+
+        async for event in run:
             yield event
+
+    async def _run_sequential(
+        self,ctx: InvocationContext
+    )-> AsyncGenerator[Event, None]:
         
-        guess_output = ctx.session.state.get("guess_output", None)
-        confidence = guess_output.get("confidence") if guess_output else None
 
-        if guess_output is None or confidence is None:
-            logger.error("Invalid response from GuessingAgent")
+        guess_output = None
+        if routing_policy.should_run_guessing(GameLedger.from_state(ctx.session.state)):
+            async for event in self.run_traced(self.guessing_agent, ctx):
+                yield event
+            
+            guess_output = ctx.session.state.get("guess_output", None)
+            confidence = guess_output.get("confidence") if guess_output else None
+
+            if guess_output is None or confidence is None:
+                logger.error("Invalid response from GuessingAgent")
+                return
+            
+            if confidence >= GUESS_CONFIDENCE_THRESHOLD:
+                logger.info("High confidence guess, proceeding to make guess")
+                yield self.create_guess_event(guess_output, ctx)
+                return
+            
+            logger.info("Low confidence guess, asking a question instead")
+        else:
+            logger.info("Routing policy skipped the guessing agent, asking a question")
+
+        async for event in self.run_traced(self.asking_agent, ctx):
+            yield event
+
+        question_output = ctx.session.state.get("question_output", None)
+
+        if question_output is None:
+            logger.error("Invalid response from AskingAgent")
             return
         
-        if confidence >= 9:
+        yield self.create_question_event(question_output, ctx, guess_output)
+        return
+
+    async def _run_parallel(
+        self,ctx: InvocationContext
+    )-> AsyncGenerator[Event, None]:
+
+
+        if not routing_policy.should_run_guessing(GameLedger.from_state(ctx.session.state)):
+            logger.info("Routing policy skipped the guessing agent, asking a question")
+            async for event in self.run_traced(self.asking_agent, ctx):
+                yield event
+            guess_output = None
+        else:
+            # Run both sub-agents at once; they write to separate state keys
+            async for event in merge_agent_runs(
+                self.run_traced(self.guessing_agent, self.create_branch_context(ctx, self.guessing_agent)),
+                self.run_traced(self.asking_agent, self.create_branch_context(ctx, self.asking_agent))
+            ):
+                yield event
+            guess_output = ctx.session.state.get("guess_output", None)
+
+        confidence = guess_output.get("confidence") if guess_output else None
+        question_output = ctx.session.state.get("question_output", None)
+
+        if guess_output is not None and confidence is not None and confidence >= GUESS_CONFIDENCE_THRESHOLD:
             logger.info("High confidence guess, proceeding to make guess")
-            yield self.create_text_response_event(dumps({
-                "action": "make_guess",
-                "guess": guess_output.get("guess"),
-                "reasoning": guess_output.get("reasoning")
-            }), invocation_id=invocation_id)
+            yield self.create_guess_event(guess_output, ctx)
             return
-        
+
+        if question_output is None:
+            logger.error("Invalid response from AskingAgent")
+            return
+
         logger.info("Low confidence guess, asking a question instead")
+        yield self.create_question_event(question_output, ctx, guess_output)
+        return
+
+    async def _run_fused(
+        self,ctx: InvocationContext
+    )-> AsyncGenerator[Event, None]:
+
 
-        async for event in self.asking_agent.run_async(ctx):
+        async for event in self.run_traced(self.fused_agent, ctx):
             yield event
 
-        question_output = ctx.session.state.get("question_output", None)
+        turn_output = ctx.session.state.get("turn_output", None)
 
-        if guess_output is None:
-            logger.error("Invalid response from AskingAgent")
+        if turn_output is None:
+            logger.error("Invalid response from FusedAgent")
             return
-        
-        yield self.create_text_response_event(dumps({
-            "action": "ask_question",
-            "question": question_output.get("question"),
-            "reasoning": question_output.get("reasoning")
-        }), invocation_id=invocation_id)
+
+        confidence = turn_output.get("confidence") or 0
+        if (turn_output.get("decision") == "make_guess" or not turn_output.get("question")) and turn_output.get("guess"):
+            logger.info(f"Fused agent chose to guess with confidence {confidence}")
+            yield self.create_guess_event(turn_output, ctx)
+            return
+
+        if not turn_output.get("question"):
+            logger.error("FusedAgent returned neither a guess nor a question")
+            return
+
+        logger.info(f"Fused agent chose to ask with confidence {confidence}")
+        yield self.create_question_event(turn_output, ctx, turn_output)
         return
 
 root_agent = RootAgent(
     name="question_agent",
     guessing_agent=guessing_agent,
-    asking_agent=asking_agent
+    asking_agent=asking_agent,
+    fused_agent=fused_agent,
+    mode=os.getenv("QUESTION_AGENT_MODE", "sequential"),
+    local_engine=LOCAL_QUESTION_ENGINE
 )
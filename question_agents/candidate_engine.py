@@ -0,0 +1,122 @@
+# Local information-gain question engine.
+# Plays the opening of a game from the bundled catalogue without any LLM call:
+# candidates are a bit mask over the catalogue, filtered with vectorised NumPy
+# operations after each answer, and the next question is the attribute with
+# the highest information gain. RootAgent hands off to the LLM sub-agents once
+# the candidates are exhausted, the answers are inconsistent, or the engine
+# has used up its turn budget.
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import numpy as np
+from typing import Optional
+
+from .catalogue import ATTRIBUTE_NAMES, ATTRIBUTE_QUESTIONS, OBJECTS, attribute_for_question, normalize_name
+
+ENGINE_STATE_KEY = "engine_state"
+
+# LOCAL_QUESTION_ENGINE=0 disables the engine so every turn goes to the LLM
+LOCAL_QUESTION_ENGINE = os.getenv("LOCAL_QUESTION_ENGINE", "1") == "1"
+# The engine only plays this many turns, then always hands off
+MAX_ENGINE_TURNS = int(os.getenv("LOCAL_ENGINE_MAX_TURNS", "10"))
+# Wrong local guesses allowed before handing off (the word may not be in the catalogue)
+MAX_LOCAL_GUESSES = int(os.getenv("LOCAL_ENGINE_MAX_GUESSES", "1"))
+
+# Number of set bits in every byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class CandidateEngine:
+    # Immutable catalogue bit matrix shared by all games.
+    # Per-game state is passed in and out as a small JSON-serialisable dict,
+    # so it can live in ADK session state (and survive forks and restarts).
+
+    def __init__(self, objects: dict[str, set[str]] = OBJECTS, attributes: list[str] = ATTRIBUTE_NAMES):
+        self.names = sorted(objects)
+        self.attributes = list(attributes)
+        # matrix[a] is the bit-packed column of attribute a over all objects
+        dense = np.array([[attribute in objects[name] for name in self.names] for attribute in self.attributes], dtype=bool)
+        self.matrix = np.packbits(dense, axis=1)
+        self.all_mask = np.packbits(np.ones(len(self.names), dtype=bool))
+        self.name_index = {name: i for i, name in enumerate(self.names)}
+
+    def new_state(self) -> dict:
+        return {"mask": self.all_mask.tobytes().hex(), "asked": [], "guesses": 0, "handed_off": False}
+
+    def count(self, mask: np.ndarray) -> int:
+        return int(_POPCOUNT[mask].sum())
+
+    def candidates(self, mask: np.ndarray) -> list[str]:
+        bits = np.unpackbits(mask)[:len(self.names)]
+        return [self.names[i] for i in np.flatnonzero(bits)]
+
+    def apply_answer(self, state: dict, shown: str, is_guess: bool, answer: str) -> dict:
+        # Narrow the candidates with one answered question or guess
+        mask = np.frombuffer(bytes.fromhex(state["mask"]), dtype=np.uint8).copy()
+        if is_guess:
+            index = self.name_index.get(normalize_name(shown))
+            if index is not None and answer == "no":
+                mask[index // 8] &= np.uint8(~(0x80 >> (index % 8)) & 0xFF)
+        else:
+            attribute = attribute_for_question(shown)
+            if attribute in self.attributes:
+                column = self.matrix[self.attributes.index(attribute)]
+                mask &= column if answer == "yes" else ~column
+                state["asked"] = sorted(set(state["asked"]) | {attribute})
+        state["mask"] = mask.tobytes().hex()
+        return state
+
+    def best_split(self, mask: np.ndarray, asked: list[str]) -> tuple[Optional[str], float, int]:
+        # Attribute with the highest information gain over the remaining candidates
+        total = self.count(mask)
+        if total < 2:
+            return None, 0.0, 0
+        yes = _POPCOUNT[self.matrix & mask].sum(axis=1).astype(np.float64)
+        p = yes / total
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gain = -(np.nan_to_num(p * np.log2(p)) + np.nan_to_num((1 - p) * np.log2(1 - p)))
+        for attribute in asked:
+            if attribute in self.attributes:
+                gain[self.attributes.index(attribute)] = -1.0
+        best = int(np.argmax(gain))
+        if gain[best] <= 0:
+            return None, 0.0, 0
+        return self.attributes[best], float(gain[best]), int(yes[best])
+
+    def next_action(self, state: dict, turn_number: int) -> Optional[dict]:
+        # The next question or guess, or None to hand off to the LLM agents
+        if state["handed_off"] or turn_number > MAX_ENGINE_TURNS:
+            state["handed_off"] = True
+            return None
+
+        mask = np.frombuffer(bytes.fromhex(state["mask"]), dtype=np.uint8)
+        remaining = self.count(mask)
+        if remaining == 0:
+            # Exhausted or inconsistent answers: the word is not in the catalogue
+            logger.info("Local engine has no candidates left, handing off to the LLM")
+            state["handed_off"] = True
+            return None
+
+        attribute, gain, yes = self.best_split(mask, state["asked"])
+        if attribute is not None:
+            return {
+                "action": "ask_question",
+                "question": ATTRIBUTE_QUESTIONS[attribute],
+                "reasoning": f"{remaining} possibilities left; this splits them {yes}/{remaining - yes}."
+            }
+
+        if state["guesses"] >= MAX_LOCAL_GUESSES:
+            state["handed_off"] = True
+            return None
+        state["guesses"] += 1
+        guess = self.candidates(mask)[0]
+        return {
+            "action": "make_guess",
+            "guess": guess,
+            "reasoning": f"Only {remaining} possibilit{'y' if remaining == 1 else 'ies'} fit the answers so far."
+        }
+
+
+engine = CandidateEngine()
@@ -0,0 +1,162 @@
+# Bundled catalogue of common objects and the yes/no attributes they have.
+# Used wherever the game needs to reason about questions without an LLM:
+# the simulation oracle, the stub model backend and local question engines.
+
+import re
+from typing import Optional
+
+# (attribute, canonical question, keyword patterns that identify the attribute in free text)
+# Ordered from most to least specific: the first matching attribute wins.
+ATTRIBUTES = [
+    ("mammal", "Is it a mammal?", [r"\bmammals?\b"]),
+    ("bird", "Is it a bird?", [r"\bbirds?\b"]),
+    ("fruit", "Is it a fruit?", [r"\bfruits?\b"]),
+    ("vehicle", "Is it a vehicle?", [r"\bvehicles?\b", r"\btransport", r"\bdrive\b", r"\bride\b"]),
+    ("furniture", "Is it a piece of furniture?", [r"\bfurniture\b"]),
+    ("tool", "Is it a tool?", [r"\btools?\b"]),
+    ("wearable", "Can you wear it?", [r"\bwear\b", r"\bclothing\b", r"\bworn\b"]),
+    ("pet", "Is it commonly kept as a pet?", [r"\bpets?\b"]),
+    ("can_fly", "Can it fly?", [r"\bfly\b", r"\bflies\b", r"\bflying\b"]),
+    ("lives_in_water", "Does it live in water?", [r"\bwater\b", r"\bswim", r"\bocean\b", r"\bsea\b"]),
+    ("plant", "Is it a plant?", [r"\bplants?\b"]),
+    ("animal", "Is it an animal?", [r"\banimals?\b"]),
+    ("alive", "Is it alive?", [r"\balive\b", r"\bliving\b", r"\borganism\b"]),
+    ("sweet", "Is it sweet?", [r"\bsweet\b"]),
+    ("food", "Can you eat it?", [r"\beat\b", r"\bedible\b", r"\bfood\b"]),
+    ("electronic", "Does it use electricity?", [r"\belectric", r"\belectronic", r"\bbattery\b", r"\bbatteries\b", r"\bplug"]),
+    ("made_of_metal", "Is it made mostly of metal?", [r"\bmetal\b"]),
+    ("man_made", "Is it man-made?", [r"\bman-made\b", r"\bmanmade\b", r"\bmanufactured\b", r"\bartificial\b", r"\bmade by (humans|people)\b"]),
+    ("bigger_than_breadbox", "Is it bigger than a breadbox?", [r"\bbreadbox\b", r"\bbigger\b", r"\blarger\b"]),
+    ("held_in_hand", "Can you hold it in one hand?", [r"\bhold\b", r"\bhand\b"]),
+    ("found_indoors", "Is it usually found indoors?", [r"\bindoors?\b", r"\binside\b", r"\bhouse\b", r"\bhome\b"]),
+    ("has_legs", "Does it have legs?", [r"\blegs?\b"]),
+    ("round", "Is it round?", [r"\bround\b", r"\bspherical\b", r"\bcircular\b"]),
+    ("wild", "Does it live in the wild?", [r"\bwild\b"]),
+]
+
+ATTRIBUTE_NAMES = [name for name, _, _ in ATTRIBUTES]
+ATTRIBUTE_QUESTIONS = {name: question for name, question, _ in ATTRIBUTES}
+_ATTRIBUTE_PATTERNS = [(name, [re.compile(p) for p in patterns]) for name, _, patterns in ATTRIBUTES]
+
+# Object name -> attributes that are true for it (everything else is false)
+OBJECTS = {
+    # Animals
+    "cat": {"alive", "animal", "mammal", "pet", "has_legs", "found_indoors", "held_in_hand"},
+    "dog": {"alive", "animal", "mammal", "pet", "has_legs", "found_indoors", "bigger_than_breadbox"},
+    "hamster": {"alive", "animal", "mammal", "pet", "has_legs", "found_indoors", "held_in_hand"},
+    "rabbit": {"alive", "animal", "mammal", "pet", "has_legs", "wild", "held_in_hand"},
+    "horse": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox"},
+    "cow": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "food"},
+    "pig": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "food"},
+    "elephant": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "wild"},
+    "lion": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "wild"},
+    "giraffe": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "wild"},
+    "mouse": {"alive", "animal", "mammal", "has_legs", "wild", "held_in_hand", "found_indoors"},
+    "monkey": {"alive", "animal", "mammal", "has_legs", "wild", "bigger_than_breadbox"},
+    "bat": {"alive", "animal", "mammal", "has_legs", "wild", "can_fly", "held_in_hand"},
+    "whale": {"alive", "animal", "mammal", "wild", "lives_in_water", "bigger_than_breadbox"},
+    "dolphin": {"alive", "animal", "mammal", "wild", "lives_in_water", "bigger_than_breadbox"},
+    "parrot": {"alive", "animal", "bird", "pet", "has_legs", "can_fly", "held_in_hand", "found_indoors"},
+    "eagle": {"alive", "animal", "bird", "has_legs", "can_fly", "wild"},
+    "penguin": {"alive", "animal", "bird", "has_legs", "wild", "lives_in_water", "bigger_than_breadbox"},
+    "chicken": {"alive", "animal", "bird", "has_legs", "food"},
+    "owl": {"alive", "animal", "bird", "has_legs", "can_fly", "wild"},
+    "goldfish": {"alive", "animal", "pet", "lives_in_water", "held_in_hand", "found_indoors"},
+    "shark": {"alive", "animal", "wild", "lives_in_water", "bigger_than_breadbox"},
+    "frog": {"alive", "animal", "has_legs", "wild", "lives_in_water", "held_in_hand"},
+    "snake": {"alive", "animal", "wild", "bigger_than_breadbox"},
+    "spider": {"alive", "animal", "has_legs", "wild", "held_in_hand", "found_indoors"},
+    "bee": {"alive", "animal", "has_legs", "wild", "can_fly", "held_in_hand"},
+    "butterfly": {"alive", "animal", "has_legs", "wild", "can_fly", "held_in_hand"},
+    # Plants
+    "tree": {"alive", "plant", "wild", "bigger_than_breadbox"},
+    "rose": {"alive", "plant", "held_in_hand"},
+    "cactus": {"alive", "plant", "wild", "found_indoors"},
+    "sunflower": {"alive", "plant", "bigger_than_breadbox"},
+    # Food
+    "apple": {"food", "fruit", "sweet", "round", "held_in_hand"},
+    "banana": {"food", "fruit", "sweet", "held_in_hand"},
+    "orange": {"food", "fruit", "sweet", "round", "held_in_hand"},
+    "watermelon": {"food", "fruit", "sweet", "round", "bigger_than_breadbox"},
+    "strawberry": {"food", "fruit", "sweet", "held_in_hand"},
+    "carrot": {"food", "plant", "held_in_hand"},
+    "bread": {"food", "man_made", "held_in_hand", "found_indoors"},
+    "cheese": {"food", "man_made", "held_in_hand", "found_indoors"},
+    "pizza": {"food", "man_made", "round", "found_indoors"},
+    "chocolate": {"food", "man_made", "sweet", "held_in_hand", "found_indoors"},
+    "cake": {"food", "man_made", "sweet", "round", "found_indoors"},
+    "egg": {"food", "held_in_hand", "found_indoors"},
+    # Household objects
+    "chair": {"man_made", "furniture", "has_legs", "bigger_than_breadbox", "found_indoors"},
+    "table": {"man_made", "furniture", "has_legs", "bigger_than_breadbox", "found_indoors"},
+    "bed": {"man_made", "furniture", "has_legs", "bigger_than_breadbox", "found_indoors"},
+    "sofa": {"man_made", "furniture", "has_legs", "bigger_than_breadbox", "found_indoors"},
+    "lamp": {"man_made", "electronic", "found_indoors"},
+    "refrigerator": {"man_made", "electronic", "made_of_metal", "bigger_than_breadbox", "found_indoors"},
+    "television": {"man_made", "electronic", "bigger_than_breadbox", "found_indoors"},
+    "toaster": {"man_made", "electronic", "made_of_metal", "found_indoors"},
+    "clock": {"man_made", "round", "found_indoors"},
+    "book": {"man_made", "held_in_hand", "found_indoors"},
+    "cup": {"man_made", "held_in_hand", "found_indoors", "round"},
+    "spoon": {"man_made", "made_of_metal", "held_in_hand", "found_indoors"},
+    "knife": {"man_made", "made_of_metal", "held_in_hand", "found_indoors", "tool"},
+    "pencil": {"man_made", "held_in_hand", "found_indoors", "tool"},
+    "toothbrush": {"man_made", "held_in_hand", "found_indoors", "tool"},
+    "pillow": {"man_made", "found_indoors"},
+    "mirror": {"man_made", "found_indoors"},
+    "candle": {"man_made", "held_in_hand", "found_indoors"},
+    "key": {"man_made", "made_of_metal", "held_in_hand", "tool"},
+    "hammer": {"man_made", "made_of_metal", "held_in_hand", "tool"},
+    "scissors": {"man_made", "made_of_metal", "held_in_hand", "found_indoors", "tool"},
+    "umbrella": {"man_made", "held_in_hand"},
+    # Technology
+    "computer": {"man_made", "electronic", "found_indoors"},
+    "smartphone": {"man_made", "electronic", "held_in_hand"},
+    "camera": {"man_made", "electronic", "held_in_hand"},
+    "headphones": {"man_made", "electronic", "held_in_hand", "wearable"},
+    "robot": {"man_made", "electronic", "made_of_metal", "bigger_than_breadbox"},
+    # Clothing
+    "hat": {"man_made", "wearable", "held_in_hand"},
+    "shoe": {"man_made", "wearable", "held_in_hand"},
+    "glove": {"man_made", "wearable", "held_in_hand"},
+    "watch": {"man_made", "wearable", "held_in_hand", "round", "electronic"},
+    "ring": {"man_made", "wearable", "held_in_hand", "round", "made_of_metal"},
+    # Vehicles
+    "car": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox", "electronic"},
+    "bicycle": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox"},
+    "airplane": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox", "can_fly", "electronic"},
+    "boat": {"man_made", "vehicle", "bigger_than_breadbox", "lives_in_water"},
+    "train": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox", "electronic"},
+    "helicopter": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox", "can_fly", "electronic"},
+    # Toys, sport and music
+    "ball": {"man_made", "round", "held_in_hand"},
+    "kite": {"man_made", "can_fly"},
+    "guitar": {"man_made", "bigger_than_breadbox", "found_indoors"},
+    "piano": {"man_made", "furniture", "has_legs", "bigger_than_breadbox", "found_indoors"},
+    "balloon": {"man_made", "round", "can_fly", "held_in_hand"},
+    # Nature
+    "sun": {"round", "bigger_than_breadbox"},
+    "moon": {"round", "bigger_than_breadbox"},
+    "rock": {"held_in_hand"},
+    "mountain": {"bigger_than_breadbox"},
+    "cloud": {"can_fly", "bigger_than_breadbox"},
+}
+
+
+def attribute_for_question(question: str) -> Optional[str]:
+    # Map a free-text yes/no question onto a catalogue attribute, if possible
+    text = question.lower()
+    for name, patterns in _ATTRIBUTE_PATTERNS:
+        if any(pattern.search(text) for pattern in patterns):
+            return name
+    return None
+
+
+def normalize_name(name: str) -> str:
+    # Canonical object name for comparing guesses with catalogue entries
+    text = name.strip().lower().strip(" .,!?")
+    for article in ("a ", "an ", "the "):
+        if text.startswith(article):
+            text = text[len(article):]
+            break
+    return text
@@ -0,0 +1,99 @@
+# Compact per-game record of what has been asked and answered.
+# Sub-agents are prompted from this ledger instead of the full event history,
+# so the prompt grows by one short line per question rather than by a
+# transcript of raw events and JSON.
+
+import os
+from typing import Optional
+
+from game_rules import MAKE_GUESS
+
+LEDGER_STATE_KEY = "ledger"
+
+# LEDGER_PROMPTS=0 restores prompting from the full session history
+LEDGER_PROMPTS = os.getenv("LEDGER_PROMPTS", "1") == "1"
+
+
+class LedgerEntry:
+    # One turn: the question (or guess) shown, the player's answer,
+    # and the guessing agent's best guess and confidence at that point
+    __slots__ = ("question", "answer", "guess", "confidence", "is_guess")
+
+    def __init__(self, question: str, answer: Optional[str] = None, guess: Optional[str] = None,
+                 confidence: Optional[int] = None, is_guess: bool = False):
+        self.question = question
+        self.answer = answer
+        self.guess = guess
+        self.confidence = confidence
+        self.is_guess = is_guess
+
+    def to_state(self) -> list:
+        # Session state must be JSON serialisable, so entries are stored as small lists
+        return [self.question, self.answer, self.guess, self.confidence, self.is_guess]
+
+    @classmethod
+    def from_state(cls, value: list) -> "LedgerEntry":
+        return cls(*value)
+
+    def render(self, number: int) -> str:
+        kind = "Guess" if self.is_guess else "Q"
+        line = f"{number}. {kind}: {self.question} -> {self.answer or '?'}"
+        if self.guess and not self.is_guess:
+            line += f" [best guess: {self.guess}, {self.confidence}/10]"
+        return line
+
+
+class GameLedger:
+    __slots__ = ("entries",)
+
+    def __init__(self, entries: Optional[list[LedgerEntry]] = None):
+        self.entries = entries or []
+
+    @classmethod
+    def from_state(cls, state) -> "GameLedger":
+        return cls([LedgerEntry.from_state(value) for value in state.get(LEDGER_STATE_KEY) or []])
+
+    def to_state(self) -> list:
+        return [entry.to_state() for entry in self.entries]
+
+    def record_answer(self, answer: str) -> bool:
+        # Attach a yes/no answer to the last unanswered entry
+        answer = answer.strip().lower()
+        if answer not in ("yes", "no") or not self.entries or self.entries[-1].answer is not None:
+            return False
+        self.entries[-1].answer = answer
+        return True
+
+    def record_action(self, action, guess_output: Optional[dict] = None):
+        # Add the question or guess (a GuessAction or QuestionAction) RootAgent is about to show the player
+        guess_output = guess_output or {}
+        if action.action == MAKE_GUESS:
+            self.entries.append(LedgerEntry(
+                question=action.guess or "",
+                guess=action.guess,
+                confidence=guess_output.get("confidence"),
+                is_guess=True
+            ))
+        else:
+            self.entries.append(LedgerEntry(
+                question=action.question or "",
+                guess=guess_output.get("guess"),
+                confidence=guess_output.get("confidence")
+            ))
+
+    def render(self) -> str:
+        if not self.entries:
+            return "No questions have been asked yet. This is the first turn."
+        return "\n".join(entry.render(number) for number, entry in enumerate(self.entries, start=1))
+
+
+def ledger_instruction(base_instruction: str):
+    # Agent instruction that appends the game ledger from session state
+    if not LEDGER_PROMPTS:
+        return base_instruction
+
+    def provider(ctx) -> str:
+        ledger = GameLedger.from_state(ctx.state)
+        return f"{base_instruction}\n\nQuestions and answers so far:\n{ledger.render()}"
+
+    return provider
@@ -0,0 +1,212 @@
+# Per-turn routing policy for RootAgent's sub-agents.
+# The guessing agent only pays off once a confident guess is plausible, so
+# early or hopeless turns go straight to the asking agent. The thresholds can
+# be tuned from the outcomes of logged games (ADAPTIVE_ROUTING=0 simulate.py --results) with:
+#
+#     python -m question_agents.routing results.jsonl > routing_policy.json
+#
+# and loaded with ROUTING_POLICY_FILE=routing_policy.json.
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import sys
+import json
+import itertools
+import contextlib
+import numpy as np
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field, fields
+from typing import Optional
+
+from game_rules import AI_WINS
+from .ledger import GameLedger, LedgerEntry
+
+GUESS_CONFIDENCE_THRESHOLD = 9
+
+# Candidate values for each threshold, from cautious (runs the guessing agent more) to aggressive
+TUNING_GRID = {
+    "min_guess_turn": range(1, 11),
+    "min_yes_answers": range(0, 4),
+    "min_previous_confidence": range(1, 10),
+    "recheck_every": range(1, 7),
+    "always_guess_from": range(5, 22, 2),
+}
+
+# Decisions of the turns being collected by collect_decisions(), if any
+_collected: ContextVar[Optional[list[bool]]] = ContextVar("routing_decisions", default=None)
+
+
+@dataclass
+class RoutingPolicy:
+    enabled: bool = True
+    # Never run the guessing agent before this question number
+    min_guess_turn: int = 3
+    # ...or before the player has answered "yes" this many times
+    min_yes_answers: int = 1
+    # Skip if the last known confidence was below this
+    min_previous_confidence: int = 5
+    # ...but re-check at least every this many turns, as confidence can jump
+    recheck_every: int = 3
+    # Always run the guessing agent from this question number onwards
+    always_guess_from: int = 15
+    # Counters, not configuration
+    guessing_runs: int = field(default=0, compare=False)
+    guessing_skips: int = field(default=0, compare=False)
+
+    @classmethod
+    def from_env(cls) -> "RoutingPolicy":
+        # ROUTING_POLICY_FILE holds thresholds produced by tune(); ADAPTIVE_ROUTING=0 disables skipping
+        policy = cls()
+        path = os.getenv("ROUTING_POLICY_FILE")
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    policy = cls.from_dict(json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Could not load routing policy {path}: {e}")
+        policy.enabled = os.getenv("ADAPTIVE_ROUTING", "1" if policy.enabled else "0") == "1"
+        return policy
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "RoutingPolicy":
+        names = {f.name for f in fields(cls) if f.compare}
+        return cls(**{name: value for name, value in values.items() if name in names})
+
+    def to_dict(self) -> dict:
+        return {name: value for name, value in asdict(self).items() if name not in ("guessing_runs", "guessing_skips")}
+
+    def should_run_guessing(self, ledger: GameLedger) -> bool:
+        run = self.decide(ledger)
+        collected = _collected.get()
+        if collected is None:
+            self.record([run])
+        else:
+            collected.append(run)
+        return run
+
+    def record(self, decisions: list[bool]):
+        # Count the decisions of a turn that was shown to the player
+        for run in decisions:
+            if run:
+                self.guessing_runs += 1
+            else:
+                self.guessing_skips += 1
+
+    def decide(self, ledger: GameLedger) -> bool:
+        if not self.enabled:
+            return True
+        turn = len(ledger.entries) + 1
+        if turn >= self.always_guess_from:
+            return True
+        if turn < self.min_guess_turn:
+            return False
+        if sum(1 for entry in ledger.entries if entry.answer == "yes") < self.min_yes_answers:
+            return False
+
+        # Most recent turn where the guessing agent ran
+        for number in range(len(ledger.entries), 0, -1):
+            confidence = ledger.entries[number - 1].confidence
+            if confidence is not None:
+                return confidence >= self.min_previous_confidence or turn - number >= self.recheck_every
+        return True
+
+    def counters(self) -> dict:
+        total = self.guessing_runs + self.guessing_skips
+        return {
+            "guessing_runs": self.guessing_runs,
+            "guessing_skips": self.guessing_skips,
+            "skip_rate": self.guessing_skips / total if total else None,
+        }
+
+
+@contextlib.contextmanager
+def collect_decisions():
+    # Collect the routing decisions made inside instead of counting them, for
+    # turns that may be thrown away (speculative branches, losing hedges).
+    # The caller records them with routing_policy.record() once the turn is used.
+    decisions: list[bool] = []
+    token = _collected.set(decisions)
+    try:
+        yield decisions
+    finally:
+        _collected.reset(token)
+
+
+def replay(policies: np.ndarray, state: list, won: bool) -> tuple[np.ndarray, np.ndarray, bool]:
+    # Replay one logged game under every candidate policy at once.
+    # policies has one row per policy, in TUNING_GRID order. Returns the number of
+    # guessing runs each policy would have skipped, whether it would have skipped
+    # the winning guess, and whether the game has a winning guess to protect.
+    # Only turns where the guessing agent ran in the log (it has a confidence)
+    # can be routed; local engine turns never reach the policy. Skipped turns
+    # leave no confidence for later decisions, as they would in a real game.
+    min_guess_turn, min_yes_answers, min_previous_confidence, recheck_every, always_guess_from = policies.T
+    skips = np.zeros(len(policies), dtype=np.int64)
+    lost_win = np.zeros(len(policies), dtype=bool)
+    last_confidence = np.zeros(len(policies), dtype=np.int64)
+    last_turn = np.zeros(len(policies), dtype=np.int64)
+
+    entries = [LedgerEntry.from_state(value) for value in state]
+    winning = len(entries) if won and entries and entries[-1].is_guess and entries[-1].confidence is not None else None
+    yes_answers = 0
+    for turn, entry in enumerate(entries, start=1):
+        if entry.confidence is not None:
+            run = (turn >= always_guess_from) | (
+                (turn >= min_guess_turn) & (yes_answers >= min_yes_answers) &
+                ((last_turn == 0) | (last_confidence >= min_previous_confidence) | (turn - last_turn >= recheck_every))
+            )
+            skips += ~run
+            if turn == winning:
+                lost_win = ~run
+            last_confidence = np.where(run, entry.confidence, last_confidence)
+            last_turn = np.where(run, turn, last_turn)
+        if entry.answer == "yes":
+            yes_answers += 1
+    return skips, lost_win, winning is not None
+
+
+def tune(results: list[dict], max_lost_wins: float = 0.0) -> RoutingPolicy:
+    # Pick the thresholds that skip the most guessing runs over the logged games
+    # while still running the guessing agent on the turn that won each won game
+    # (allowing max_lost_wins of those wins to be lost). Games should be logged
+    # with ADAPTIVE_ROUTING=0, so every LLM turn has the guessing agent's confidence.
+    policies = np.array(list(itertools.product(*TUNING_GRID.values())), dtype=np.int64)
+    skips = np.zeros(len(policies), dtype=np.int64)
+    lost_wins = np.zeros(len(policies), dtype=np.int64)
+    wins = 0
+    for result in results:
+        game_skips, lost_win, has_win = replay(policies, result.get("ledger") or [], result.get("outcome") == AI_WINS)
+        skips += game_skips
+        lost_wins += lost_win
+        wins += has_win
+
+    if not wins:
+        logger.warning("No games in the logs were won by the guessing agent, keeping the default policy")
+        return RoutingPolicy()
+
+    # The grid runs from cautious to aggressive, so argmax keeps the most cautious of equal policies
+    allowed = lost_wins <= max_lost_wins * wins
+    best = int(np.argmax(np.where(allowed, skips, -1)))
+    logger.info(f"Tuned over {len(results)} games ({wins} won by a guess): "
+                f"{skips[best]} guessing runs skipped, {lost_wins[best]} wins lost")
+    return RoutingPolicy(**dict(zip(TUNING_GRID, (int(value) for value in policies[best]))))
+
+
+def main():
+    # Tune thresholds from simulate.py --results files and print them as JSON
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m question_agents.routing results.jsonl [...]")
+    results = []
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            results.extend(json.loads(line) for line in f if line.strip())
+    print(json.dumps(tune(results).to_dict(), indent=2))
+
+
+routing_policy = RoutingPolicy.from_env()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import logging
+logger = logging.getLogger(__name__)
+
+import asyncio
+import copy
+from collections import deque
+from typing import Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session
+
+from session_lifecycle import SessionBudget, SessionManager, session_manager
+from session_store import get_session_service
+
+
+class RunnerPool:
+    # Builds the Runner for one agent exactly once and keeps a few
+    # pre-created sessions warm so starting a game does not pay setup cost.
+    # Every session it creates is tracked by `sessions` until it is released.
+
+    def __init__(self, agent: BaseAgent, app_name: str, warm_sessions: int = 0,
+                 session_service: Optional[BaseSessionService] = None,
+                 sessions: Optional[SessionManager] = None):
+        self.app_name = app_name
+        self.warm_sessions = warm_sessions
+        self.session_service = session_service or InMemorySessionService()
+        self.sessions = sessions or SessionManager(SessionBudget())
+        self.runner = Runner(
+            agent=agent,
+            session_service=self.session_service,
+            app_name=app_name
+        )
+        # Warm sessions are per user, since ADK sessions are user scoped
+        self._warm: dict[str, deque[Session]] = {}
+        self._refill_tasks: dict[str, asyncio.Task] = {}
+
+    async def create_session(self, user_id: str, state: Optional[dict] = None) -> Session:
+        # Create a fresh session directly, bypassing the warm set
+        session = await self.session_service.create_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            state=state
+        )
+        self.sessions.track(self, user_id, session)
+        await self.sessions.enforce()
+        return session
+
+    async def acquire_session(self, user_id: str, refill: bool = True) -> Session:
+        # Take a warm session if one is ready, otherwise create one now
+        # refill=False skips topping the warm set up, for one-off users
+        # Warm sessions evicted under memory pressure are skipped
+        warm = self._warm.get(user_id)
+        while warm and not self.sessions.is_live(self, user_id, warm[0]):
+            warm.popleft()
+        if warm:
+            session = warm.popleft()
+            logger.debug(f"{self.app_name}: using warm session {session.id}")
+        else:
+            session = await self.create_session(user_id)
+        if refill:
+            self.schedule_refill(user_id)
+        return session
+
+    async def fork_session(self, user_id: str, session: Session, before: Optional[float] = None) -> Session:
+        # Create an independent copy of a session (state and event history)
+        # so a speculative turn can run without touching the original.
+        # With `before`, only events older than that timestamp are copied and
+        # the state is rebuilt from their deltas (sessions start out empty).
+        current = await self.session_service.get_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session.id
+        )
+        if current is None:
+            raise ValueError(f"Session not found: {session.id}")
+        self.sessions.touch(self, user_id, current)
+        events = current.events
+        if before is None:
+            fork = await self.create_session(user_id, state=copy.deepcopy(current.state))
+        else:
+            fork = await self.create_session(user_id)
+            events = [event for event in events if event.timestamp < before]
+        for event in events:
+            await self.session_service.append_event(fork, event.model_copy(deep=True))
+        self.sessions.update(self, user_id, fork)
+        await self.sessions.enforce()
+        return fork
+
+    async def release_session(self, user_id: str, session: Optional[Session]):
+        # Delete a session that is no longer needed
+        if session is None:
+            return
+        await self.delete_session(user_id, session.id)
+
+    async def delete_session(self, user_id: str, session_id: str):
+        await self.session_service.delete_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
+        self.sessions.forget(self, user_id, session_id)
+
+    async def fill(self, user_id: str):
+        # Top the warm set up to the configured size
+        warm = self._warm.setdefault(user_id, deque())
+        while len(warm) < self.warm_sessions:
+            warm.append(await self.create_session(user_id))
+
+    def schedule_refill(self, user_id: str):
+        # Refill the warm set in the background, off the critical path
+        if self.warm_sessions <= 0:
+            return
+        task = self._refill_tasks.get(user_id)
+        if task and not task.done():
+            return
+        self._refill_tasks[user_id] = asyncio.get_running_loop().create_task(self.fill(user_id))
+
+    async def drain(self, user_id: str):
+        # Drop all warm sessions for a user
+        task = self._refill_tasks.pop(user_id, None)
+        if task:
+            task.cancel()
+        for session in self._warm.pop(user_id, deque()):
+            await self.release_session(user_id, session)
+
+
+_pools: dict[str, RunnerPool] = {}
+
+
+def get_pool(app_name: str, agent: BaseAgent, warm_sessions: int = 0) -> RunnerPool:
+    # Return the process-wide pool for an app, building it on first use
+    # All pools share the durable session store when SESSION_STORE_PATH is set,
+    # and one session budget
+    pool = _pools.get(app_name)
+    if pool is None:
+        pool = RunnerPool(agent, app_name, warm_sessions=warm_sessions, session_service=get_session_service(),
+                          sessions=session_manager)
+        _pools[app_name] = pool
+        logger.info(f"{app_name} runner created")
+    return pool
@@ -0,0 +1,184 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# Lifecycle and memory accounting for agent sessions.
+# Every session a RunnerPool creates is tracked here until it is released:
+# game sessions, warm spares, speculative branches and hedges alike. Each
+# entry records how many events the session holds and roughly how many bytes
+# they take (their serialised size), so the process footprint is known.
+# Callers record events as the runner yields them; fetching the session to
+# measure it would deep-copy its whole history on every turn.
+# - Games release their sessions on game over and start over.
+# - Above the budget (MAX_LIVE_SESSIONS sessions or SESSION_MEMORY_BUDGET_MB),
+#   the least recently used sessions that are not in use are evicted. Their
+#   owners find them gone with is_live() and end the game.
+
+import os
+import json
+import contextlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from google.adk.sessions import Session
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from runner_pool import RunnerPool
+
+SessionKey = tuple[str, str, str]
+
+
+@dataclass
+class SessionBudget:
+    # 0 means unlimited
+    max_sessions: int = 0
+    max_bytes: int = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionBudget":
+        return cls(
+            max_sessions=int(os.getenv("MAX_LIVE_SESSIONS", "0")),
+            max_bytes=int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", "256")) * 1024 * 1024)
+        )
+
+
+@dataclass
+class TrackedSession:
+    pool: "RunnerPool"
+    user_id: str
+    session_id: str
+    events: int = 0
+    bytes: int = 0
+    # Turns currently running on the session; in-use sessions are never evicted
+    in_use: int = 0
+
+
+def session_key(pool: "RunnerPool", user_id: str, session_id: str) -> SessionKey:
+    return pool.app_name, user_id, session_id
+
+
+def serialised_size(item: BaseModel) -> int:
+    return len(item.model_dump_json(exclude_none=True))
+
+
+class SessionManager:
+
+    def __init__(self, budget: SessionBudget):
+        self.budget = budget
+        # Least recently used first
+        self._live: OrderedDict[SessionKey, TrackedSession] = OrderedDict()
+        self.total_events = 0
+        self.total_bytes = 0
+        self.tracked = 0
+        self.released = 0
+        self.evicted = 0
+        self.peak_sessions = 0
+        self.peak_bytes = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionManager":
+        return cls(SessionBudget.from_env())
+
+    def track(self, pool: "RunnerPool", user_id: str, session: Session):
+        # Start tracking a session that was just created (or loaded from the store)
+        key = session_key(pool, user_id, session.id)
+        if key not in self._live:
+            entry = self._live[key] = TrackedSession(pool=pool, user_id=user_id, session_id=session.id)
+            self.tracked += 1
+            self.add(entry, 0, len(json.dumps(session.state, default=str)))
+        self.update(pool, user_id, session)
+
+    def forget(self, pool: "RunnerPool", user_id: str, session_id: str):
+        # Stop tracking a session that has been deleted
+        entry = self._live.pop(session_key(pool, user_id, session_id), None)
+        if entry is not None:
+            self.total_events -= entry.events
+            self.total_bytes -= entry.bytes
+            self.released += 1
+
+    def is_live(self, pool: "RunnerPool", user_id: str, session: Optional[Session]) -> bool:
+        return session is not None and session_key(pool, user_id, session.id) in self._live
+
+    def touch(self, pool: "RunnerPool", user_id: str, session: Session):
+        key = session_key(pool, user_id, session.id)
+        if key in self._live:
+            self._live.move_to_end(key)
+
+    @contextlib.contextmanager
+    def in_use(self, pool: "RunnerPool", user_id: str, session: Session):
+        # Keep the session from being evicted while a turn runs on it
+        key = session_key(pool, user_id, session.id)
+        entry = self._live.get(key)
+        if entry is not None:
+            entry.in_use += 1
+            self._live.move_to_end(key)
+        try:
+            yield
+        finally:
+            if entry is not None:
+                entry.in_use -= 1
+
+    def update(self, pool: "RunnerPool", user_id: str, session: Session):
+        # Account for the events of an up-to-date copy of a tracked session.
+        # Events are only ever appended, so only the ones not counted yet are measured.
+        entry = self._live.get(session_key(pool, user_id, session.id))
+        if entry is None:
+            return
+        new_events = session.events[entry.events:]
+        self.add(entry, len(new_events), sum(serialised_size(event) for event in new_events))
+
+    def record(self, pool: "RunnerPool", user_id: str, session: Session, *events: BaseModel):
+        # Account for events (or the user message content) appended to a tracked session
+        entry = self._live.get(session_key(pool, user_id, session.id))
+        if entry is not None:
+            self.add(entry, len(events), sum(serialised_size(event) for event in events))
+
+    def add(self, entry: TrackedSession, events: int, size: int):
+        entry.events += events
+        entry.bytes += size
+        self.total_events += events
+        self.total_bytes += size
+        self.peak_sessions = max(self.peak_sessions, len(self._live))
+        self.peak_bytes = max(self.peak_bytes, self.total_bytes)
+
+    def over_budget(self) -> bool:
+        return ((self.budget.max_sessions > 0 and len(self._live) > self.budget.max_sessions) or
+                (self.budget.max_bytes > 0 and self.total_bytes > self.budget.max_bytes))
+
+    async def enforce(self):
+        # Evict least recently used sessions that are not in use until within budget
+        while self.over_budget():
+            victim = next((entry for entry in self._live.values() if not entry.in_use), None)
+            if victim is None:
+                logger.warning(f"Session budget exceeded with every session in use ({self.footprint()})")
+                return
+            logger.info(f"Evicting {victim.pool.app_name} session {victim.session_id} "
+                        f"({victim.events} events, {victim.bytes} bytes)")
+            self.evicted += 1
+            await victim.pool.delete_session(victim.user_id, victim.session_id)
+
+    def footprint(self) -> dict:
+        apps: dict[str, dict] = {}
+        for (app_name, _, _), entry in self._live.items():
+            app = apps.setdefault(app_name, {"sessions": 0, "events": 0, "bytes": 0})
+            app["sessions"] += 1
+            app["events"] += entry.events
+            app["bytes"] += entry.bytes
+        return {"sessions": len(self._live), "events": self.total_events, "bytes": self.total_bytes,
+                "in_use": sum(1 for entry in self._live.values() if entry.in_use), "apps": apps}
+
+    def stats(self) -> dict:
+        return {
+            **self.footprint(),
+            "max_sessions": self.budget.max_sessions or None,
+            "max_bytes": self.budget.max_bytes or None,
+            "peak_sessions": self.peak_sessions,
+            "peak_bytes": self.peak_bytes,
+            "tracked": self.tracked,
+            "released": self.released,
+            "evicted": self.evicted,
+        }
+
+
+session_manager = SessionManager.from_env()
@@ -0,0 +1,316 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# Durable ADK session service backed by an append-only SQLite event log (WAL mode).
+# - Events are appended by a background writer thread in batches, so agent
+#   turns never wait on disk.
+# - Every few events the session state is snapshotted, so loading a session
+#   only replays the state deltas written since the last snapshot.
+# - Sessions are loaded lazily and only the most recently used ones are kept
+#   in memory, so the footprint stays bounded however many games are stored.
+# Set SESSION_STORE_PATH to use it instead of InMemorySessionService. Unlike
+# InMemorySessionService, "app:" and "user:" state keys are kept per session.
+
+import os
+import copy
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import asyncio
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    snapshot_rowid INTEGER NOT NULL DEFAULT 0,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id);
+"""
+
+SessionKey = tuple[str, str, str]
+
+
+class DurableSessionService(BaseSessionService):
+
+    def __init__(self, path: str, max_cached_sessions: int = 256, snapshot_every: int = 20,
+                 flush_interval_seconds: float = 0.05, retention_seconds: Optional[float] = None):
+        self.path = path
+        self.max_cached_sessions = max_cached_sessions
+        self.snapshot_every = snapshot_every
+        self.flush_interval_seconds = flush_interval_seconds
+
+        # Most recently used sessions, authoritative while cached
+        self._cache: OrderedDict[SessionKey, Session] = OrderedDict()
+        # Events appended per cached session since its last snapshot
+        self._unsnapshotted: dict[SessionKey, int] = {}
+        # Recently deleted sessions, whose late appends (from a released hedge
+        # or speculative fork still finishing its run) are dropped
+        self._deleted: OrderedDict[SessionKey, None] = OrderedDict()
+        self.loads = 0
+        self.writes = 0
+        self.batches = 0
+
+        with contextlib.closing(self.connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            if retention_seconds:
+                self.purge(db, time.time() - retention_seconds)
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="session-store", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_env(cls) -> Optional["DurableSessionService"]:
+        # SESSION_STORE_PATH enables the store; SESSION_STORE_CACHE_SIZE and
+        # SESSION_STORE_RETENTION_HOURS (default 24) are optional
+        path = os.getenv("SESSION_STORE_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            max_cached_sessions=int(os.getenv("SESSION_STORE_CACHE_SIZE", "256")),
+            retention_seconds=float(os.getenv("SESSION_STORE_RETENTION_HOURS", "24")) * 3600
+        )
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def purge(self, db: sqlite3.Connection, before: float):
+        # Drop sessions (and their events) not updated since `before`
+        stale = db.execute("SELECT app_name, user_id, session_id FROM sessions WHERE last_update_time < ?", (before,)).fetchall()
+        for key in stale:
+            db.execute("DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=?", key)
+            db.execute("DELETE FROM sessions WHERE app_name=? AND user_id=? AND session_id=?", key)
+        if stale:
+            logger.info(f"Purged {len(stale)} stale session(s) from {self.path}")
+
+    # Background writer
+
+    def _write_loop(self):
+        db = self.connect()
+        while True:
+            op = self._queue.get()
+            batch = [op]
+            # Collect everything queued within the flush interval into one transaction
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while op is not None:
+                try:
+                    op = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(op)
+
+            try:
+                with db:
+                    for item in batch:
+                        if item is not None:
+                            self._apply(db, item)
+                self.writes += sum(1 for item in batch if item is not None)
+                self.batches += 1
+            except sqlite3.Error as e:
+                logger.error(f"Error writing session store {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if batch[-1] is None:
+                db.close()
+                return
+
+    def _apply(self, db: sqlite3.Connection, item: tuple):
+        kind, key, *args = item
+        if kind == "create":
+            state, updated = args
+            db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, 0, ?)", (*key, state, updated))
+        elif kind == "event":
+            event, updated = args
+            db.execute("INSERT INTO events VALUES (?, ?, ?, ?)", (*key, event))
+            db.execute("UPDATE sessions SET last_update_time=? WHERE app_name=? AND user_id=? AND session_id=?", (updated, *key))
+        elif kind == "snapshot":
+            (state,) = args
+            db.execute(
+                "UPDATE sessions SET state=?, snapshot_rowid=(SELECT IFNULL(MAX(rowid), 0) FROM events "
+                "WHERE app_name=? AND user_id=? AND session_id=?) WHERE app_name=? AND user_id=? AND session_id=?",
+                (state, *key, *key)
+            )
+        elif kind == "delete":
+            db.execute("DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=?", key)
+            db.execute("DELETE FROM sessions WHERE app_name=? AND user_id=? AND session_id=?", key)
+
+    def flush(self):
+        # Block until every queued write is on disk
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+
+    # Cache and lazy loading
+
+    def _remember(self, key: SessionKey, session: Session):
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached_sessions:
+            evicted, _ = self._cache.popitem(last=False)
+            self._unsnapshotted.pop(evicted, None)
+
+    def _load(self, key: SessionKey) -> Optional[Session]:
+        # Rebuild a session from its snapshot plus the events logged after it
+        self.flush()
+        with contextlib.closing(self.connect()) as db:
+            row = db.execute(
+                "SELECT state, snapshot_rowid, last_update_time FROM sessions WHERE app_name=? AND user_id=? AND session_id=?", key
+            ).fetchone()
+            if row is None:
+                return None
+            rows = db.execute(
+                "SELECT rowid, event FROM events WHERE app_name=? AND user_id=? AND session_id=? ORDER BY rowid", key
+            ).fetchall()
+
+        state, snapshot_rowid, last_update_time = json.loads(row[0]), row[1], row[2]
+        events = []
+        for rowid, raw in rows:
+            event = Event.model_validate_json(raw)
+            events.append(event)
+            if rowid > snapshot_rowid and event.actions and event.actions.state_delta:
+                state.update({k: v for k, v in event.actions.state_delta.items() if not k.startswith(State.TEMP_PREFIX)})
+        self.loads += 1
+        return Session(app_name=key[0], user_id=key[1], id=key[2], state=state,
+                       events=events, last_update_time=last_update_time)
+
+    async def _cached(self, key: SessionKey) -> Optional[Session]:
+        session = self._cache.get(key)
+        if session is None:
+            session = await asyncio.to_thread(self._load, key)
+            if key in self._cache:
+                # Appended to (and re-cached) while loading, so the cached copy is newer
+                session = self._cache[key]
+            elif session is not None:
+                self._remember(key, session)
+        else:
+            self._cache.move_to_end(key)
+        return session
+
+    # BaseSessionService
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        session = Session(app_name=app_name, user_id=user_id, id=session_id,
+                          state=state or {}, last_update_time=time.time())
+        key = (app_name, user_id, session_id)
+        self._deleted.pop(key, None)
+        self._remember(key, session)
+        self._queue.put(("create", key, json.dumps(session.state), session.last_update_time))
+        return copy.deepcopy(session)
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        session = await self._cached((app_name, user_id, session_id))
+        if session is None:
+            return None
+        copied = copy.deepcopy(session)
+        if config:
+            if config.num_recent_events:
+                copied.events = copied.events[-config.num_recent_events:]
+            if config.after_timestamp:
+                copied.events = [e for e in copied.events if e.timestamp >= config.after_timestamp]
+        return copied
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        sessions = []
+        for key in await asyncio.to_thread(self.session_keys, app_name, user_id):
+            session = await self._cached(key)
+            if session is not None:
+                sessions.append(session.model_copy(update={"events": [], "state": copy.deepcopy(session.state)}))
+        return ListSessionsResponse(sessions=sessions)
+
+    def session_keys(self, app_name: str, user_id: Optional[str] = None) -> list[SessionKey]:
+        # Stored session keys for an app, optionally for one user only
+        self.flush()
+        with contextlib.closing(self.connect()) as db:
+            if user_id is None:
+                rows = db.execute("SELECT app_name, user_id, session_id FROM sessions WHERE app_name=?", (app_name,))
+            else:
+                rows = db.execute("SELECT app_name, user_id, session_id FROM sessions WHERE app_name=? AND user_id=?", (app_name, user_id))
+            return [tuple(row) for row in rows.fetchall()]
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._cache.pop(key, None)
+        self._unsnapshotted.pop(key, None)
+        self._deleted[key] = None
+        while len(self._deleted) > self.max_cached_sessions:
+            self._deleted.popitem(last=False)
+        self._queue.put(("delete", key))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        if key in self._deleted:
+            return event
+        storage = self._cache.get(key)
+        if storage is None:
+            # Evicted while the caller held it: the caller's copy is now the latest
+            storage = copy.deepcopy(session)
+            self._remember(key, storage)
+        elif storage is not session:
+            await super().append_event(session=storage, event=event)
+            storage.last_update_time = event.timestamp
+            self._cache.move_to_end(key)
+
+        self._queue.put(("event", key, event.model_dump_json(exclude_none=True), event.timestamp))
+        count = self._unsnapshotted.get(key, 0) + 1
+        if count >= self.snapshot_every:
+            self._queue.put(("snapshot", key, json.dumps(storage.state)))
+            count = 0
+        self._unsnapshotted[key] = count
+        return event
+
+    def stats(self) -> dict:
+        return {
+            "cached_sessions": len(self._cache),
+            "queued_writes": self._queue.qsize(),
+            "writes": self.writes,
+            "write_batches": self.batches,
+            "loads": self.loads,
+        }
+
+
+_store: Optional[DurableSessionService] = None
+
+
+def get_session_service() -> Optional[DurableSessionService]:
+    # The process-wide durable store, or None to use InMemorySessionService
+    global _store
+    if _store is None:
+        _store = DurableSessionService.from_env()
+    return _store
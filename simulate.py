@@ -0,0 +1,250 @@
+"""
+20 Questions Game - Headless Simulation
+
+Plays many games without the UI against a local oracle that answers yes/no
+from an attribute table, and reports turns-to-win, LLM calls per game,
+throughput and latency percentiles.
+
+Targets come from the catalogue the local question engine and the stub model
+search, and from a held-out set they have never seen. Results are reported
+for each set separately, since catalogue targets flatter the local engine.
+
+    python simulate.py --games 200 --concurrency 20
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import asyncio
+import argparse
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from adk_runners import ADKRunners, opening_book, turn_hedger, validation_hedger
+from metrics import latency_summary, tracer
+from model_client import shared_client
+from model_scheduler import scheduler
+from session_lifecycle import session_manager
+from game_rules import AI_WINS, MAKE_GUESS, OPENING_CONTEXT, answer_outcome
+from question_agents.actions import AgentAction
+from question_agents.catalogue import OBJECTS, attribute_for_question, normalize_name
+from question_agents.ledger import LEDGER_STATE_KEY
+from question_agents.routing import routing_policy
+
+# Targets outside the catalogue, with their attributes. Only the oracle knows
+# them: the local engine and the stub model can never name them, so games
+# against them measure the agents' own play.
+HELD_OUT_OBJECTS = {
+    "tiger": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "wild"},
+    "sheep": {"alive", "animal", "mammal", "has_legs", "bigger_than_breadbox", "food"},
+    "squirrel": {"alive", "animal", "mammal", "has_legs", "wild", "held_in_hand"},
+    "duck": {"alive", "animal", "bird", "has_legs", "can_fly", "wild", "lives_in_water", "food"},
+    "octopus": {"alive", "animal", "wild", "lives_in_water"},
+    "turtle": {"alive", "animal", "pet", "has_legs", "wild", "lives_in_water"},
+    "ant": {"alive", "animal", "has_legs", "wild", "held_in_hand"},
+    "pear": {"alive", "plant", "fruit", "food", "sweet", "held_in_hand"},
+    "tomato": {"alive", "plant", "fruit", "food", "round", "held_in_hand"},
+    "mushroom": {"alive", "food", "wild", "held_in_hand"},
+    "bus": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox", "electronic"},
+    "motorcycle": {"man_made", "vehicle", "made_of_metal", "bigger_than_breadbox"},
+    "wardrobe": {"man_made", "furniture", "bigger_than_breadbox", "found_indoors"},
+    "screwdriver": {"man_made", "tool", "made_of_metal", "held_in_hand"},
+    "scarf": {"man_made", "wearable", "held_in_hand"},
+    "kettle": {"man_made", "electronic", "made_of_metal", "found_indoors"},
+    "sandwich": {"man_made", "food", "held_in_hand"},
+    "drum": {"man_made", "round", "found_indoors"},
+    "river": {"lives_in_water", "bigger_than_breadbox"},
+    "star": {"round", "bigger_than_breadbox", "can_fly"},
+}
+
+CATALOGUE = "catalogue"
+HELD_OUT = "held_out"
+TARGET_SETS = {CATALOGUE: OBJECTS, HELD_OUT: HELD_OUT_OBJECTS}
+
+
+def target_set(target: str) -> str:
+    # Which set a target belongs to; KeyError for unknown targets
+    name = normalize_name(target)
+    for set_name, objects in TARGET_SETS.items():
+        if name in objects:
+            return set_name
+    raise KeyError(target)
+
+
+class Oracle:
+    # Answers the AI's questions the way a player thinking of `target` would
+
+    def __init__(self, target: str):
+        self.target = normalize_name(target)
+        self.target_set = target_set(self.target)
+        self.attributes = TARGET_SETS[self.target_set][self.target]
+        self.unknown_questions = 0
+
+    def answer(self, ai_response: AgentAction) -> str:
+        if ai_response.action == MAKE_GUESS:
+            guess = normalize_name(ai_response.guess)
+            return "yes" if guess == self.target else "no"
+
+        attribute = attribute_for_question(ai_response.question)
+        if attribute is None:
+            # The question cannot be mapped to the table, so answer "no"
+            self.unknown_questions += 1
+            return "no"
+        return "yes" if attribute in self.attributes else "no"
+
+
+@dataclass
+class GameResult:
+    target: str
+    target_set: str
+    outcome: str
+    questions: int
+    llm_calls: int
+    wall_seconds: float
+    unknown_questions: int
+    turn_seconds: list[float] = field(default_factory=list)
+    # Final game ledger, used to tune the routing policy
+    ledger: list = field(default_factory=list)
+
+
+async def play_game(target: str, runners_factory: Callable[[], ADKRunners] = ADKRunners) -> GameResult:
+    # Play one full game, applying the same rules as GameController.process_answer
+    oracle = Oracle(target)
+    runners = runners_factory()
+    started = time.perf_counter()
+    turn_seconds = []
+
+    async def timed_turn(game_context: str):
+        turn_started = time.perf_counter()
+        response = await runners.guess_or_ask(game_context)
+        turn_seconds.append(time.perf_counter() - turn_started)
+        return response
+
+    await runners.initialise_question_agent()
+    question = 1
+    try:
+        response = await timed_turn(OPENING_CONTEXT)
+        while True:
+            if response is None:
+                outcome = "error"
+                break
+            answer = oracle.answer(response)
+            outcome = answer_outcome(response, question, answer)
+            if outcome is not None:
+                break
+            question += 1
+            response = await timed_turn(answer)
+    finally:
+        await runners.discard_speculation()
+        session = await runners.question_pool.session_service.get_session(
+            app_name=runners.question_pool.app_name,
+            user_id=runners.user_id,
+            session_id=runners.question_agent_session.id
+        )
+        ledger = session.state.get(LEDGER_STATE_KEY) or [] if session else []
+        await runners.end_game()
+
+    return GameResult(
+        target=oracle.target,
+        target_set=oracle.target_set,
+        outcome=outcome,
+        questions=question,
+        llm_calls=runners.llm_calls,
+        wall_seconds=time.perf_counter() - started,
+        unknown_questions=oracle.unknown_questions,
+        turn_seconds=turn_seconds,
+        ledger=ledger
+    )
+
+
+async def run_simulation(targets: list[str], concurrency: int,
+                         runners_factory: Callable[[], ADKRunners] = ADKRunners) -> tuple[list[GameResult], float]:
+    # Play every target, at most `concurrency` games at a time
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(target):
+        async with semaphore:
+            return await play_game(target, runners_factory)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded(target) for target in targets))
+    return results, time.perf_counter() - started
+
+
+def outcome_summary(results: list[GameResult]) -> dict:
+    wins = [r for r in results if r.outcome == AI_WINS]
+    return {
+        "games": len(results),
+        "ai_wins": len(wins),
+        "errors": sum(1 for r in results if r.outcome == "error"),
+        "win_rate": len(wins) / len(results) if results else None,
+        "mean_turns_to_win": sum(r.questions for r in wins) / len(wins) if wins else None,
+        "mean_llm_calls_per_game": sum(r.llm_calls for r in results) / len(results) if results else None,
+    }
+
+
+def summarise(results: list[GameResult], wall_seconds: float) -> dict:
+    # Aggregate per-game results into a report, overall and per target set
+    turns = [t for r in results for t in r.turn_seconds]
+    return {
+        **outcome_summary(results),
+        "target_sets": {name: outcome_summary([r for r in results if r.target_set == name])
+                        for name in TARGET_SETS if any(r.target_set == name for r in results)},
+        "unknown_questions": sum(r.unknown_questions for r in results),
+        "wall_seconds": wall_seconds,
+        "games_per_second": len(results) / wall_seconds if wall_seconds else None,
+        "turns_per_second": len(turns) / wall_seconds if wall_seconds else None,
+        "turn_latency_seconds": latency_summary(turns),
+        "game_wall_seconds": latency_summary([r.wall_seconds for r in results]),
+        "routing": routing_policy.counters(),
+        "model_connections": shared_client.stats(),
+        "hedging": {"turn": turn_hedger.counters(), "validation": validation_hedger.counters()},
+        "scheduler": scheduler.stats(),
+        "sessions": session_manager.stats(),
+        "opening_book": opening_book.counters() if opening_book else None,
+        "phases": tracer.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play 20 Questions games headlessly against a local oracle")
+    parser.add_argument("--games", type=int, default=len(OBJECTS) + len(HELD_OUT_OBJECTS), help="number of games to play")
+    parser.add_argument("--concurrency", type=int, default=10, help="games played at the same time")
+    parser.add_argument("--target", action="append", help="target word (repeatable)")
+    parser.add_argument("--targets", choices=["all", *TARGET_SETS], default="all",
+                        help="target set to pick from when no --target is given")
+    parser.add_argument("--seed", type=int, default=0, help="seed for picking targets")
+    parser.add_argument("--results", help="write per-game results to this JSONL file")
+    parser.add_argument("--metrics", help="write per-phase Prometheus summaries to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    sets = list(TARGET_SETS) if args.targets == "all" else [args.targets]
+    pool = args.target or sorted(name for set_name in sets for name in TARGET_SETS[set_name])
+    for target in pool:
+        try:
+            target_set(target)
+        except KeyError:
+            parser.error(f"unknown target: {target}")
+    rng = random.Random(args.seed)
+    targets = [rng.choice(pool) for _ in range(args.games)]
+
+    results, wall_seconds = asyncio.run(run_simulation(targets, args.concurrency))
+
+    if args.results:
+        with open(args.results, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(asdict(result)) + "\n")
+
+    if args.metrics:
+        tracer.write_prometheus(args.metrics)
+
+    print(json.dumps(summarise(results, wall_seconds), indent=2))
+
+
+if __name__ == '__main__':
+    main()
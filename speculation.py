@@ -0,0 +1,69 @@
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from google.adk.sessions import Session
+
+
+@dataclass
+class SpeculationPolicy:
+    # Cost cap for speculative turns: each speculation roughly doubles the
+    # LLM spend for that turn, so only do it when it is likely to pay off
+    enabled: bool = False
+    # Only speculate from this question number onwards
+    min_question: int = 1
+    # Only speculate if the previous turn finished within this many seconds
+    # (None disables the check)
+    max_previous_turn_seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "SpeculationPolicy":
+        # SPECULATIVE_TURNS=1 enables the mode; the other settings are optional
+        max_seconds = os.getenv("SPECULATION_MAX_PREVIOUS_TURN_SECONDS")
+        return cls(
+            enabled=os.getenv("SPECULATIVE_TURNS", "0") == "1",
+            min_question=int(os.getenv("SPECULATION_MIN_QUESTION", "1")),
+            max_previous_turn_seconds=float(max_seconds) if max_seconds else None
+        )
+
+    def should_speculate(self, question_number: int, previous_turn_seconds: Optional[float]) -> bool:
+        if not self.enabled:
+            return False
+        if question_number < self.min_question:
+            return False
+        if (self.max_previous_turn_seconds is not None and
+                previous_turn_seconds is not None and
+                previous_turn_seconds > self.max_previous_turn_seconds):
+            return False
+        return True
+
+
+@dataclass
+class SpeculativeBranch:
+    # One pre-computed answer branch running on a forked session
+    answer: str
+    session: Session
+    task: asyncio.Task
+
+
+@dataclass
+class SpeculativeTurn:
+    # All branches started for a single question
+    question_number: int
+    branches: dict[str, SpeculativeBranch] = field(default_factory=dict)
+
+    def take(self, answer: str) -> Optional[SpeculativeBranch]:
+        # Remove and return the branch matching the player's answer
+        return self.branches.pop(answer.lower(), None)
+
+    def discard(self) -> list[SpeculativeBranch]:
+        # Cancel and return every remaining branch so its session can be released
+        remaining = list(self.branches.values())
+        for branch in remaining:
+            branch.task.cancel()
+        self.branches.clear()
+        return remaining
@@ -0,0 +1,97 @@
+"""
+20 Questions Game - Startup Benchmark
+
+Measures how long the desktop app takes to show its start screen
+(time-to-first-paint) and to have the agents imported and warmed up
+(time-to-ready), over several fresh processes.
+
+    python startup_benchmark.py --runs 5
+    python startup_benchmark.py --runs 5 --headless   # no display needed
+
+With a display, each run launches main.py with STARTUP_BENCHMARK=1, which
+prints its timings and exits once ready. --headless times the same import
+and warm-up path without opening a window, and also checks that the UI
+modules do not import google.adk before the first paint. Nothing is painted
+without a window, so headless runs report import_seconds (the time to import
+the UI modules) in place of first_paint_seconds.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from metrics import latency_summary
+
+# Imports done before the window appears, then the deferred ADK warm-up
+HEADLESS_PROBE = """
+import time
+started = time.perf_counter()
+import sys, json, asyncio
+import game_controller
+imported = time.perf_counter() - started
+adk_before_paint = "google.adk" in sys.modules
+from adk_runners import ADKRunners
+runners = ADKRunners()
+asyncio.run(runners.warm_up())
+print(json.dumps({
+    "import_seconds": imported,
+    "ready_seconds": time.perf_counter() - started,
+    "adk_imported_before_paint": adk_before_paint,
+}))
+"""
+
+
+def run_once(headless: bool, timeout: float) -> dict:
+    # One fresh process; the timings are the last JSON line on stdout
+    env = {**os.environ, "STARTUP_BENCHMARK": "1"}
+    command = [sys.executable, "-c", HEADLESS_PROBE] if headless else [sys.executable, "main.py"]
+    completed = subprocess.run(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"No startup timings from run (exit code {completed.returncode}):\n{completed.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time-to-first-paint and time-to-ready")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh processes to start")
+    parser.add_argument("--headless", action="store_true", help="time the import and warm-up path without a window")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for each run")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    runs = [run_once(args.headless, args.timeout) for _ in range(args.runs)]
+    # Headless runs paint nothing, so their first phase is only the UI imports
+    first_phase = "import_seconds" if args.headless else "first_paint_seconds"
+    report = {
+        "runs": len(runs),
+        "headless": args.headless,
+        first_phase: latency_summary([r[first_phase] for r in runs]),
+        "ready_seconds": latency_summary([r["ready_seconds"] for r in runs]),
+    }
+    if args.headless:
+        report["adk_imported_before_paint"] = any(r["adk_imported_before_paint"] for r in runs)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,16 +19,16 @@ async def test_agents():
     
     # Test initial question
     question_result = await runners.guess_or_ask("Starting a new game of 20 questions.")
-    print(f"Initial question result: {json.dumps(question_result, indent=2)}")
+    print(f"Initial question result: {json.dumps(question_result.to_dict() if question_result else None, indent=2)}")
     
     # Test follow-up with a "yes" answer
     if question_result:
         followup_result = await runners.guess_or_ask("yes")
-        print(f"Follow-up result after 'yes': {json.dumps(followup_result, indent=2)}")
+        print(f"Follow-up result after 'yes': {json.dumps(followup_result.to_dict() if followup_result else None, indent=2)}")
         
         # Test follow-up with a "no" answer
         followup_result2 = await runners.guess_or_ask("no")
-        print(f"Follow-up result after 'no': {json.dumps(followup_result2, indent=2)}")
+        print(f"Follow-up result after 'no': {json.dumps(followup_result2.to_dict() if followup_result2 else None, indent=2)}")
 
 if __name__ == "__main__":
     asyncio.run(test_agents())
\ No newline at end of file
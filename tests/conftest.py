@@ -0,0 +1,5 @@
+import os
+
+# Tests never call the real model; set before the agents are imported
+os.environ.setdefault("MODEL_BACKEND", "stub")
+os.environ.setdefault("STUB_LATENCY_MS", "0")
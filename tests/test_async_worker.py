@@ -0,0 +1,119 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+
+import pytest
+
+from async_worker import AsyncWorker
+
+
+@pytest.fixture
+def worker():
+    worker = AsyncWorker(name="test-worker")
+    yield worker
+    worker.stop()
+
+
+def run_callbacks(worker: AsyncWorker, count: int = 1):
+    # What the UI thread does with the result queue
+    for _ in range(count):
+        worker.result_queue.get(timeout=5)()
+
+
+async def answer(value):
+    await asyncio.sleep(0)
+    return value
+
+
+def submit_blocked(worker: AsyncWorker, **callbacks) -> concurrent.futures.Future:
+    # A coroutine that is already running on the worker loop when this returns
+    started = threading.Event()
+
+    async def block():
+        started.set()
+        await asyncio.sleep(10)
+
+    future = worker.submit(block(), **callbacks)
+    assert started.wait(timeout=5)
+    return future
+
+
+async def fail():
+    await asyncio.sleep(0)
+    raise RuntimeError("model unavailable")
+
+
+def test_results_and_errors_reach_the_ui_callbacks(worker):
+    results, errors = [], []
+    done = worker.submit(answer(42), on_done=results.append, on_error=errors.append)
+    failed = worker.submit(fail(), on_done=results.append, on_error=errors.append)
+
+    assert done.result(timeout=5) == 42
+    with pytest.raises(RuntimeError):
+        failed.result(timeout=5)
+    run_callbacks(worker, 2)
+
+    assert results == [42]
+    assert [str(error) for error in errors] == ["model unavailable"]
+    assert not worker.pending
+
+
+def test_cancel_all_skips_callbacks_and_spares_kept_futures(worker):
+    release = asyncio.Event()
+    called = []
+
+    async def wait():
+        await release.wait()
+        return "ready"
+
+    warm_up = worker.submit(wait(), on_done=called.append)
+    turn = submit_blocked(worker, on_done=called.append, on_error=called.append)
+    worker.cancel_all(keep=(warm_up,))
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        turn.result(timeout=5)
+    assert not warm_up.done()
+
+    worker.loop.call_soon_threadsafe(release.set)
+    assert warm_up.result(timeout=5) == "ready"
+    run_callbacks(worker)
+    assert called == ["ready"]
+    assert worker.result_queue.empty()
+
+
+def test_cancelling_a_shielded_waiter_leaves_the_awaited_future_running(worker):
+    # How a game start waits for the warm-up without cancelling it
+    release = asyncio.Event()
+
+    async def warm():
+        await release.wait()
+        return "ready"
+
+    waiting = threading.Event()
+
+    async def start_game():
+        waiting.set()
+        return await asyncio.shield(asyncio.wrap_future(warm_up))
+
+    warm_up = worker.submit(warm())
+    waiter = worker.submit(start_game())
+    assert waiting.wait(timeout=5)
+    worker.cancel_all(keep=(warm_up,))
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        waiter.result(timeout=5)
+    worker.loop.call_soon_threadsafe(release.set)
+    assert warm_up.result(timeout=5) == "ready"
+
+
+def test_stop_cancels_pending_work_and_ends_the_thread():
+    worker = AsyncWorker(name="test-worker")
+    assert worker.run_sync(answer("sync"), timeout=5) == "sync"
+    pending = submit_blocked(worker)
+
+    worker.stop()
+    assert pending.cancelled()
+    assert not worker.thread.is_alive()
+    with pytest.raises(queue.Empty):
+        worker.result_queue.get_nowait()
@@ -0,0 +1,95 @@
+import json
+
+from question_agents.candidate_engine import MAX_ENGINE_TURNS, MAX_LOCAL_GUESSES, CandidateEngine
+from question_agents.catalogue import OBJECTS, attribute_for_question
+
+SMALL = {
+    "cat": {"mammal", "pet"},
+    "dog": {"mammal", "pet", "bigger_than_breadbox"},
+    "eagle": {"bird", "can_fly"},
+    "rock": set(),
+}
+ATTRIBUTES = ["mammal", "bird", "pet", "can_fly", "bigger_than_breadbox"]
+
+
+def play(engine: CandidateEngine, objects: dict, target: str, turns: int = 20):
+    # Answer the engine's questions for `target`; return its action history
+    state = engine.new_state()
+    actions = []
+    for turn in range(1, turns + 1):
+        action = engine.next_action(state, turn)
+        if action is None:
+            break
+        actions.append(action)
+        if action["action"] == "make_guess":
+            answer = "yes" if action["guess"] == target else "no"
+            if answer == "yes":
+                break
+            engine.apply_answer(state, action["guess"], True, answer)
+        else:
+            attribute = attribute_for_question(action["question"])
+            engine.apply_answer(state, action["question"], False, "yes" if attribute in objects[target] else "no")
+        json.dumps(state)
+    return state, actions
+
+
+def test_first_question_splits_the_candidates_evenly():
+    engine = CandidateEngine(SMALL, ATTRIBUTES)
+    action = engine.next_action(engine.new_state(), 1)
+    assert action["action"] == "ask_question"
+    assert attribute_for_question(action["question"]) in ("mammal", "pet")
+    assert "4 possibilities left; this splits them 2/2." == action["reasoning"]
+
+
+def test_identifies_every_small_catalogue_object():
+    engine = CandidateEngine(SMALL, ATTRIBUTES)
+    for target in SMALL:
+        _, actions = play(engine, SMALL, target)
+        assert actions[-1] == {**actions[-1], "action": "make_guess", "guess": target}
+
+
+def test_guesses_are_consistent_with_the_answers():
+    # On the real catalogue a guess is always an object matching every answer so far
+    engine = CandidateEngine()
+    for target in OBJECTS:
+        _, actions = play(engine, OBJECTS, target)
+        guesses = [action["guess"] for action in actions if action["action"] == "make_guess"]
+        asked = [attribute_for_question(a["question"]) for a in actions if a["action"] == "ask_question"]
+        for guess in guesses:
+            assert all((attribute in OBJECTS[guess]) == (attribute in OBJECTS[target]) for attribute in asked)
+        assert len(guesses) <= MAX_LOCAL_GUESSES
+
+
+def test_inconsistent_answers_hand_off():
+    engine = CandidateEngine(SMALL, ATTRIBUTES)
+    state = engine.new_state()
+    engine.apply_answer(state, "Is it a mammal?", False, "yes")
+    engine.apply_answer(state, "Is it a bird?", False, "yes")
+    assert engine.next_action(state, 3) is None
+    assert state["handed_off"]
+    assert engine.next_action(state, 4) is None
+
+
+def test_wrong_guess_uses_up_the_guess_budget():
+    engine = CandidateEngine(SMALL, ATTRIBUTES)
+    state = engine.new_state()
+    for question in ("Is it a mammal?", "Is it commonly kept as a pet?", "Is it bigger than a breadbox?"):
+        engine.apply_answer(state, question, False, "yes")
+    action = engine.next_action(state, 4)
+    assert action == {**action, "action": "make_guess", "guess": "dog"}
+    engine.apply_answer(state, "dog", True, "no")
+    assert engine.next_action(state, 5) is None
+
+
+def test_turn_budget_hands_off():
+    engine = CandidateEngine()
+    state = engine.new_state()
+    assert engine.next_action(state, MAX_ENGINE_TURNS + 1) is None
+    assert state["handed_off"]
+
+
+def test_unknown_questions_leave_the_candidates_alone():
+    engine = CandidateEngine(SMALL, ATTRIBUTES)
+    state = engine.new_state()
+    engine.apply_answer(state, "Is it older than a century?", False, "no")
+    assert state["mask"] == engine.new_state()["mask"] and state["asked"] == []
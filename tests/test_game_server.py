@@ -0,0 +1,148 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from game_server import GameRegistry
+from model_scheduler import ModelCallSlots
+from question_agents.actions import QuestionAction
+
+
+class FakeRunners:
+    # Just enough of ADKRunners for GameRegistry.start_game, with slow setup
+    count = 0
+
+    def __init__(self):
+        FakeRunners.count += 1
+        self.user_id = f"player-{FakeRunners.count}"
+        self.validation_agent_session = None
+        self.question_agent_session = None
+        self.validation_pool = SimpleNamespace(release_session=self.release_session)
+
+    async def release_session(self, user_id, session):
+        pass
+
+    async def initialise_validation_agent(self):
+        await asyncio.sleep(0.01)
+
+    async def validate_input(self, word):
+        await asyncio.sleep(0.01)
+        return {"is_valid": True, "reason": "ok"}
+
+    async def initialise_question_agent(self):
+        self.question_agent_session = SimpleNamespace(id=f"game-{self.user_id}")
+
+    async def guess_or_ask(self, game_context):
+        return QuestionAction(question="Is it alive?")
+
+    def session_evicted(self):
+        return False
+
+    async def end_game(self):
+        self.ended = True
+
+
+class FlakyRunners(FakeRunners):
+    # Fails the turns listed in `failing` (counting from the opening turn as 1)
+
+    def __init__(self, *failing: int):
+        super().__init__()
+        self.failing = set(failing)
+        self.turns = 0
+        self.ended = False
+
+    async def guess_or_ask(self, game_context):
+        self.turns += 1
+        if self.turns in self.failing:
+            return None
+        return QuestionAction(question=f"Question {self.turns}?")
+
+
+def test_concurrent_starts_respect_the_game_cap():
+    async def main():
+        registry = GameRegistry(max_concurrent_llm_calls=4, max_active_games=2)
+        registry.new_runners = lambda user_id=None: FakeRunners()
+        results = await asyncio.gather(*(registry.start_game("cat") for _ in range(5)), return_exceptions=True)
+        return registry, results
+
+    registry, results = asyncio.run(main())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(registry.games) == 2
+    assert len(rejected) == 3 and all(r.status_code == 503 for r in rejected)
+    assert registry.starting_games == 0
+
+
+def test_failed_start_releases_its_reservation():
+    async def main():
+        registry = GameRegistry(max_active_games=1)
+
+        class Invalid(FakeRunners):
+            async def validate_input(self, word):
+                return {"is_valid": False, "reason": "not a thing"}
+
+        registry.new_runners = lambda user_id=None: Invalid()
+        with pytest.raises(HTTPException) as error:
+            await registry.start_game("zzqx")
+        assert error.value.status_code == 422
+        return registry
+
+    registry = asyncio.run(main())
+    assert registry.active_games() == 0
+
+
+def test_failed_first_turn_does_not_register_the_game():
+    async def main():
+        registry = GameRegistry()
+        runners = []
+
+        def new_runners(user_id=None):
+            runners.append(FlakyRunners(1))
+            return runners[-1]
+
+        registry.new_runners = new_runners
+        with pytest.raises(HTTPException) as error:
+            await registry.start_game("cat")
+        assert error.value.status_code == 503
+        return registry, runners[0]
+
+    registry, runners = asyncio.run(main())
+    assert registry.games == {} and registry.active_games() == 0
+    assert runners.ended
+
+
+def test_failed_turn_keeps_the_question_open():
+    async def main():
+        registry = GameRegistry()
+        registry.new_runners = lambda user_id=None: FlakyRunners(2)
+        game_id = (await registry.start_game("cat")).game_id
+
+        with pytest.raises(HTTPException) as error:
+            await registry.answer(game_id, "yes")
+        assert error.value.status_code == 503
+        assert registry.games[game_id].current_question == 1
+        assert registry.games[game_id].current_ai_response.question == "Question 1?"
+
+        state = await registry.answer(game_id, "yes")
+        assert state.question_number == 2
+        assert state.ai_response["question"] == "Question 3?"
+
+    asyncio.run(main())
+
+
+def test_model_call_slots_count_runs_in_flight():
+    async def main():
+        slots = ModelCallSlots(2)
+        inside = []
+
+        async def run():
+            async with slots:
+                inside.append(slots.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(run() for _ in range(4)))
+        return slots, inside
+
+    slots, inside = asyncio.run(main())
+    assert max(inside) == 2
+    assert slots.in_flight == 0
@@ -0,0 +1,85 @@
+import asyncio
+
+from hedging import HedgePolicy, Hedger
+
+
+def calibrated(policy: HedgePolicy, latency: float = 0.01) -> Hedger:
+    # A hedger that has already seen enough calls to hedge
+    hedger = Hedger("test", policy)
+    hedger.latencies.extend([latency] * policy.min_samples)
+    return hedger
+
+
+def reply(value, delay: float):
+    async def call():
+        await asyncio.sleep(delay)
+        return value
+    return call
+
+
+def test_missed_deadline_returns_none_and_cancels_the_call():
+    async def scenario():
+        hedger = Hedger("test", HedgePolicy(deadline_seconds=0.05))
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        assert await hedger.run(slow) == (None, False)
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+        assert hedger.counters()["deadline_exceeded"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_hedge_wins_when_the_primary_is_slow():
+    async def scenario():
+        hedger = calibrated(HedgePolicy(deadline_seconds=5, hedging=True, min_hedge_delay_seconds=0.02))
+        result = await hedger.run(reply("primary", 1.0), reply("hedge", 0.0))
+        assert result == ("hedge", True)
+        assert hedger.hedges == 1 and hedger.hedge_wins == 1
+
+    asyncio.run(scenario())
+
+
+def test_fast_primary_sends_no_hedge():
+    async def scenario():
+        hedger = calibrated(HedgePolicy(deadline_seconds=5, hedging=True, min_hedge_delay_seconds=0.5))
+        assert await hedger.run(reply("primary", 0.0), reply("hedge", 0.0)) == ("primary", False)
+        assert hedger.hedges == 0
+
+    asyncio.run(scenario())
+
+
+def test_no_hedging_until_calibrated():
+    hedger = Hedger("test", HedgePolicy(hedging=True, min_samples=20))
+    hedger.latencies.extend([0.01] * 19)
+    assert hedger.hedge_delay() is None
+    hedger.latencies.append(0.01)
+    assert hedger.hedge_delay() == HedgePolicy().min_hedge_delay_seconds
+
+
+def test_budget_limits_hedges():
+    async def scenario():
+        policy = HedgePolicy(deadline_seconds=5, hedging=True, min_hedge_delay_seconds=0.01,
+                             budget_ratio=0.0, budget_burst=1)
+        hedger = calibrated(policy)
+        for _ in range(3):
+            await hedger.run(reply("primary", 0.05), reply("hedge", 0.0))
+        assert hedger.hedges == 1
+        assert hedger.budget_denied == 2
+
+    asyncio.run(scenario())
+
+
+def test_a_failed_hedge_does_not_hide_the_primary_result():
+    async def scenario():
+        hedger = calibrated(HedgePolicy(deadline_seconds=5, hedging=True, min_hedge_delay_seconds=0.01))
+        assert await hedger.run(reply("primary", 0.05), reply(None, 0.0)) == ("primary", False)
+
+    asyncio.run(scenario())
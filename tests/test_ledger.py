@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from question_agents.actions import GuessAction, QuestionAction
+from question_agents.ledger import LEDGER_STATE_KEY, GameLedger, ledger_instruction
+
+
+def test_records_questions_guesses_and_answers():
+    ledger = GameLedger()
+    ledger.record_action(QuestionAction(question="Is it alive?"), {"guess": "cat", "confidence": 3})
+    assert ledger.record_answer(" Yes ")
+    ledger.record_action(GuessAction(guess="dog", confidence=8))
+    assert ledger.record_answer("no")
+
+    assert ledger.render() == (
+        "1. Q: Is it alive? -> yes [best guess: cat, 3/10]\n"
+        "2. Guess: dog -> no"
+    )
+
+
+def test_answers_only_attach_to_an_open_entry():
+    ledger = GameLedger()
+    assert not ledger.record_answer("yes")
+    ledger.record_action(QuestionAction(question="Is it round?"))
+    assert not ledger.record_answer("maybe")
+    assert ledger.record_answer("no")
+    assert not ledger.record_answer("yes")
+    assert ledger.entries[-1].answer == "no"
+
+
+def test_state_round_trip():
+    ledger = GameLedger()
+    ledger.record_action(QuestionAction(question="Is it alive?"), {"guess": "cat", "confidence": 3})
+    ledger.record_answer("yes")
+    ledger.record_action(QuestionAction(question="Is it a pet?"))
+
+    restored = GameLedger.from_state({LEDGER_STATE_KEY: ledger.to_state()})
+    assert restored.render() == ledger.render()
+    assert restored.render().endswith("2. Q: Is it a pet? -> ?")
+
+
+def test_empty_ledger():
+    assert GameLedger.from_state({}).render() == "No questions have been asked yet. This is the first turn."
+
+
+def test_instruction_appends_the_ledger():
+    ledger = GameLedger()
+    ledger.record_action(QuestionAction(question="Is it alive?"))
+    provider = ledger_instruction("Ask a question.")
+    text = provider(SimpleNamespace(state={LEDGER_STATE_KEY: ledger.to_state()}))
+    assert text == "Ask a question.\n\nQuestions and answers so far:\n1. Q: Is it alive? -> ?"
@@ -0,0 +1,73 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from google.genai import types
+
+from model_client import SharedModelClient
+from model_standin import create_app
+
+
+# A validation request: the stand-in answers by output schema
+VALIDATION = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_json_schema={"type": "object", "properties": {"is_valid": {"type": "boolean"}}}
+)
+
+
+async def validate(client: SharedModelClient, text: str):
+    return await client.genai_client().aio.models.generate_content(model="gemini-2.5-flash", contents=text, config=VALIDATION)
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    # The stand-in model server on a free local port, for as long as the test runs
+    monkeypatch.setenv("GOOGLE_API_KEY", "standin")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "stand-in server did not start"
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def test_sequential_calls_reuse_one_connection(standin):
+    async def scenario():
+        client = SharedModelClient(base_url=standin)
+        for _ in range(4):
+            response = await validate(client, "cat")
+            assert "is_valid" in response.text
+        stats = client.stats()
+        await client.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["requests"] == 4
+    assert stats["new_connections"] == 1
+    assert stats["reuse_rate"] == 0.75
+
+
+def test_warm_up_opens_the_connections_later_calls_use(standin):
+    async def scenario():
+        client = SharedModelClient(base_url=standin, warm_connections=2)
+        await client.warm_up("gemini-2.5-flash")
+        await asyncio.gather(validate(client, "cat"), validate(client, "dog"))
+        stats = client.stats()
+        await client.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["warm_up_requests"] == 2
+    assert stats["requests"] == 4
+    assert stats["new_connections"] == 2
+    assert stats["reuse_rate"] == 0.5
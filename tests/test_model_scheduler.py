@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from google.genai.errors import ClientError
+
+import model_backend
+from model_backend import ScheduledLlm
+from model_scheduler import ModelCallSlots, ModelScheduler, Priority, SchedulerPolicy, scheduler
+
+
+def rate_limited() -> ClientError:
+    return ClientError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+
+
+def test_waiting_requests_are_admitted_by_priority():
+    async def scenario():
+        # Room for one request every 10ms
+        scheduler = ModelScheduler(SchedulerPolicy(requests_per_minute=6000, burst_seconds=0.01))
+        await scheduler.acquire(0)
+        admitted = []
+
+        async def request(priority: Priority):
+            with scheduler.priority(priority):
+                await scheduler.acquire(0)
+            admitted.append(priority)
+
+        await asyncio.gather(*(request(priority) for priority in
+                               (Priority.BACKGROUND, Priority.VALIDATION, Priority.TURN, Priority.BACKGROUND)))
+        assert admitted == [Priority.TURN, Priority.VALIDATION, Priority.BACKGROUND, Priority.BACKGROUND]
+        assert scheduler.queued == 4 and scheduler.queue_depth() == 0
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_backoff_holds_back_new_requests():
+    async def scenario():
+        scheduler = ModelScheduler(SchedulerPolicy(max_retries=2, backoff_seconds=0.02))
+        assert await scheduler.retry_after_rate_limit(0)
+        assert scheduler.paused_until > time.monotonic() - 0.02
+        assert await scheduler.retry_after_rate_limit(1)
+        assert not await scheduler.retry_after_rate_limit(2)
+        assert scheduler.retries == 2 and scheduler.rate_limited == 3
+
+        scheduler.paused_until = time.monotonic() + 0.05
+        assert scheduler.delay(0) > 0
+        started = time.monotonic()
+        await scheduler.acquire(0)
+        assert time.monotonic() - started >= 0.04
+
+    asyncio.run(scenario())
+
+
+class FlakyLlm(BaseLlm):
+    # Rejects the first `failures` requests with a 429, then answers
+    failures: int = 1
+    attempts: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise rate_limited()
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+def test_scheduled_model_retries_rate_limited_requests(monkeypatch):
+    monkeypatch.setattr(model_backend, "scheduler", ModelScheduler(SchedulerPolicy(max_retries=1, backoff_seconds=0.01)))
+
+    async def responses(llm):
+        return [response async for response in llm.generate_content_async(LlmRequest())]
+
+    flaky = FlakyLlm(model="stub/flaky", failures=1)
+    assert len(asyncio.run(responses(ScheduledLlm(model="stub/flaky", inner=flaky)))) == 1
+    assert flaky.attempts == 2
+
+    failing = FlakyLlm(model="stub/flaky", failures=5)
+    with pytest.raises(ClientError):
+        asyncio.run(responses(ScheduledLlm(model="stub/flaky", inner=failing)))
+    assert failing.attempts == 2
+
+
+def test_model_call_slots_admit_by_priority_and_keep_room_for_turns():
+    async def scenario():
+        slots = ModelCallSlots(4, background_share=0.5)
+        admitted = []
+
+        async def run(priority: Priority, hold: asyncio.Event):
+            with scheduler.priority(priority):
+                async with slots:
+                    admitted.append(priority)
+                    await hold.wait()
+
+        release = asyncio.Event()
+        background = [asyncio.ensure_future(run(Priority.BACKGROUND, release)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # Background work only fills half of the slots
+        assert slots.in_flight == 2 and slots.queue_depth() == 1
+
+        turns = [asyncio.ensure_future(run(Priority.TURN, release)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert admitted == [Priority.BACKGROUND] * 2 + [Priority.TURN] * 2
+        assert slots.in_flight == 4
+
+        release.set()
+        await asyncio.gather(*background, *turns)
+        assert admitted[4:] == [Priority.TURN, Priority.BACKGROUND]
+        assert slots.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.sessions import InMemorySessionService
+
+import opening_book
+from game_rules import OPENING_CONTEXT
+from opening_book import OpeningBook, agent_config, book_key, generate
+from question_agents.actions import QuestionAction
+from question_agents.routing import RoutingPolicy
+
+
+def model_agent(mode: str = "fused", model: str = "stub/model"):
+    return SimpleNamespace(local_engine=False, mode=mode, fused_agent=SimpleNamespace(model=model))
+
+
+def test_configuration_covers_prompts_and_routing(monkeypatch):
+    agent = model_agent()
+    book = OpeningBook({"next": {}}, agent_config(agent), turns=1)
+    assert book.matches(agent)
+
+    monkeypatch.setattr(opening_book, "LEDGER_PROMPTS", not opening_book.LEDGER_PROMPTS)
+    assert not book.matches(agent)
+    monkeypatch.undo()
+
+    monkeypatch.setattr(opening_book, "routing_policy", RoutingPolicy(enabled=False))
+    assert not book.matches(agent)
+    monkeypatch.undo()
+
+    assert not book.matches(model_agent(mode="parallel"))
+
+
+def test_book_without_model_calls_matches_any_orchestration():
+    engine_agent = SimpleNamespace(local_engine=True, mode="fused", fused_agent=SimpleNamespace(model="stub/model"))
+    book = OpeningBook({"next": {}}, agent_config(engine_agent, model_calls=False), turns=1)
+    assert book.config["routing"] is None
+    assert book.matches(SimpleNamespace(local_engine=True, mode="parallel", fused_agent=SimpleNamespace(model="other")))
+    assert not book.matches(model_agent())
+
+
+def test_save_load_and_walk(tmp_path):
+    leaf = {"action": QuestionAction(question="Is it round?").to_dict(), "events": []}
+    first = {"action": QuestionAction(question="Is it alive?").to_dict(), "events": [], "next": {"yes": leaf}}
+    book = OpeningBook({"next": {book_key(OPENING_CONTEXT): first}}, agent_config(model_agent()), turns=2)
+    path = tmp_path / "book.json.gz"
+    book.save(path)
+
+    loaded = OpeningBook.load(path)
+    assert loaded.size() == 2
+    node = loaded.next(loaded.root, OPENING_CONTEXT)
+    assert node["action"]["question"] == "Is it alive?"
+    assert loaded.covers(node, ["yes"]) and not loaded.covers(node, ["yes", "no"])
+    assert loaded.next(node, " YES ") == leaf
+    assert loaded.next(node, "no") is None
+
+
+def test_older_book_versions_are_rejected(tmp_path, monkeypatch):
+    path = tmp_path / "book.json.gz"
+    OpeningBook({"next": {}}, {}, turns=0).save(path)
+    monkeypatch.setattr(opening_book, "BOOK_VERSION", opening_book.BOOK_VERSION + 1)
+    with pytest.raises(ValueError):
+        OpeningBook.load(path)
+
+
+def test_served_turns_replay_the_generated_session():
+    async def scenario():
+        book = await generate(2)
+        node = book.next(book.root, OPENING_CONTEXT)
+        assert book.covers(node, ["yes", "no"])
+
+        service = InMemorySessionService()
+        session = await service.create_session(app_name="QuestionAgent", user_id="player")
+        action = await book.serve(service, session, node, OPENING_CONTEXT)
+        stored = await service.get_session(app_name="QuestionAgent", user_id="player", session_id=session.id)
+        return node, action, stored
+
+    node, action, session = asyncio.run(scenario())
+    assert action.to_dict() == node["action"]
+    assert session.events[0].author == "user"
+    assert len(session.events) == 1 + len(node["events"])
+    assert session.state.get("ledger")
@@ -0,0 +1,53 @@
+import json
+
+from partial_json import extract_partial_string
+
+
+def test_field_not_started():
+    assert extract_partial_string('{"reasoning": "so', "question") is None
+    assert extract_partial_string('{"question', "question") is None
+
+
+def test_value_so_far():
+    assert extract_partial_string('{"question": "Is it ali', "question") == "Is it ali"
+    assert extract_partial_string('{"question":"', "question") == ""
+
+
+def test_complete_value_stops_at_closing_quote():
+    text = '{"question": "Is it alive?", "reasoning": "broad split"}'
+    assert extract_partial_string(text, "question") == "Is it alive?"
+    assert extract_partial_string(text, "reasoning") == "broad split"
+
+
+def test_escapes():
+    assert extract_partial_string(r'{"guess": "a \"big\" cat\n', "guess") == 'a "big" cat\n'
+    assert extract_partial_string(r'{"guess": "caf\u00e9"}', "guess") == "café"
+
+
+def test_incomplete_escapes_wait_for_more_text():
+    assert extract_partial_string('{"guess": "a \\', "guess") == "a "
+    assert extract_partial_string('{"guess": "caf\\u00', "guess") == "caf"
+
+
+def test_invalid_unicode_escape_keeps_the_decodable_prefix():
+    assert extract_partial_string('{"decision": "Is it \\uZZZZ more', "decision") == "Is it "
+    assert extract_partial_string('{"guess": "a\\u12"}', "guess") == "a"
+
+
+def test_surrogate_pairs_wait_for_the_low_half():
+    assert extract_partial_string('{"guess": "cat \\ud83d', "guess") == "cat "
+    assert extract_partial_string('{"guess": "cat \\ud83d\\udc31"', "guess") == "cat \U0001f431"
+
+
+def test_every_prefix_is_a_prefix_of_the_final_value():
+    value = 'Is it "round" \\ or café? \U0001f431'
+    text = json.dumps({"decision": "ask_question", "question": value})
+    previous = ""
+    for end in range(len(text) + 1):
+        partial = extract_partial_string(text[:end], "question")
+        if partial is None:
+            continue
+        assert value.startswith(partial)
+        assert partial.startswith(previous)
+        previous = partial
+    assert previous == value
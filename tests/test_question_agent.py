@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import question_agents.agent as question_agent
+from game_rules import OPENING_CONTEXT
+from question_agents.actions import action_from_event
+from question_agents.agent import RootAgent, merge_agent_runs, root_agent
+from question_agents.routing import RoutingPolicy
+
+
+async def play(agent: RootAgent, answers: list[str]) -> list[list]:
+    # The typed actions produced on each turn
+    runner = Runner(app_name="QuestionAgent", agent=agent, session_service=InMemorySessionService())
+    session = await runner.session_service.create_session(app_name="QuestionAgent", user_id="player")
+    turns = []
+    for text in [OPENING_CONTEXT, *answers]:
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        events = [event async for event in runner.run_async(user_id="player", session_id=session.id, new_message=message)]
+        turns.append([action for action in map(action_from_event, events) if action is not None])
+    return turns
+
+
+@pytest.mark.parametrize("mode", ["parallel", "fused"])
+def test_each_turn_produces_one_action(mode, monkeypatch):
+    # Run the guessing agent on every turn, so parallel mode merges both sub-agents
+    monkeypatch.setattr(question_agent, "routing_policy", RoutingPolicy(enabled=False))
+    monkeypatch.setattr(root_agent, "mode", mode)
+    monkeypatch.setattr(root_agent, "local_engine", False)
+    turns = asyncio.run(play(root_agent, ["yes", "no", "yes"]))
+    assert [len(actions) for actions in turns] == [1, 1, 1, 1]
+
+
+def test_closing_the_merge_early_stops_every_run():
+    async def scenario():
+        closed = []
+
+        async def run(name: str):
+            try:
+                for number in range(3):
+                    await asyncio.sleep(0)
+                    yield f"{name}{number}"
+            finally:
+                closed.append(name)
+
+        merged = merge_agent_runs(run("a"), run("b"))
+        first = await anext(merged)
+        await merged.aclose()
+        return first, closed
+
+    first, closed = asyncio.run(scenario())
+    assert first in ("a0", "b0")
+    assert sorted(closed) == ["a", "b"]
+
+
+def test_a_failing_run_fails_the_merge_and_stops_the_others():
+    async def scenario():
+        stopped = asyncio.Event()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("model unavailable")
+            yield
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+                yield "late"
+            finally:
+                stopped.set()
+
+        with pytest.raises(RuntimeError):
+            async for _ in merge_agent_runs(failing(), slow()):
+                pass
+        return stopped.is_set()
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,72 @@
+import numpy as np
+
+from game_rules import AI_WINS, PLAYER_WINS
+from question_agents.ledger import GameLedger, LedgerEntry
+from question_agents.routing import TUNING_GRID, RoutingPolicy, collect_decisions, replay, tune
+
+
+def ledger(*entries: LedgerEntry) -> GameLedger:
+    return GameLedger(list(entries))
+
+
+def question(answer: str, confidence=None) -> LedgerEntry:
+    return LedgerEntry("Is it alive?", answer=answer, guess="cat" if confidence else None, confidence=confidence)
+
+
+def game(outcome: str, *entries: LedgerEntry) -> dict:
+    return {"outcome": outcome, "ledger": ledger(*entries).to_state()}
+
+
+def test_skips_early_and_hopeless_turns():
+    policy = RoutingPolicy(min_guess_turn=3, min_yes_answers=1, min_previous_confidence=5,
+                           recheck_every=3, always_guess_from=10)
+    assert not policy.decide(ledger(question("yes")))
+    assert not policy.decide(ledger(question("no"), question("no")))
+    assert policy.decide(ledger(question("yes"), question("no")))
+    # Low confidence last turn: skip until the re-check is due
+    assert not policy.decide(ledger(question("yes"), question("no", confidence=2)))
+    assert policy.decide(ledger(question("yes", confidence=2), question("no"), question("no")))
+    assert policy.decide(ledger(*[question("no")] * 9))
+    assert RoutingPolicy(enabled=False).decide(ledger())
+
+
+def test_collected_decisions_are_only_counted_when_recorded():
+    policy = RoutingPolicy(min_guess_turn=2)
+    with collect_decisions() as decisions:
+        assert not policy.should_run_guessing(ledger())
+    assert decisions == [False]
+    assert policy.counters()["guessing_skips"] == 0
+
+    policy.record(decisions)
+    policy.should_run_guessing(ledger(question("yes")))
+    assert policy.counters() == {"guessing_runs": 1, "guessing_skips": 1, "skip_rate": 0.5}
+
+
+def test_policy_file_round_trip_leaves_out_counters():
+    policy = RoutingPolicy(min_guess_turn=4, guessing_runs=7)
+    values = policy.to_dict()
+    assert "guessing_runs" not in values
+    assert RoutingPolicy.from_dict({**values, "unknown": 1}) == policy
+
+
+def test_tune_keeps_the_guessing_agent_on_winning_turns():
+    winning_guess = LedgerEntry("dog", guess="dog", confidence=9, is_guess=True)
+    results = [
+        # Won on turn 4 after a single "yes" and low confidence on turn 3
+        game(AI_WINS, question("yes"), question("no", confidence=1), question("no", confidence=2), winning_guess),
+        # A lost game whose guessing runs can all be skipped
+        game(PLAYER_WINS, *[question("no", confidence=1) for _ in range(20)]),
+    ]
+    policy = tune(results)
+
+    chosen = np.array([[getattr(policy, name) for name in TUNING_GRID]])
+    skips, lost_win, has_win = replay(chosen, results[0]["ledger"], won=True)
+    assert has_win and not lost_win[0]
+    assert skips[0] == 2
+    skips, _, has_win = replay(chosen, results[1]["ledger"], won=False)
+    assert not has_win and skips[0] >= 17
+    assert policy.always_guess_from > 20
+
+
+def test_tune_without_wins_keeps_the_default_policy():
+    assert tune([game(PLAYER_WINS, question("no", confidence=3))]) == RoutingPolicy()
@@ -0,0 +1,100 @@
+import asyncio
+
+from google.adk.events import Event
+from google.adk.sessions import Session
+
+from session_lifecycle import SessionBudget, SessionManager, serialised_size
+
+
+class FakePool:
+    # The part of RunnerPool that SessionManager calls back into
+    app_name = "QuestionAgent"
+
+    def __init__(self, manager: SessionManager):
+        self.manager = manager
+        self.deleted = []
+
+    async def delete_session(self, user_id: str, session_id: str):
+        self.deleted.append(session_id)
+        self.manager.forget(self, user_id, session_id)
+
+
+def session(session_id: str) -> Session:
+    return Session(id=session_id, app_name=FakePool.app_name, user_id="player", state={})
+
+
+def event(text: str = "turn") -> Event:
+    return Event(author="question_agent", invocation_id=text)
+
+
+def tracked(manager: SessionManager, *session_ids: str) -> tuple[FakePool, dict[str, Session]]:
+    pool = FakePool(manager)
+    sessions = {session_id: session(session_id) for session_id in session_ids}
+    for item in sessions.values():
+        manager.track(pool, "player", item)
+    return pool, sessions
+
+
+def test_evicts_least_recently_used_sessions_not_in_use():
+    manager = SessionManager(SessionBudget(max_sessions=2))
+    pool, sessions = tracked(manager, "a", "b", "c", "d")
+    manager.touch(pool, "player", sessions["a"])
+
+    async def scenario():
+        # "b" is the least recently used, but a turn is running on it
+        with manager.in_use(pool, "player", sessions["b"]):
+            await manager.enforce()
+
+    asyncio.run(scenario())
+    assert pool.deleted == ["c", "d"]
+    assert manager.is_live(pool, "player", sessions["a"]) and manager.is_live(pool, "player", sessions["b"])
+    assert not manager.is_live(pool, "player", sessions["c"])
+    assert manager.stats()["evicted"] == 2
+
+
+def test_stops_evicting_when_every_session_is_in_use():
+    manager = SessionManager(SessionBudget(max_sessions=1))
+    pool, sessions = tracked(manager, "a", "b")
+
+    async def scenario():
+        with manager.in_use(pool, "player", sessions["a"]), manager.in_use(pool, "player", sessions["b"]):
+            await manager.enforce()
+
+    asyncio.run(scenario())
+    assert pool.deleted == []
+    assert manager.footprint()["in_use"] == 0
+
+
+def test_accounts_events_and_bytes_until_released():
+    manager = SessionManager(SessionBudget())
+    pool, sessions = tracked(manager, "a")
+    game = sessions["a"]
+    first, second = event("one"), event("two")
+
+    manager.record(pool, "player", game, first)
+    assert manager.total_events == 1
+    # update() only measures events that were not counted yet
+    game.events.extend([first, second])
+    manager.update(pool, "player", game)
+    assert manager.total_events == 2
+    state_bytes = len("{}")
+    assert manager.total_bytes == state_bytes + serialised_size(first) + serialised_size(second)
+    assert manager.footprint()["apps"] == {"QuestionAgent": {"sessions": 1, "events": 2, "bytes": manager.total_bytes}}
+
+    manager.forget(pool, "player", "a")
+    assert (manager.total_events, manager.total_bytes) == (0, 0)
+    assert manager.stats()["released"] == 1
+    assert manager.peak_sessions == 1
+
+
+def test_byte_budget_evicts_the_oldest_session():
+    turn = event()
+    # Room for one session holding one event, but not two sessions
+    manager = SessionManager(SessionBudget(max_bytes=len("{}") + serialised_size(turn) + 1))
+    pool, sessions = tracked(manager, "old", "new")
+    manager.record(pool, "player", sessions["new"], turn)
+    assert manager.over_budget()
+
+    asyncio.run(manager.enforce())
+    assert pool.deleted == ["old"]
+    assert not manager.over_budget()
@@ -0,0 +1,108 @@
+import asyncio
+import sqlite3
+import contextlib
+
+from google.adk.events import Event, EventActions
+
+from session_store import DurableSessionService
+
+APP, USER = "QuestionAgent", "player"
+
+
+def state_event(**delta) -> Event:
+    return Event(author="question_agent", invocation_id="turn", actions=EventActions(state_delta=delta))
+
+
+def test_reload_replays_the_deltas_after_the_last_snapshot(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def play():
+        store = DurableSessionService(path, snapshot_every=2)
+        session = await store.create_session(app_name=APP, user_id=USER, state={"turn": 0})
+        for turn in range(1, 4):
+            await store.append_event(session, state_event(turn=turn, **{"temp:scratch": turn}))
+        store.close()
+        return session.id
+
+    session_id = asyncio.run(play())
+    with contextlib.closing(sqlite3.connect(path)) as db:
+        snapshot, snapshot_rowid = db.execute("SELECT state, snapshot_rowid FROM sessions").fetchone()
+    # The snapshot was taken after the second event; the third is only in the log
+    assert '"turn": 2' in snapshot and snapshot_rowid == 2
+
+    async def reload():
+        store = DurableSessionService(path)
+        session = await store.get_session(app_name=APP, user_id=USER, session_id=session_id)
+        store.close()
+        return session, store.loads
+
+    session, loads = asyncio.run(reload())
+    assert loads == 1
+    assert session.state == {"turn": 3}
+    assert len(session.events) == 3
+
+
+def test_evicted_sessions_are_loaded_lazily(tmp_path):
+    async def play():
+        store = DurableSessionService(str(tmp_path / "sessions.db"), max_cached_sessions=1)
+        first = await store.create_session(app_name=APP, user_id=USER, state={"word": "cat"})
+        await store.append_event(first, state_event(asked=1))
+        second = await store.create_session(app_name=APP, user_id=USER)
+        assert store.stats()["cached_sessions"] == 1
+
+        loaded = await store.get_session(app_name=APP, user_id=USER, session_id=first.id)
+        assert store.loads == 1
+        assert loaded.state == {"word": "cat", "asked": 1}
+        # Served from the cache now, and a copy that callers cannot change
+        loaded.state["word"] = "dog"
+        again = await store.get_session(app_name=APP, user_id=USER, session_id=first.id)
+        assert store.loads == 1 and again.state["word"] == "cat"
+
+        assert sorted(key[2] for key in store.session_keys(APP)) == sorted([first.id, second.id])
+        store.close()
+
+    asyncio.run(play())
+
+
+def test_deleted_sessions_are_gone_after_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def play():
+        store = DurableSessionService(path)
+        kept = await store.create_session(app_name=APP, user_id=USER, session_id="kept")
+        deleted = await store.create_session(app_name=APP, user_id=USER, session_id="deleted")
+        await store.append_event(deleted, state_event(turn=1))
+        await store.delete_session(app_name=APP, user_id=USER, session_id=deleted.id)
+        assert await store.get_session(app_name=APP, user_id=USER, session_id=deleted.id) is None
+        store.close()
+        return kept.id
+
+    kept_id = asyncio.run(play())
+    store = DurableSessionService(path)
+    assert store.session_keys(APP) == [(APP, USER, kept_id)]
+    with contextlib.closing(sqlite3.connect(path)) as db:
+        assert db.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+    store.close()
+
+
+def test_appends_after_delete_are_dropped(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def play():
+        # A released fork's runner can still be emitting events for its session
+        store = DurableSessionService(path, snapshot_every=1)
+        fork = await store.create_session(app_name=APP, user_id=USER, session_id="fork")
+        await store.delete_session(app_name=APP, user_id=USER, session_id=fork.id)
+        await store.append_event(fork, state_event(turn=1))
+        assert store.stats()["cached_sessions"] == 0
+        assert await store.get_session(app_name=APP, user_id=USER, session_id=fork.id) is None
+
+        # The same id can be used again once it is re-created
+        fork = await store.create_session(app_name=APP, user_id=USER, session_id="fork")
+        await store.append_event(fork, state_event(turn=2))
+        store.close()
+
+    asyncio.run(play())
+    with contextlib.closing(sqlite3.connect(path)) as db:
+        assert db.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 1
+        assert '"turn": 2' in db.execute("SELECT state FROM sessions").fetchone()[0]
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from adk_runners import ADKRunners
+from single_flight import SingleFlight
+from validation_cache import ValidationCache
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def call():
+            calls.append(1)
+            await release.wait()
+            return {"is_valid": True}
+
+        callers = [asyncio.ensure_future(flight.do("cat", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.in_flight("cat")
+        release.set()
+        results = await asyncio.gather(*callers)
+
+        assert len(calls) == 1
+        assert results == [{"is_valid": True}] * 3
+        assert flight.counters() == {"calls": 1, "coalesced": 2, "in_flight": 0}
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_a_caller_leaves_the_shared_call_running():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("cat", call))
+        second = asyncio.ensure_future(flight.do("cat", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller_and_the_key_is_retried():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("model unavailable")
+
+        results = await asyncio.gather(flight.do("cat", failing), flight.do("cat", failing), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not flight.in_flight("cat")
+
+        async def succeeding():
+            return "ok"
+
+        assert await flight.do("cat", succeeding) == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_coalesced_validation_survives_the_first_player_ending_their_game():
+    async def scenario():
+        first = ADKRunners(user_id="first", validation_cache=ValidationCache(path=""), prewarm=False)
+        second = ADKRunners(user_id="second", validation_cache=ValidationCache(path=""), prewarm=False)
+        await first.initialise_validation_agent()
+        await second.initialise_validation_agent()
+
+        validations = asyncio.gather(first.validate_input("zzqx gadget"), second.validate_input("zzqx gadget"))
+        await asyncio.sleep(0)
+        await first.end_game()
+        first_verdict, second_verdict = await validations
+
+        assert first_verdict is not None and second_verdict is not None
+        assert first_verdict == second_verdict
+        await second.end_game()
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from adk_runners import ADKRunners
+from game_rules import OPENING_CONTEXT
+from speculation import SpeculationPolicy, SpeculativeBranch
+
+
+async def started_game(user_id: str) -> tuple[ADKRunners, object]:
+    runners = ADKRunners(user_id=user_id, prewarm=False)
+    runners.speculation_policy = SpeculationPolicy(enabled=True)
+    await runners.initialise_question_agent()
+    # Play every turn through the agent, even if an opening book is installed
+    runners.book_node = None
+    first = await runners.guess_or_ask(OPENING_CONTEXT)
+    assert first is not None and runners.question_number == 1
+    return runners, first
+
+
+def is_live(runners: ADKRunners, session) -> bool:
+    return runners.sessions.is_live(runners.question_pool, runners.user_id, session)
+
+
+def test_matching_branch_is_adopted():
+    async def scenario():
+        runners, first = await started_game("speculation-adopt")
+        await runners.speculate(first, runners.question_number)
+        branch = runners.speculative_turn.branches["yes"]
+        other = runners.speculative_turn.branches["no"]
+
+        assert await runners.guess_or_ask("yes") is not None
+        assert runners.question_agent_session is branch.session
+        assert not is_live(runners, other.session)
+        await runners.end_game()
+
+    asyncio.run(scenario())
+
+
+def test_branches_for_another_question_are_discarded():
+    async def scenario():
+        runners, first = await started_game("speculation-stale")
+        game_session = runners.question_agent_session
+
+        # Started for a question the player has already answered
+        await runners.speculate(first, runners.question_number - 1)
+        assert runners.speculative_turn is None
+
+        await runners.speculate(first, runners.question_number)
+        branches = list(runners.speculative_turn.branches.values())
+        runners.speculative_turn.question_number -= 1
+        assert await runners.guess_or_ask("yes") is not None
+        assert runners.question_agent_session is game_session
+        assert not any(is_live(runners, branch.session) for branch in branches)
+        await runners.end_game()
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_the_turn_releases_the_branch_and_propagates():
+    async def scenario():
+        runners, _ = await started_game("speculation-cancel")
+        fork = await runners.question_pool.fork_session(runners.user_id, runners.question_agent_session)
+        branch = SpeculativeBranch(answer="yes", session=fork, task=asyncio.ensure_future(asyncio.sleep(10)))
+
+        turn = asyncio.ensure_future(runners.commit_speculative_branch(branch))
+        await asyncio.sleep(0)
+        turn.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await turn
+        await asyncio.sleep(0)
+        assert branch.task.cancelled()
+        assert not is_live(runners, fork)
+        await runners.end_game()
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_branch_falls_back_to_a_normal_turn():
+    async def scenario():
+        runners, _ = await started_game("speculation-fallback")
+        game_session = runners.question_agent_session
+        fork = await runners.question_pool.fork_session(runners.user_id, game_session)
+        branch = SpeculativeBranch(answer="yes", session=fork, task=asyncio.ensure_future(asyncio.sleep(10)))
+        branch.task.cancel()
+
+        assert await runners.commit_speculative_branch(branch) is None
+        assert runners.question_agent_session is game_session
+        assert not is_live(runners, fork)
+        await runners.end_game()
+
+    asyncio.run(scenario())
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+from validation_cache import CACHE_VERSION, Lexicon, ValidationCache, cache_scope, normalize_input
+
+VALID = {"is_valid": True, "reason": "A common object."}
+
+
+@pytest.fixture
+def lexicon(tmp_path):
+    path = tmp_path / "lexicon.txt"
+    path.write_text("# comment\nelephant\nbutterfly\nknife\n", encoding="utf-8")
+    return Lexicon(path)
+
+
+def test_normalize_input():
+    assert normalize_input("  The   Red Car!  ") == "red car"
+    assert normalize_input("an Apple") == "apple"
+
+
+def test_lexicon_matches_plurals(lexicon):
+    assert lexicon.lookup("elephants") == "elephant"
+    assert lexicon.lookup("butterflies") == "butterfly"
+    assert lexicon.lookup("knives") == "knife"
+    assert lexicon.lookup("spaceship") is None
+
+
+def test_lexicon_hit_and_cache_hit(lexicon):
+    cache = ValidationCache(path=None, lexicon=lexicon)
+    assert cache.get("Elephants")["is_valid"] is True
+    assert cache.get("spaceship") is None
+    cache.put("spaceship", VALID)
+    assert cache.get("A spaceship.") == VALID
+    assert cache.counters() == {"lexicon_hits": 1, "cache_hits": 1, "misses": 1, "saves": 0}
+
+
+def test_least_recently_used_verdict_is_dropped(lexicon):
+    cache = ValidationCache(max_entries=2, path=None, lexicon=lexicon)
+    cache.put("one", VALID)
+    cache.put("two", VALID)
+    cache.get("one")
+    cache.put("three", VALID)
+    assert list(cache.entries) == ["one", "three"]
+
+
+def test_malformed_verdict_is_not_cached(lexicon):
+    cache = ValidationCache(path=None, lexicon=lexicon)
+    cache.put("spaceship", {"is_valid": "maybe"})
+    assert cache.get("spaceship") is None
+
+
+def test_verdicts_are_kept_per_scope(tmp_path, lexicon):
+    path = tmp_path / "cache.json"
+    ValidationCache(path=path, lexicon=lexicon, scope="gemini:a").put("spaceship", VALID)
+
+    assert ValidationCache(path=path, lexicon=lexicon, scope="gemini:b").get("spaceship") is None
+    other = ValidationCache(path=path, lexicon=lexicon, scope="gemini:b")
+    other.put("rocket", VALID)
+
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert stored["version"] == CACHE_VERSION
+    assert set(stored["scopes"]) == {"gemini:a", "gemini:b"}
+    assert ValidationCache(path=path, lexicon=lexicon, scope="gemini:a").get("spaceship") == VALID
+
+
+def test_unscoped_file_is_discarded(tmp_path, lexicon):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"spaceship": VALID}), encoding="utf-8")
+    assert ValidationCache(path=path, lexicon=lexicon).get("spaceship") is None
+
+
+def test_writes_are_batched_off_the_event_loop(tmp_path, lexicon):
+    path = tmp_path / "cache.json"
+    cache = ValidationCache(path=path, lexicon=lexicon, save_delay_seconds=0.05)
+
+    async def main():
+        for word in ("one", "two", "three"):
+            cache.put(word, VALID)
+        assert not path.exists()
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    assert cache.saves == 1
+    assert set(json.loads(path.read_text(encoding="utf-8"))["scopes"]["default"]) == {"one", "two", "three"}
+
+
+def test_flush_writes_pending_verdicts(tmp_path, lexicon):
+    path = tmp_path / "cache.json"
+    cache = ValidationCache(path=path, lexicon=lexicon, save_delay_seconds=60)
+
+    async def main():
+        cache.put("one", VALID)
+
+    asyncio.run(main())
+    assert not path.exists()
+    cache.flush()
+    assert path.exists()
+
+
+def test_offline_backends_do_not_persist(monkeypatch):
+    monkeypatch.setenv("MODEL_BACKEND", "stub")
+    assert ValidationCache.from_env().path is None
+    monkeypatch.setenv("MODEL_BACKEND", "gemini")
+    cache = ValidationCache.from_env()
+    assert cache.path is not None
+    assert cache.scope == cache_scope() and cache.scope.startswith("gemini:")
@@ -1,10 +1,28 @@
 import logging
 logger = logging.getLogger(__name__)
 
+import queue
 import tkinter as tk
+from tkinter import font as tkfont
 from tkinter import ttk
 from typing import Callable
 
+# Shared named fonts: (base size at 600x700, weight).
+# Widgets reference these Font objects, so resizing a font once updates every widget using it.
+FONT_SPECS = {
+    "title": (32, "bold"),
+    "subtitle": (18, "normal"),
+    "body": (16, "normal"),
+    "button": (16, "bold"),
+    "start_button": (14, "bold"),
+    "question": (20, "normal"),
+    "reasoning": (14, "normal"),
+    "small": (12, "normal"),
+}
+START_HINT = "Enter the name of an object, animal, or concept you want me to guess."
+# Resize events are coalesced into at most one font update per frame
+RESIZE_FRAME_MS = 16
+
 
 class GameUI:
     # Handles all UI components and layout for the 20 Questions game
@@ -30,6 +48,19 @@ class GameUI:
         self.main_frame = ttk.Frame(self.root, padding="20")
         self.main_frame.grid(row=0, column=0, sticky="nsew")
         self.main_frame.grid_columnconfigure(0, weight=1)
+        self.main_frame.grid_rowconfigure(0, weight=1)
+        
+        # Screens are built on first use and then reused
+        self.start_frame = None
+        self.game_frame = None
+        
+        # Shared fonts, resized together on window resize
+        self.fonts = {
+            name: tkfont.Font(self.root, family="Arial", size=size, weight=weight)
+            for name, (size, weight) in FONT_SPECS.items()
+        }
+        self._resize_job = None
+        self._applied_size = None
         
         # Bind resize event for responsiveness
         self.root.bind('<Configure>', self.on_window_resize)
@@ -38,33 +69,29 @@ class GameUI:
         self.current_screen = "start"
         self.current_question = 1
         
-    def create_start_screen(self):
-        # Create the start game screen
-        # Clear main frame
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-        
-        self.current_screen = "start"
+    def build_start_screen(self):
+        # Build the start game screen once; create_start_screen shows and resets it
+        self.start_frame = ttk.Frame(self.main_frame)
         
         # Configure grid weights for responsive layout
         for i in range(7):
-            self.main_frame.grid_rowconfigure(i, weight=1)
-        self.main_frame.grid_columnconfigure(0, weight=1)
+            self.start_frame.grid_rowconfigure(i, weight=1)
+        self.start_frame.grid_columnconfigure(0, weight=1)
         
         # Title label
         self.title_label = ttk.Label(
-            self.main_frame,
+            self.start_frame,
             text="20 Questions Game",
-            font=("Arial", self.get_responsive_font_size(32), "bold"),
+            font=self.fonts["title"],
             anchor="center"
         )
         self.title_label.grid(row=0, column=0, pady=20, sticky="ew")
         
         # Instruction label
         self.instruction_label = ttk.Label(
-            self.main_frame,
+            self.start_frame,
             text="Think of an object, animal, or concept.\nI'll try to guess it in 20 questions!",
-            font=("Arial", self.get_responsive_font_size(18)),
+            font=self.fonts["subtitle"],
             anchor="center",
             justify="center"
         )
@@ -72,17 +99,17 @@ class GameUI:
         
         # Input label
         self.input_label = ttk.Label(
-            self.main_frame,
+            self.start_frame,
             text="What are you thinking of?",
-            font=("Arial", self.get_responsive_font_size(16)),
+            font=self.fonts["body"],
             anchor="center"
         )
         self.input_label.grid(row=2, column=0, pady=(20, 5), sticky="ew")
         
         # Text entry
         self.text_entry = ttk.Entry(
-            self.main_frame,
-            font=("Arial", self.get_responsive_font_size(16)),
+            self.start_frame,
+            font=self.fonts["body"],
             justify="center"
         )
         self.text_entry.grid(row=3, column=0, pady=5, padx=50, sticky="ew")
@@ -91,18 +118,18 @@ class GameUI:
         
         # Start button frame for centering
         responsive_padding = self.get_responsive_padding(100)
-        start_button_container = ttk.Frame(self.main_frame)
-        start_button_container.grid(row=4, column=0, pady=20, padx=responsive_padding, sticky="ew")
-        start_button_container.grid_columnconfigure(0, weight=1)
+        self.start_button_container = ttk.Frame(self.start_frame)
+        self.start_button_container.grid(row=4, column=0, pady=20, padx=responsive_padding, sticky="ew")
+        self.start_button_container.grid_columnconfigure(0, weight=1)
         
         # Start button using same style as yes/no buttons
-        self.start_button_frame = tk.Frame(start_button_container, bg="#007bff", relief="raised", bd=2)
+        self.start_button_frame = tk.Frame(self.start_button_container, bg="#007bff", relief="raised", bd=2)
         self.start_button_frame.grid(row=0, column=0)
         
         self.start_button = tk.Label(
             self.start_button_frame,
             text="Start Game",
-            font=("Arial", self.get_responsive_font_size(14), "bold"),
+            font=self.fonts["start_button"],
             bg="#007bff",
             fg="white",
             padx=30,
@@ -116,33 +143,35 @@ class GameUI:
         
         # Bottom label for feedback
         self.bottom_label = ttk.Label(
-            self.main_frame,
-            text="Enter the name of an object, animal, or concept you want me to guess.",
-            font=("Arial", self.get_responsive_font_size(12)),
+            self.start_frame,
+            text=START_HINT,
+            font=self.fonts["small"],
             anchor="center",
             foreground="gray",
             wraplength=500
         )
         self.bottom_label.grid(row=6, column=0, pady=10, sticky="ew")
-        
-        # Ensure fonts are properly sized for current window after creation
-        self.root.after(10, self.update_start_screen_fonts)
     
-    def create_game_screen(self, question_text: str, show_buttons: bool = True):
-        # Create the in-game screen
-        # Clear main frame
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+    def create_start_screen(self):
+        # Show the start game screen with an empty entry
+        if self.start_frame is None:
+            self.build_start_screen()
         
-        self.current_screen = "game"
+        self.text_entry.delete(0, tk.END)
+        self.show_feedback_message(START_HINT)
+        self.show_screen("start")
+    
+    def build_game_screen(self):
+        # Build the in-game screen once; create_game_screen shows and resets it
+        self.game_frame = ttk.Frame(self.main_frame)
         
         # Configure grid weights for responsive layout (now with reasoning row)
         for i in range(6):
-            self.main_frame.grid_rowconfigure(i, weight=1)
-        self.main_frame.grid_columnconfigure(0, weight=1)
+            self.game_frame.grid_rowconfigure(i, weight=1)
+        self.game_frame.grid_columnconfigure(0, weight=1)
         
         # Top header frame for question counter and start over button
-        header_frame = ttk.Frame(self.main_frame)
+        header_frame = ttk.Frame(self.game_frame)
         header_frame.grid(row=0, column=0, sticky="ew", pady=(10, 20))
         header_frame.grid_columnconfigure(1, weight=1)  # Middle column expands
         
@@ -150,7 +179,7 @@ class GameUI:
         self.question_counter_label = ttk.Label(
             header_frame,
             text=f"Question {self.current_question} of 20",
-            font=("Arial", self.get_responsive_font_size(16))
+            font=self.fonts["body"]
         )
         self.question_counter_label.grid(row=0, column=0, sticky="w")
         
@@ -163,28 +192,27 @@ class GameUI:
         self.start_over_button.grid(row=0, column=2, sticky="e")
         
         # Spacer for vertical centering
-        spacer_top = ttk.Frame(self.main_frame)
+        spacer_top = ttk.Frame(self.game_frame)
         spacer_top.grid(row=1, column=0, sticky="ew")
         
         # Question label (center of screen)
         self.question_label = ttk.Label(
-            self.main_frame,
-            text=question_text,
-            font=("Arial", self.get_responsive_font_size(20)),
+            self.game_frame,
+            text="",
+            font=self.fonts["question"],
             anchor="center",
             wraplength=500
         )
         self.question_label.grid(row=2, column=0, pady=20, sticky="ew")
         
-        # Buttons frame for yes/no buttons (only show if needed)
-        if show_buttons:
-            self.create_yes_no_buttons()
+        # Buttons frame for yes/no buttons (hidden when not needed)
+        self.create_yes_no_buttons()
         
         # Reasoning text area below buttons
         self.reasoning_label = ttk.Label(
-            self.main_frame,
+            self.game_frame,
             text="",
-            font=("Arial", self.get_responsive_font_size(14)),
+            font=self.fonts["reasoning"],
             anchor="center",
             wraplength=500,
             foreground="gray"
@@ -192,15 +220,43 @@ class GameUI:
         self.reasoning_label.grid(row=4, column=0, pady=(10, 20), sticky="ew")
         
         # Spacer at bottom for vertical centering
-        spacer_bottom = ttk.Frame(self.main_frame)
+        spacer_bottom = ttk.Frame(self.game_frame)
         spacer_bottom.grid(row=5, column=0, sticky="ew")
+    
+    def create_game_screen(self, question_text: str, show_buttons: bool = True):
+        # Show the in-game screen, reusing its widgets
+        if self.game_frame is None:
+            self.build_game_screen()
         
-        # Ensure fonts are properly sized for current window after creation
-        self.root.after(10, self.update_game_screen_fonts)
+        self.update_question_text(question_text)
+        self.update_question_counter(self.current_question)
+        self.update_reasoning_text("")
+        if show_buttons:
+            self.buttons_frame.grid()
+        else:
+            self.buttons_frame.grid_remove()
+        self.show_screen("game")
+    
+    def hide_answer_buttons(self):
+        # Nothing left to answer once the game is over
+        if self.game_frame is not None:
+            self.buttons_frame.grid_remove()
+
+    def show_screen(self, screen: str):
+        # Switch screens by hiding the other frame; widgets are kept alive
+        self.current_screen = screen
+        visible = self.start_frame if screen == "start" else self.game_frame
+        for frame in (self.start_frame, self.game_frame):
+            if frame is not None and frame is not visible:
+                frame.grid_remove()
+        visible.grid(row=0, column=0, sticky="nsew")
+        
+        # Ensure fonts are properly sized for current window
+        self.schedule_resize()
     
     def create_yes_no_buttons(self):
         # Create the Yes/No buttons
-        self.buttons_frame = ttk.Frame(self.main_frame)
+        self.buttons_frame = ttk.Frame(self.game_frame)
         self.buttons_frame.grid(row=3, column=0, pady=20, sticky="ew")
         self.buttons_frame.grid_columnconfigure(0, weight=1)
         self.buttons_frame.grid_columnconfigure(1, weight=0)
@@ -214,7 +270,7 @@ class GameUI:
         self.yes_button = tk.Label(
             self.yes_button_frame,
             text="Yes",
-            font=("Arial", self.get_responsive_font_size(16), "bold"),
+            font=self.fonts["button"],
             bg="#28a745",
             fg="white",
             padx=30,
@@ -233,7 +289,7 @@ class GameUI:
         self.no_button = tk.Label(
             self.no_button_frame,
             text="No",
-            font=("Arial", self.get_responsive_font_size(16), "bold"),
+            font=self.fonts["button"],
             bg="#dc3545",
             fg="white",
             padx=30,
@@ -279,56 +335,35 @@ class GameUI:
             return base_padding
     
     def on_window_resize(self, event):
-        # Handle window resize events for responsive design
+        # Handle window resize events for responsive design.
+        # <Configure> fires for every widget and many times per drag, so only
+        # schedule one update per frame and let it read the latest size.
         if event.widget == self.root:
-            logger.info(f"Window resized to: {self.root.winfo_width()}x{self.root.winfo_height()}")
-            
-            # Update font sizes for current screen
-            if self.current_screen == "start":
-                self.root.after(10, self.update_start_screen_fonts)
-            elif self.current_screen == "game":
-                self.root.after(10, self.update_game_screen_fonts)
+            self.schedule_resize()
     
-    def update_start_screen_fonts(self):
-        # Update all start screen fonts for current window size
-        try:
-            if hasattr(self, 'title_label'):
-                self.title_label.configure(font=("Arial", self.get_responsive_font_size(32), "bold"))
-            if hasattr(self, 'instruction_label'):
-                self.instruction_label.configure(font=("Arial", self.get_responsive_font_size(18)))
-            if hasattr(self, 'input_label'):
-                self.input_label.configure(font=("Arial", self.get_responsive_font_size(16)))
-            if hasattr(self, 'text_entry'):
-                self.text_entry.configure(font=("Arial", self.get_responsive_font_size(16)))
-            if hasattr(self, 'start_button'):
-                # Update button font directly like yes/no buttons
-                self.start_button.configure(font=("Arial", self.get_responsive_font_size(14), "bold"))
-                # Update button padding responsively
-                responsive_padding = self.get_responsive_padding(100)
-                if hasattr(self, 'start_button_frame'):
-                    # The container needs to be re-gridded with new padding
-                    start_button_container = self.start_button_frame.master
-                    start_button_container.grid(row=4, column=0, pady=20, padx=responsive_padding, sticky="ew")
-            if hasattr(self, 'bottom_label'):
-                self.bottom_label.configure(font=("Arial", self.get_responsive_font_size(12)))
-        except Exception as e:
-            logger.error(f"Error updating start screen fonts: {e}")
+    def schedule_resize(self):
+        if self._resize_job is None:
+            self._resize_job = self.root.after(RESIZE_FRAME_MS, self.apply_resize)
     
-    def update_game_screen_fonts(self):
-        # Update all game screen fonts for current window size
+    def apply_resize(self):
+        # Resize the shared fonts (and start button padding) for the current window size
+        self._resize_job = None
+        size = (self.root.winfo_width(), self.root.winfo_height())
+        if size == self._applied_size:
+            return
+        self._applied_size = size
+        logger.debug(f"Window resized to: {size[0]}x{size[1]}")
+        
         try:
-            if hasattr(self, 'question_counter_label'):
-                self.question_counter_label.configure(font=("Arial", self.get_responsive_font_size(16)))
-            if hasattr(self, 'question_label'):
-                self.question_label.configure(font=("Arial", self.get_responsive_font_size(20)))
-            if hasattr(self, 'yes_button'):
-                self.yes_button.configure(font=("Arial", self.get_responsive_font_size(16), "bold"))
-            if hasattr(self, 'no_button'):
-                self.no_button.configure(font=("Arial", self.get_responsive_font_size(16), "bold"))
-            if hasattr(self, 'reasoning_label'):
-                self.reasoning_label.configure(font=("Arial", self.get_responsive_font_size(14)))
+            for name, (base_size, _) in FONT_SPECS.items():
+                font_size = self.get_responsive_font_size(base_size)
+                if self.fonts[name].cget("size") != font_size:
+                    self.fonts[name].configure(size=font_size)
+            # The start screen is only hidden while a game runs, so keep its padding current too
+            if hasattr(self, 'start_button_container'):
+                self.start_button_container.grid_configure(padx=self.get_responsive_padding(100))
         except Exception as e:
-            logger.error(f"Error updating game screen fonts: {e}")
+            logger.error(f"Error updating fonts: {e}")
     
     def on_text_focus(self, event):
         # Handle text entry focus - clear placeholder text
@@ -365,6 +400,19 @@ class GameUI:
         if hasattr(self, 'bottom_label'):
             self.bottom_label.configure(text=message, foreground=color)
     
+    def poll_result_queue(self, result_queue: queue.Queue, interval_ms: int = 50):
+        # Drain callbacks posted by the background worker and run them on the Tk thread
+        try:
+            while True:
+                callback = result_queue.get_nowait()
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Error handling background result: {e}")
+        except queue.Empty:
+            pass
+        self.root.after(interval_ms, self.poll_result_queue, result_queue, interval_ms)
+    
     def run(self):
         # Start the UI main loop
         self.root.mainloop()
\ No newline at end of file
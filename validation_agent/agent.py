@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 
 from google.adk.agents import LlmAgent
+from model_backend import get_model
 
 
 class ValidationOutput(BaseModel):
@@ -9,7 +10,7 @@ class ValidationOutput(BaseModel):
 
 root_agent = LlmAgent(
     name="validation_agent",
-    model="gemini-2.5-flash", # Or your preferred Gemini model
+    model=get_model(), # Set MODEL_BACKEND to run without Gemini
     instruction="You are incharge of validate user's initial input",
     description="""The user is going to play a game of 20 Questions.
     Before starting the game, you need to validate the user's input to ensure it is a valid object for the game.
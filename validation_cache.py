@@ -0,0 +1,240 @@
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import re
+import json
+import atexit
+import asyncio
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from metrics import model_name
+from validation_agent.agent import ValidationOutput, root_agent as validation_agent
+
+LEXICON_PATH = Path(__file__).parent / "validation_agent" / "lexicon.txt"
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".validation_cache.json"
+DEFAULT_CACHE_SIZE = 1024
+# Version 2 keeps verdicts per model scope (see cache_scope)
+CACHE_VERSION = 2
+# Verdicts added within this many seconds are written to disk together
+SAVE_DELAY_SECONDS = 1.0
+# Offline backends make up their verdicts, so they are never written to disk
+OFFLINE_BACKENDS = ("stub", "replay")
+
+_ARTICLES = ("a ", "an ", "the ")
+
+
+def normalize_input(user_input: str) -> str:
+    # Canonical form used for lexicon lookups and cache keys:
+    # lower case, single spaces, no surrounding punctuation or leading article
+    text = re.sub(r"\s+", " ", user_input.strip().lower())
+    text = text.strip(" .,!?;:'\"")
+    for article in _ARTICLES:
+        if text.startswith(article):
+            text = text[len(article):]
+            break
+    return text
+
+
+def singular_candidates(text: str) -> list[str]:
+    # Possible singular forms of the last word, most likely first
+    head, _, word = text.rpartition(" ")
+    prefix = f"{head} " if head else ""
+    candidates = [text]
+    if word.endswith("ies") and len(word) > 4:
+        candidates.append(prefix + word[:-3] + "y")
+    if word.endswith("ves") and len(word) > 4:
+        candidates.append(prefix + word[:-3] + "f")
+        candidates.append(prefix + word[:-3] + "fe")
+    if word.endswith("es") and len(word) > 3:
+        candidates.append(prefix + word[:-2])
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 2:
+        candidates.append(prefix + word[:-1])
+    return candidates
+
+
+def cache_scope() -> str:
+    # Verdicts are only reused with the backend and model that produced them;
+    # "record" calls Gemini, so it shares the "gemini" verdicts
+    backend = os.getenv("MODEL_BACKEND", "gemini")
+    if backend == "record":
+        backend = "gemini"
+    return f"{backend}:{model_name(validation_agent.model)}"
+
+
+class Lexicon:
+    # Bundled set of common nouns that are always valid game inputs
+
+    def __init__(self, path: Path = LEXICON_PATH):
+        words = set()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    words.add(line)
+        self.words = frozenset(words)
+
+    def lookup(self, normalized: str) -> Optional[str]:
+        # Return the lexicon entry matching the input (or its singular), if any
+        for candidate in singular_candidates(normalized):
+            if candidate in self.words:
+                return candidate
+        return None
+
+
+class ValidationCache:
+    # Validation layer in front of the validation agent:
+    # lexicon fast path, then a bounded LRU backed by an on-disk JSON file.
+    # Only misses on both need an LLM call.
+    # The file keeps a separate set of verdicts per scope (backend and model);
+    # only this cache's scope is read, and the others are written back untouched.
+    # New verdicts are written in the background, batched over SAVE_DELAY_SECONDS.
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE,
+                 path: Optional[Path] = DEFAULT_CACHE_PATH,
+                 lexicon: Optional[Lexicon] = None,
+                 scope: str = "default",
+                 save_delay_seconds: float = SAVE_DELAY_SECONDS):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.lexicon = lexicon or Lexicon()
+        self.scope = scope
+        self.save_delay_seconds = save_delay_seconds
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        # Verdicts of other scopes found in the file
+        self.other_scopes: dict[str, dict] = {}
+        self.lexicon_hits = 0
+        self.cache_hits = 0
+        self.misses = 0
+        self.saves = 0
+        self._save_pending = False
+        self._write_lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def from_env(cls) -> "ValidationCache":
+        # VALIDATION_CACHE_PATH="" disables the on-disk cache, as do offline backends
+        path = os.getenv("VALIDATION_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+        if os.getenv("MODEL_BACKEND", "gemini") in OFFLINE_BACKENDS:
+            path = ""
+        return cls(
+            max_entries=int(os.getenv("VALIDATION_CACHE_SIZE", str(DEFAULT_CACHE_SIZE))),
+            path=Path(path) if path else None,
+            scope=cache_scope()
+        )
+
+    def get(self, user_input: str) -> Optional[dict]:
+        # Return a verdict without calling the LLM, or None on a miss
+        key = normalize_input(user_input)
+
+        word = self.lexicon.lookup(key)
+        if word is not None:
+            self.lexicon_hits += 1
+            return {"is_valid": True, "reason": f"'{word}' is a common noun that works well for the game."}
+
+        verdict = self.entries.get(key)
+        if verdict is not None:
+            self.entries.move_to_end(key)
+            self.cache_hits += 1
+            return dict(verdict)
+
+        self.misses += 1
+        return None
+
+    def counters(self) -> dict:
+        return {
+            "lexicon_hits": self.lexicon_hits,
+            "cache_hits": self.cache_hits,
+            "misses": self.misses,
+            "saves": self.saves,
+        }
+
+    def put(self, user_input: str, verdict: dict):
+        # Remember an LLM verdict in memory, and on disk shortly after
+        try:
+            verdict = ValidationOutput.model_validate(verdict).model_dump()
+        except Exception as e:
+            logger.warning(f"Not caching malformed validation verdict: {e}")
+            return
+
+        key = normalize_input(user_input)
+        self.entries[key] = verdict
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.schedule_save()
+
+    def load(self):
+        # Read previously stored verdicts of this scope, ignoring a missing or corrupt file
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") != CACHE_VERSION:
+                # Older files do not say which model produced their verdicts
+                logger.info(f"Discarding unscoped validation cache {self.path}")
+                return
+            scopes = stored["scopes"]
+            for key, verdict in scopes.pop(self.scope, {}).items():
+                self.entries[key] = ValidationOutput.model_validate(verdict).model_dump()
+            self.other_scopes = scopes
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            logger.info(f"Loaded {len(self.entries)} cached validation verdicts for {self.scope}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable validation cache {self.path}: {e}")
+            self.entries.clear()
+            self.other_scopes = {}
+
+    def schedule_save(self):
+        # Write the cache once, SAVE_DELAY_SECONDS after the first unsaved verdict,
+        # on a worker thread. Without a running event loop it is written straight away.
+        if self.path is None or self._save_pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._save_pending = True
+        # Verdicts still waiting to be written when the process exits are saved then
+        atexit.register(self.flush)
+        loop.call_later(self.save_delay_seconds, self.save_in_background, loop)
+
+    def save_in_background(self, loop: asyncio.AbstractEventLoop):
+        # Snapshot on the event loop, write on a worker thread
+        if self._save_pending:
+            self._save_pending = False
+            atexit.unregister(self.flush)
+            loop.run_in_executor(None, self.write, self.snapshot())
+
+    def flush(self):
+        # Write any verdicts not saved yet
+        if self._save_pending:
+            self._save_pending = False
+            atexit.unregister(self.flush)
+            self.save()
+
+    def snapshot(self) -> dict:
+        return {"version": CACHE_VERSION, "scopes": {**self.other_scopes, self.scope: dict(self.entries)}}
+
+    def save(self):
+        self.write(self.snapshot())
+
+    def write(self, data: dict):
+        # Write the cache atomically so a crash never leaves a truncated file
+        if self.path is None:
+            return
+        try:
+            with self._write_lock:
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            self.saves += 1
+        except OSError as e:
+            logger.warning(f"Could not write validation cache {self.path}: {e}")